@@ -0,0 +1,120 @@
+"""
+Backend overhead benchmark: dspy.Predict vs the direct OpenAI-client backend
+
+Both backends talk HTTP to the same zero-latency StubServer, so the difference
+is the client-side cost of prompt formatting, routing and parsing. CPU time is
+measured on the calling thread only (time.thread_time), which excludes the
+stub server's own request handling.
+
+Usage:
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --turns 10 200 --repeat 100 --output-mode json
+"""
+
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import dspy
+import openai
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.testing import StubResponder, StubServer
+
+from .common import make_fields, make_transcript, save_results
+
+
+def _per_call(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Average wall and calling-thread CPU time of fn in microseconds"""
+    for _ in range(3):
+        fn()
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    for _ in range(repeat):
+        fn()
+    return {
+        "wall_us": 1e6 * (time.perf_counter() - wall_start) / repeat,
+        "cpu_us": 1e6 * (time.thread_time() - cpu_start) / repeat,
+    }
+
+
+def _row(case: str, turns: int, old: Dict[str, float], new: Dict[str, float]):
+    print(
+        f"{case:<10} turns={turns:<5} "
+        f"dspy cpu={old['cpu_us']:>9.1f} us  openai cpu={new['cpu_us']:>9.1f} us  "
+        f"cpu speedup={old['cpu_us'] / new['cpu_us']:>5.2f}x  "
+        f"wall speedup={old['wall_us'] / new['wall_us']:>5.2f}x"
+    )
+    return {
+        "case": case,
+        "turns": turns,
+        "dspy_cpu_us": round(old["cpu_us"], 2),
+        "openai_cpu_us": round(new["cpu_us"], 2),
+        "dspy_wall_us": round(old["wall_us"], 2),
+        "openai_wall_us": round(new["wall_us"], 2),
+        "cpu_speedup": round(old["cpu_us"] / new["cpu_us"], 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", nargs="+", type=int, default=[10, 100])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output-mode", choices=["text", "json"], default="text")
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    args = parser.parse_args(argv)
+
+    rows = []
+    with StubServer(StubResponder(reasoning_tokens=20)) as server:
+        lm = dspy.LM(
+            "openai/stub",
+            api_key="stub",
+            api_base=server.base_url,
+            logprobs=True,
+            cache=False,
+        )
+        client = openai.OpenAI(api_key="stub", base_url=server.base_url)
+        options = {"api_key": "stub", "model": "stub", "output_mode": args.output_mode}
+        processors = [
+            TranscriptProcessor(fields=make_fields(1), lm=lm, **options),
+            TranscriptProcessor(
+                fields=make_fields(1), backend="openai", client=client, **options
+            ),
+        ]
+        evaluators = [
+            AssertsEvaluator(evaluation_steps=["Step"], lm=lm, **options),
+            AssertsEvaluator(
+                evaluation_steps=["Step"], backend="openai", client=client, **options
+            ),
+        ]
+
+        for turns in args.turns:
+            transcript = make_transcript(turns)
+            rows.append(
+                _row(
+                    "process",
+                    turns,
+                    *(
+                        _per_call(lambda p=p: p.process(transcript), args.repeat)
+                        for p in processors
+                    ),
+                )
+            )
+            rows.append(
+                _row(
+                    "evaluate",
+                    turns,
+                    *(
+                        _per_call(lambda e=e: e.evaluate(transcript), args.repeat)
+                        for e in evaluators
+                    ),
+                )
+            )
+
+    if args.save:
+        print(f"Saved results to {save_results('backends', rows, vars(args))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
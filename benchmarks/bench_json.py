@@ -0,0 +1,152 @@
+"""
+Serialization benchmark: process_json / evaluate_json vs the bytes variants
+
+Measures the JSON decode, validation and encode overhead around the LM calls by
+running processors with an empty schema (no LM calls at all) for the input side,
+serializing large outputs for the output side, and an end-to-end pass against
+a zero-latency stub LM.
+
+Usage:
+    python -m benchmarks.bench_json
+    python -m benchmarks.bench_json --turns 10 100 1000 --repeat 200
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic_core import to_json
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.models import (
+    AssertionOutput,
+    AssertionResult,
+    FieldResult,
+    TranscriptOutput,
+)
+from transtype.testing import StubLM
+
+from .common import make_fields, make_transcript, save_results
+
+
+def _per_call_us(fn: Callable[[], Any], repeat: int) -> float:
+    """Average wall time of fn in microseconds, after a short warm-up"""
+    for _ in range(3):
+        fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return 1e6 * (time.perf_counter() - start) / repeat
+
+
+def _row(case: str, size: int, old_us: float, new_us: float) -> Dict[str, Any]:
+    print(
+        f"{case:<24} size={size:<5} json={old_us:>10.1f} us  "
+        f"bytes={new_us:>10.1f} us  speedup={old_us / new_us:>5.2f}x"
+    )
+    return {
+        "case": case,
+        "size": size,
+        "json_us": round(old_us, 2),
+        "bytes_us": round(new_us, 2),
+        "speedup": round(old_us / new_us, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument("--fields", nargs="+", type=int, default=[5, 50])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    args = parser.parse_args(argv)
+
+    rows = []
+    empty_processor = TranscriptProcessor(api_key="stub", fields=[], lm=StubLM())
+    for turns in args.turns:
+        text = json.dumps(make_transcript(turns))
+        payload = text.encode()
+        rows.append(
+            _row(
+                "process input",
+                turns,
+                _per_call_us(lambda: empty_processor.process_json(text), args.repeat),
+                _per_call_us(
+                    lambda: empty_processor.process_json_bytes(payload), args.repeat
+                ),
+            )
+        )
+
+    reason = "The agent stated the value explicitly while confirming details. " * 4
+    for fields in args.fields:
+        output = TranscriptOutput(
+            fields=[
+                FieldResult(
+                    field_name=f"field_{i}",
+                    field_value="Sarah Chen",
+                    field_confidence=0.93,
+                    field_reason=reason,
+                )
+                for i in range(fields)
+            ]
+        )
+        rows.append(
+            _row(
+                "transcript output",
+                fields,
+                _per_call_us(
+                    lambda: json.dumps(output.model_dump(), indent=2), args.repeat
+                ),
+                _per_call_us(lambda: to_json(output), args.repeat),
+            )
+        )
+
+    assertion = AssertionOutput(
+        result=AssertionResult(score=0.8, confidence=0.9, reason=reason, success=True)
+    )
+    rows.append(
+        _row(
+            "assertion output",
+            1,
+            _per_call_us(
+                lambda: json.dumps(assertion.model_dump(), indent=2), args.repeat
+            ),
+            _per_call_us(lambda: to_json(assertion), args.repeat),
+        )
+    )
+
+    processor = TranscriptProcessor(api_key="stub", fields=make_fields(5), lm=StubLM())
+    text = json.dumps(make_transcript(100))
+    payload = text.encode()
+    rows.append(
+        _row(
+            "process end-to-end",
+            5,
+            _per_call_us(lambda: processor.process_json(text), args.repeat // 10),
+            _per_call_us(
+                lambda: processor.process_json_bytes(payload), args.repeat // 10
+            ),
+        )
+    )
+
+    evaluator = AssertsEvaluator(api_key="stub", evaluation_steps=["Step"], lm=StubLM())
+    rows.append(
+        _row(
+            "evaluate end-to-end",
+            1,
+            _per_call_us(lambda: evaluator.evaluate_json(text), args.repeat // 10),
+            _per_call_us(
+                lambda: evaluator.evaluate_json_bytes(payload), args.repeat // 10
+            ),
+        )
+    )
+
+    if args.save:
+        print(f"Saved results to {save_results('json', rows, vars(args))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
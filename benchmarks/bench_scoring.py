@@ -0,0 +1,105 @@
+"""
+Scoring benchmark: scalar vs vectorized confidence and weighted scores
+
+Generates logprobs payloads with the StubResponder (the same shape the API
+returns, with top_logprobs) and re-scores them with the per-response methods
+of TranscriptProcessor/AssertsEvaluator and with transtype.scoring.
+
+Usage:
+    python -m benchmarks.bench_scoring
+    python -m benchmarks.bench_scoring --responses 1000 100000 --top-logprobs 10
+"""
+
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.scoring import batch_confidence, batch_weighted_scores
+from transtype.testing import StubResponder
+
+from .common import save_results
+
+
+def _seconds(fn: Callable[[], Any], repeat: int = 3) -> float:
+    """Best wall time of a few runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _row(case: str, responses: int, old_s: float, new_s: float) -> Dict[str, Any]:
+    print(
+        f"{case:<10} responses={responses:<7} scalar={old_s * 1e3:>9.1f} ms  "
+        f"vectorized={new_s * 1e3:>9.1f} ms  speedup={old_s / new_s:>5.2f}x"
+    )
+    return {
+        "case": case,
+        "responses": responses,
+        "scalar_ms": round(old_s * 1e3, 2),
+        "vectorized_ms": round(new_s * 1e3, 2),
+        "speedup": round(old_s / new_s, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--responses", nargs="+", type=int, default=[1000, 20000])
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--top-logprobs", type=int, default=10)
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    args = parser.parse_args(argv)
+
+    responder = StubResponder(seed=0)
+    processor = TranscriptProcessor.__new__(TranscriptProcessor)
+    evaluator = AssertsEvaluator.__new__(AssertsEvaluator)
+
+    rows = []
+    for responses in args.responses:
+        raw_scores = [i % 11 for i in range(responses)]
+        logprobs_list = [
+            responder._token_logprobs(
+                ["[[", " ##", " score", " ##", " ]]", "\n", str(score)]
+                + ["word"] * args.tokens,
+                args.top_logprobs,
+            )
+            for score in raw_scores
+        ]
+        rows.append(
+            _row(
+                "confidence",
+                responses,
+                _seconds(
+                    lambda: [
+                        processor._calculate_confidence_from_logprobs(lp)
+                        for lp in logprobs_list
+                    ]
+                ),
+                _seconds(lambda: batch_confidence(logprobs_list)),
+            )
+        )
+        rows.append(
+            _row(
+                "score",
+                responses,
+                _seconds(
+                    lambda: [
+                        evaluator._generate_weighted_summed_score(score, lp)
+                        for score, lp in zip(raw_scores, logprobs_list)
+                    ]
+                ),
+                _seconds(lambda: batch_weighted_scores(raw_scores, logprobs_list)),
+            )
+        )
+
+    if args.save:
+        print(f"Saved results to {save_results('scoring', rows, vars(args))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Shared helpers for the benchmark scripts: synthetic workloads, latency
+specifications and result persistence
+"""
+
+import json
+import platform
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import transtype
+from transtype.testing import constant_latency, lognormal_latency, uniform_latency
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_SENTENCES = [
+    "I am calling about the invoice I received last week.",
+    "Could you confirm the email address on the account?",
+    "Sure, it is jordan.miles@example.com and my phone is 555 201 3344.",
+    "Thanks, I can see the duplicate charge from the third of March.",
+    "I will issue a refund and you should see it within five business days.",
+    "Is there anything else I can help you with today?",
+    "No, that was everything, thank you for the quick help.",
+    "My name is Sarah Chen and I will be handling your case.",
+]
+
+
+def make_fields(count: int) -> List[Dict[str, Any]]:
+    """Build a schema with the given number of string fields"""
+    return [
+        {
+            "field_name": f"field_{i}",
+            "field_type": "string",
+            "format_example": "Sarah Chen",
+            "field_description": f"Synthetic benchmark field number {i}",
+        }
+        for i in range(count)
+    ]
+
+
+def make_transcript(turns: int, seed: int = 0) -> Dict[str, Any]:
+    """Build a transcript with the given number of alternating turns"""
+    rng = random.Random(seed)
+    return {
+        "messages": [
+            {
+                "role": "assistant" if i % 2 == 0 else "user",
+                "content": " ".join(rng.sample(_SENTENCES, 2)),
+            }
+            for i in range(turns)
+        ]
+    }
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Parse a latency specification such as "constant:0.2", "uniform:0.1,0.5"
+    or "lognormal:0.4,0.5" (median and sigma) into a latency model
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "constant":
+        return constant_latency(values[0] if values else 0.0)
+    if kind == "uniform":
+        return uniform_latency(values[0], values[1], seed=0)
+    if kind == "lognormal":
+        return lognormal_latency(values[0], *values[1:2], seed=0)
+    raise ValueError(f"Unknown latency model: {spec}")
+
+
+def timed(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Run fn once and return its wall and CPU time in seconds"""
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    fn()
+    return {
+        "wall_s": time.perf_counter() - wall_start,
+        "cpu_s": time.process_time() - cpu_start,
+    }
+
+
+def save_results(name: str, rows: List[Dict[str, Any]], params: Dict[str, Any]) -> Path:
+    """Write benchmark rows plus environment metadata to benchmarks/results"""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = RESULTS_DIR / f"{name}-{stamp}.json"
+    payload = {
+        "benchmark": name,
+        "timestamp": stamp,
+        "transtype_version": transtype.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "rows": rows,
+    }
+    path.write_text(json.dumps(payload, indent=2))
+    return path
+
+
+def compare_results(
+    rows: List[Dict[str, Any]],
+    baseline_path: str,
+    key_fields: List[str],
+    higher_is_better: Dict[str, bool],
+    tolerance: float,
+) -> List[str]:
+    """
+    Compare rows against a saved baseline run
+
+    Args:
+        rows: Rows from the current run
+        baseline_path: Path of a previously saved results file
+        key_fields: Row fields identifying a scenario
+        higher_is_better: Metrics to compare, mapped to their direction
+        tolerance: Allowed relative slowdown before a metric counts as regressed
+
+    Returns:
+        Human readable descriptions of every regression found
+    """
+    baseline = json.loads(Path(baseline_path).read_text())
+    previous = {tuple(r[k] for k in key_fields): r for r in baseline["rows"]}
+    regressions = []
+    for row in rows:
+        key = tuple(row[k] for k in key_fields)
+        old: Optional[Dict[str, Any]] = previous.get(key)
+        if old is None:
+            continue
+        for metric, higher in higher_is_better.items():
+            if not old.get(metric):
+                continue
+            change = (row[metric] - old[metric]) / old[metric]
+            if (higher and change < -tolerance) or (not higher and change > tolerance):
+                scenario = ", ".join(f"{k}={v}" for k, v in zip(key_fields, key))
+                regressions.append(
+                    f"{scenario}: {metric} {old[metric]:.4g} -> {row[metric]:.4g}"
+                    f" ({change:+.1%})"
+                )
+    return regressions
@@ -0,0 +1,303 @@
+"""
+Load generator: saturation point of an extraction or evaluation deployment
+
+Replays synthetic transcripts at increasing load against a TranscriptProcessor
+or AssertsEvaluator, in-process on a StubLM, through litellm against a
+StubServer (--server), or against an HTTP front end of your own (--url) that
+accepts a transcript as JSON and returns the process()/evaluate() result.
+The stub simulates a provider with configurable latency and rate-limit (429)
+errors, at random (--rate-limit) or beyond a number of requests in flight
+(--max-in-flight).
+
+Load is either open-loop, at target request rates (--rates, Poisson arrivals;
+latency is measured from the scheduled arrival, so queueing counts), or
+closed-loop, at fixed concurrency (--concurrency). Each level reports
+throughput, p50/p95/p99 latency, the error rate (requests that raised) and the
+degraded rate (results with a field or assertion confidence of 0.0, i.e. a
+failed LM call behind a fallback), and the first level that saturates.
+
+Usage:
+    python -m benchmarks.loadgen --rates 5 10 20 40 --duration 10
+    python -m benchmarks.loadgen --concurrency 1 8 32 --max-in-flight 16
+    python -m benchmarks.loadgen --server --target evaluator --rates 10 20
+    python -m benchmarks.loadgen --url http://localhost:8080/extract --rates 10 20
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import dspy
+import httpx
+import numpy as np
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.testing import StubLM, StubResponder, StubServer
+
+from .common import make_fields, make_transcript, parse_latency, save_results
+
+# (latency in seconds, "ok" | "degraded" | "error")
+Outcome = Tuple[float, str]
+
+
+def _is_degraded(result: Dict[str, Any]) -> bool:
+    """Whether a result holds a failed extraction or evaluation"""
+    if "fields" in result:
+        return any(not f["field_confidence"] for f in result["fields"])
+    return not result.get("result", {}).get("confidence")
+
+
+def _timed_call(
+    call: Callable[[Dict[str, Any]], Dict[str, Any]],
+    transcript: Dict[str, Any],
+    start: float,
+) -> Outcome:
+    try:
+        result = call(dict(transcript))
+    except Exception:
+        return time.perf_counter() - start, "error"
+    status = "degraded" if _is_degraded(result) else "ok"
+    return time.perf_counter() - start, status
+
+
+def run_open_loop(
+    call: Callable[[Dict[str, Any]], Dict[str, Any]],
+    transcripts: List[Dict[str, Any]],
+    rate: float,
+    duration: float,
+    max_workers: int,
+    seed: int = 0,
+) -> Tuple[List[Outcome], float]:
+    """
+    Send requests with Poisson arrivals at a target rate
+
+    Returns:
+        Outcomes of every request and the elapsed wall time in seconds
+    """
+    rng = random.Random(seed)
+    futures = []
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        arrival, i = 0.0, 0
+        while True:
+            arrival += rng.expovariate(rate)
+            if arrival >= duration:
+                break
+            delay = begin + arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            transcript = transcripts[i % len(transcripts)]
+            futures.append(
+                executor.submit(_timed_call, call, transcript, begin + arrival)
+            )
+            i += 1
+        outcomes = [future.result() for future in futures]
+    return outcomes, time.perf_counter() - begin
+
+
+def run_closed_loop(
+    call: Callable[[Dict[str, Any]], Dict[str, Any]],
+    transcripts: List[Dict[str, Any]],
+    concurrency: int,
+    duration: float,
+) -> Tuple[List[Outcome], float]:
+    """
+    Keep a fixed number of requests in flight for a duration
+
+    Returns:
+        Outcomes of every request and the elapsed wall time in seconds
+    """
+    outcomes: List[Outcome] = []
+    lock = threading.Lock()
+    begin = time.perf_counter()
+
+    def worker(offset: int) -> None:
+        i = offset
+        while time.perf_counter() - begin < duration:
+            outcome = _timed_call(
+                call, transcripts[i % len(transcripts)], time.perf_counter()
+            )
+            with lock:
+                outcomes.append(outcome)
+            i += concurrency
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes, time.perf_counter() - begin
+
+
+def summarize(
+    mode: str, level: float, outcomes: List[Outcome], elapsed: float, duration: float
+) -> Dict[str, Any]:
+    """Throughput, latency percentiles and failure rates of one load level"""
+    latencies = np.array([latency for latency, _ in outcomes]) * 1e3
+    statuses = [status for _, status in outcomes]
+    count = len(outcomes)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if count else (np.nan,) * 3
+    return {
+        "mode": mode,
+        "level": level,
+        "requests": count,
+        "offered_rps": round(count / duration, 3) if mode == "rate" else None,
+        "throughput_rps": round(count / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "error_rate": round(statuses.count("error") / count, 4) if count else 0.0,
+        "degraded_rate": (
+            round(statuses.count("degraded") / count, 4) if count else 0.0
+        ),
+    }
+
+
+def saturation_level(
+    rows: List[Dict[str, Any]], slo_ms: float, max_failure_rate: float
+) -> Optional[Dict[str, Any]]:
+    """
+    First load level that saturates the target
+
+    A level saturates when its p99 latency exceeds the SLO (under open-loop
+    load a growing backlog shows up here, since latency includes queueing) or
+    errors plus degraded results exceed max_failure_rate.
+    """
+    for row in rows:
+        failures = row["error_rate"] + row["degraded_rate"]
+        if row["p99_ms"] > slo_ms or failures > max_failure_rate:
+            return row
+    return None
+
+
+def _build_target(
+    args: argparse.Namespace, responder: StubResponder, server: Optional[StubServer]
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Per-transcript call of the configured target"""
+    if args.url:
+        client = httpx.Client(
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.max_workers),
+        )
+
+        def post(transcript: Dict[str, Any]) -> Dict[str, Any]:
+            response = client.post(args.url, json=transcript)
+            response.raise_for_status()
+            return response.json()
+
+        return post
+
+    if server is not None:
+        lm_kwargs = {}
+        if args.num_retries is not None:
+            lm_kwargs["num_retries"] = args.num_retries
+        lm = dspy.LM(
+            "openai/stub",
+            api_key="stub",
+            api_base=server.base_url,
+            logprobs=True,
+            cache=False,
+            **lm_kwargs,
+        )
+    else:
+        lm = StubLM(responder)
+
+    if args.target == "processor":
+        return TranscriptProcessor(
+            api_key="stub", fields=make_fields(args.fields), lm=lm
+        ).process
+    steps = [f"Synthetic evaluation step {i}" for i in range(args.fields)]
+    return AssertsEvaluator(api_key="stub", evaluation_steps=steps, lm=lm).evaluate
+
+
+def _print_row(row: Dict[str, Any]) -> None:
+    print(
+        f"{row['mode']}={row['level']:<7g} requests={row['requests']:<6} "
+        + (f"offered={row['offered_rps']:>8.2f}/s  " if row["offered_rps"] else "")
+        + f"throughput={row['throughput_rps']:>8.2f}/s  "
+        f"p50={row['p50_ms']:>8.1f} ms  p95={row['p95_ms']:>8.1f} ms  "
+        f"p99={row['p99_ms']:>8.1f} ms  errors={row['error_rate']:>6.1%}  "
+        f"degraded={row['degraded_rate']:>6.1%}  429s={row['rate_limited']}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rates", nargs="+", type=float, help="Requests per second")
+    load.add_argument("--concurrency", nargs="+", type=int)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--target", choices=["processor", "evaluator"])
+    parser.add_argument("--fields", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--transcripts", type=int, default=100)
+    parser.add_argument("--max-workers", type=int, default=256)
+    parser.add_argument("--server", action="store_true")
+    parser.add_argument("--url", help="HTTP front end receiving transcripts")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--num-retries", type=int, help="litellm retries (--server)")
+    parser.add_argument("--latency", default="lognormal:0.4,0.5")
+    parser.add_argument("--seconds-per-token", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--max-in-flight", type=int)
+    parser.add_argument("--slo-ms", type=float, default=5000.0)
+    parser.add_argument("--max-failure-rate", type=float, default=0.01)
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    args = parser.parse_args(argv)
+    args.target = args.target or "processor"
+    if not args.rates and not args.concurrency:
+        args.rates = [2.0, 4.0, 8.0, 16.0]
+
+    responder = StubResponder(
+        latency=parse_latency(args.latency),
+        seconds_per_output_token=args.seconds_per_token,
+        rate_limit=args.rate_limit,
+        max_in_flight=args.max_in_flight,
+    )
+    server = StubServer(responder).start() if args.server and not args.url else None
+    transcripts = [make_transcript(args.turns, seed=i) for i in range(args.transcripts)]
+    rows = []
+    try:
+        call = _build_target(args, responder, server)
+        levels = [("rate", rate) for rate in args.rates or []] + [
+            ("concurrency", n) for n in args.concurrency or []
+        ]
+        for mode, level in levels:
+            rejected = responder.rate_limited
+            if mode == "rate":
+                outcomes, elapsed = run_open_loop(
+                    call, transcripts, level, args.duration, args.max_workers
+                )
+            else:
+                outcomes, elapsed = run_closed_loop(
+                    call, transcripts, level, args.duration
+                )
+            row = summarize(mode, level, outcomes, elapsed, args.duration)
+            row["rate_limited"] = responder.rate_limited - rejected
+            _print_row(row)
+            rows.append(row)
+    finally:
+        if server is not None:
+            server.stop()
+
+    saturated = saturation_level(rows, args.slo_ms, args.max_failure_rate)
+    if saturated is None:
+        print("No saturation within the tested levels")
+    else:
+        print(
+            f"Saturation at {saturated['mode']}={saturated['level']:g}: "
+            f"throughput {saturated['throughput_rps']:.2f}/s, "
+            f"p99 {saturated['p99_ms']:.0f} ms"
+        )
+
+    if args.save:
+        print(f"Saved results to {save_results('loadgen', rows, vars(args))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Throughput benchmark for TranscriptProcessor and AssertsEvaluator
+
+Drives the real DSPy code path against a stub LM (or, with --server, an
+OpenAI-compatible stub HTTP server reached through litellm) and reports
+transcripts/sec, CPU overhead per LM call and peak Python memory across schema
+sizes, transcript lengths and concurrency levels.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --latency lognormal:0.4,0.5 \\
+        --fields 1 5 20 --turns 10 100 --concurrency 1 8 32
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/<file>.json
+"""
+
+import argparse
+import itertools
+import sys
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import dspy
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.testing import StubLM, StubResponder, StubServer
+
+from .common import (
+    compare_results,
+    make_fields,
+    make_transcript,
+    parse_latency,
+    save_results,
+    timed,
+)
+
+KEY_FIELDS = ["target", "fields", "turns", "concurrency"]
+METRICS = {"transcripts_per_s": True, "cpu_ms_per_call": False}
+
+
+def _responder(args: argparse.Namespace) -> StubResponder:
+    """Create a stub responder from the command line options"""
+    return StubResponder(
+        latency=parse_latency(args.latency),
+        seconds_per_output_token=args.seconds_per_token,
+        reasoning_tokens=args.reasoning_tokens,
+    )
+
+
+def _build(target: str, fields: int, lm: dspy.LM):
+    """Create the processor or evaluator under test"""
+    if target == "processor":
+        return TranscriptProcessor(api_key="stub", fields=make_fields(fields), lm=lm)
+    steps = [f"Synthetic evaluation step {i}" for i in range(fields)]
+    return AssertsEvaluator(api_key="stub", evaluation_steps=steps, lm=lm)
+
+
+def _run_batch(runner, inputs: List[Dict[str, Any]], concurrency: int) -> None:
+    """Push a batch of transcripts through the runner's batch API"""
+    if isinstance(runner, TranscriptProcessor):
+        runner.process_batch(inputs, max_workers=concurrency)
+    else:
+        runner.evaluate_batch([dict(i) for i in inputs], max_workers=concurrency)
+
+
+def run_scenario(
+    args: argparse.Namespace,
+    target: str,
+    fields: int,
+    turns: int,
+    concurrency: int,
+    server: Optional[StubServer] = None,
+) -> Dict[str, Any]:
+    """Benchmark one combination of target, schema size, length and concurrency"""
+    if server:
+        lm = dspy.LM(
+            "openai/stub",
+            api_key="stub",
+            api_base=server.base_url,
+            logprobs=True,
+            cache=False,
+        )
+        stub = server
+    else:
+        lm = stub = StubLM(_responder(args))
+    runner = _build(target, fields, lm)
+    inputs = [make_transcript(turns, seed=i) for i in range(args.transcripts)]
+
+    _run_batch(runner, inputs[:concurrency], concurrency)  # warm-up
+    start_calls = stub.calls
+    timing = timed(lambda: _run_batch(runner, inputs, concurrency))
+    calls = stub.calls - start_calls
+
+    row = {
+        "target": target,
+        "fields": fields,
+        "turns": turns,
+        "concurrency": concurrency,
+        "transcripts": len(inputs),
+        "lm_calls": calls,
+        "wall_s": round(timing["wall_s"], 4),
+        "transcripts_per_s": round(len(inputs) / timing["wall_s"], 3),
+        "cpu_ms_per_call": round(1000 * timing["cpu_s"] / max(calls, 1), 4),
+    }
+
+    if args.memory:
+        sample = inputs[: max(1, min(len(inputs), concurrency))]
+        tracemalloc.start()
+        _run_batch(runner, sample, concurrency)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        row["peak_kib"] = round(peak / 1024, 1)
+    return row
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--targets", nargs="+", default=["processor", "evaluator"])
+    parser.add_argument("--fields", nargs="+", type=int, default=[1, 5, 20])
+    parser.add_argument("--turns", nargs="+", type=int, default=[10, 100])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--transcripts", type=int, default=20)
+    parser.add_argument(
+        "--latency",
+        default="constant:0",
+        help="constant:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA (seconds)",
+    )
+    parser.add_argument("--seconds-per-token", type=float, default=0.0)
+    parser.add_argument("--reasoning-tokens", type=int, default=40)
+    parser.add_argument(
+        "--server",
+        action="store_true",
+        help="Serve responses over HTTP and go through litellm instead of StubLM",
+    )
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    parser.add_argument("--baseline", help="Saved results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.server:
+        server = StubServer(_responder(args)).start()
+
+    rows = []
+    try:
+        for target, fields, turns, concurrency in itertools.product(
+            args.targets, args.fields, args.turns, args.concurrency
+        ):
+            row = run_scenario(args, target, fields, turns, concurrency, server)
+            rows.append(row)
+            print(
+                f"{target:<9} fields={fields:<3} turns={turns:<4} "
+                f"concurrency={concurrency:<3} "
+                f"{row['transcripts_per_s']:>9.2f} transcripts/s "
+                f"{row['cpu_ms_per_call']:>8.3f} cpu ms/call "
+                f"{row.get('peak_kib', 0):>9.1f} KiB peak"
+            )
+    finally:
+        if server:
+            server.stop()
+
+    params = {k: v for k, v in vars(args).items() if k != "baseline"}
+    if args.save:
+        print(f"Saved results to {save_results('throughput', rows, params)}")
+
+    if args.baseline:
+        regressions = compare_results(
+            rows, args.baseline, KEY_FIELDS, METRICS, args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
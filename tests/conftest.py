@@ -0,0 +1,58 @@
+"""
+Shared fixtures for tests that run the processor and evaluator on a StubLM
+"""
+
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.testing import StubLM, StubResponder
+
+
+@pytest.fixture
+def sample_fields():
+    """Sample fields for testing"""
+    return [
+        {
+            "field_name": "representative_name",
+            "field_type": "string",
+            "format_example": "Sarah Chen",
+            "field_description": "The name of the representative",
+        }
+    ]
+
+
+@pytest.fixture
+def sample_input_data():
+    """Sample input data for testing"""
+    return {
+        "messages": [
+            {"role": "assistant", "content": "Hi, this is Marcus from TechFlow."},
+            {"role": "user", "content": "Hello Marcus, I need help with billing."},
+        ]
+    }
+
+
+@pytest.fixture
+def stub_processor(sample_fields):
+    """Factory for TranscriptProcessors on a StubLM (default: sample_fields)"""
+
+    def make(values=None, lm=None, **kwargs):
+        if lm is None:
+            lm = StubLM(StubResponder(values=values))
+        kwargs.setdefault("fields", sample_fields)
+        return TranscriptProcessor(api_key="unused", lm=lm, **kwargs)
+
+    return make
+
+
+@pytest.fixture
+def stub_evaluator():
+    """Factory for AssertsEvaluators on a StubLM with one evaluation step"""
+
+    def make(values=None, lm=None, **kwargs):
+        if lm is None:
+            lm = StubLM(StubResponder(values=values))
+        kwargs.setdefault("evaluation_steps", ["Did the agent greet?"])
+        return AssertsEvaluator(api_key="unused", lm=lm, **kwargs)
+
+    return make
@@ -0,0 +1,171 @@
+"""
+Tests for Batch API submission
+"""
+
+import json
+
+import openai
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.batch import (
+    BatchError,
+    BatchRunner,
+    BatchTransport,
+    LocalBatchTransport,
+    dump_requests,
+    evaluate_requests,
+    load_requests,
+    process_requests,
+    process_results,
+)
+from transtype.testing import StubResponder, StubServer
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    },
+    {
+        "field_name": "resolved",
+        "field_type": "boolean",
+        "format_example": "yes",
+        "field_description": "Whether the issue was resolved",
+    },
+]
+
+TRANSCRIPTS = [
+    {"messages": [{"role": "assistant", "content": "Hi, this is Sarah."}]},
+    {"messages": [{"role": "user", "content": "Thanks, that fixed it!"}]},
+]
+
+
+def _stub_server() -> StubServer:
+    return StubServer(StubResponder(reasoning_tokens=5, seed=3))
+
+
+@pytest.mark.parametrize("output_mode", ["text", "json"])
+@pytest.mark.parametrize("cls", [TranscriptProcessor, AssertsEvaluator])
+def test_batch_matches_realtime(cls, output_mode):
+    """Results rebuilt from a batch output equal the real-time results"""
+    if cls is TranscriptProcessor:
+        options, run = {"fields": FIELDS}, cls.process
+    else:
+        options, run = {"evaluation_steps": ["Agent introduces themselves"]}, (
+            cls.evaluate
+        )
+
+    def build(server):
+        client = openai.OpenAI(api_key="unused", base_url=server.base_url)
+        instance = cls(
+            api_key="unused",
+            model="stub",
+            output_mode=output_mode,
+            backend="openai",
+            client=client,
+            **options,
+        )
+        return instance, client
+
+    with _stub_server() as server:
+        instance, _ = build(server)
+        expected = [run(instance, dict(transcript)) for transcript in TRANSCRIPTS]
+
+    with _stub_server() as server:
+        instance, client = build(server)
+        runner = BatchRunner(LocalBatchTransport(client, max_workers=1))
+        if cls is TranscriptProcessor:
+            results = runner.process(instance, TRANSCRIPTS)
+        else:
+            results = runner.evaluate(instance, TRANSCRIPTS)
+
+    assert results == expected
+
+
+def test_dspy_backend_requests_match_openai_backend():
+    """Both backends render identical batch request bodies"""
+    dspy_processor = TranscriptProcessor(api_key="unused", fields=FIELDS)
+    openai_processor = TranscriptProcessor(
+        api_key="unused", fields=FIELDS, backend="openai"
+    )
+
+    requests = process_requests(dspy_processor, TRANSCRIPTS)
+
+    assert requests == process_requests(openai_processor, TRANSCRIPTS)
+    assert [line["custom_id"] for line in requests] == ["0:0", "0:1", "1:0", "1:1"]
+    assert requests[0]["body"]["model"] == "gpt-4o"
+    assert load_requests(dump_requests(requests)) == requests
+
+
+def test_self_consistency_requests_ask_for_n_samples():
+    """num_samples is sent as n, with the temperature raised like dspy.Predict"""
+    evaluator = AssertsEvaluator(
+        api_key="unused", evaluation_steps=["Step"], num_samples=3
+    )
+
+    (line,) = evaluate_requests(evaluator, TRANSCRIPTS[:1])
+
+    assert line["body"]["n"] == 3
+    assert line["body"]["temperature"] == 0.7
+
+
+def test_failed_and_missing_requests_become_field_errors():
+    """Per-request errors and missing lines are reported like real-time errors"""
+    processor = TranscriptProcessor(api_key="unused", fields=FIELDS)
+    requests = process_requests(processor, TRANSCRIPTS[:1])
+    output = json.dumps(
+        {
+            "custom_id": "0:0",
+            "response": {"status_code": 429, "body": {"error": {"message": "slow"}}},
+            "error": None,
+        }
+    )
+
+    (result,) = process_results(processor, requests, output)
+
+    assert [f["field_confidence"] for f in result["fields"]] == [0.0, 0.0]
+    assert "slow" in result["fields"][0]["field_reason"]
+    assert "No result" in result["fields"][1]["field_reason"]
+
+
+class _ScriptedTransport(BatchTransport):
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def submit(self, requests):
+        return "batch_1"
+
+    def status(self, batch_id):
+        return self.statuses.pop(0)
+
+    def output(self, batch_id):
+        return b""
+
+
+def test_runner_polls_until_finished():
+    """The runner sleeps between status checks and fails on failed batches"""
+    sleeps = []
+    runner = BatchRunner(
+        _ScriptedTransport(["validating", "in_progress", "completed"]),
+        poll_interval=5.0,
+        sleep=sleeps.append,
+    )
+    assert runner.wait("batch_1") == b""
+    assert sleeps == [5.0, 5.0]
+
+    runner = BatchRunner(_ScriptedTransport(["failed"]), sleep=sleeps.append)
+    with pytest.raises(BatchError, match="failed"):
+        runner.wait("batch_1")
+
+
+def test_incomplete_transport_is_rejected():
+    """Transports missing part of the interface fail when created"""
+
+    class _SubmitOnly(BatchTransport):
+        def submit(self, requests):
+            return "batch_1"
+
+    with pytest.raises(TypeError):
+        _SubmitOnly()
@@ -0,0 +1,128 @@
+"""
+Tests for LM record/replay cassettes
+"""
+
+import pytest
+
+from transtype.cassette import Cassette, CassetteLM, CassetteMissError, request_key
+from transtype.testing import StubLM, StubResponder
+
+
+def test_request_key_ignores_credentials():
+    """Keys are stable across API keys but change with the request"""
+    messages = [{"role": "user", "content": "hi"}]
+    key = request_key("openai/gpt-4o", messages, temperature=0.0, api_key="a")
+
+    assert key == request_key("openai/gpt-4o", messages, temperature=0.0, api_key="b")
+    assert key != request_key("openai/gpt-4o", messages, temperature=0.5)
+    assert key != request_key("openai/gpt-4o-mini", messages, temperature=0.0)
+
+
+def test_cassette_round_trip(tmp_path):
+    """Records survive reopening and later records win"""
+    path = str(tmp_path / "traffic.cassette")
+    key = request_key("m", [{"role": "user", "content": "hi"}])
+
+    with Cassette(path, writable=True) as cassette:
+        cassette.put(key, [{"text": "old", "logprobs": None}])
+        cassette.put(key, [{"text": "new", "logprobs": None}])
+
+    with Cassette(path) as cassette:
+        assert len(cassette) == 1
+        assert cassette.get(key) == [{"text": "new", "logprobs": None}]
+        with pytest.raises(CassetteMissError):
+            cassette.get(request_key("m", []))
+
+
+def test_truncated_last_record_is_dropped(tmp_path):
+    """An interrupted recording loses only its partial last record"""
+    path = tmp_path / "traffic.cassette"
+    first, second, third = (request_key("m", [], n=n) for n in range(3))
+    with Cassette(str(path), writable=True) as cassette:
+        cassette.put(first, [{"text": "kept", "logprobs": None}])
+        cassette.put(second, [{"text": "lost", "logprobs": None}])
+    path.write_bytes(path.read_bytes()[:-3])
+
+    with Cassette(str(path)) as cassette:
+        assert second not in cassette
+        assert cassette.get(first)[0]["text"] == "kept"
+
+    with Cassette(str(path), writable=True) as cassette:
+        cassette.put(third, [{"text": "appended", "logprobs": None}])
+    with Cassette(str(path)) as cassette:
+        assert len(cassette) == 2
+        assert cassette.get(third)[0]["text"] == "appended"
+
+
+def test_cassette_lm_releases_the_cassette(tmp_path):
+    """CassetteLM closes its cassette as a context manager"""
+    path = str(tmp_path / "traffic.cassette")
+    with CassetteLM(path, mode="record", lm=StubLM()) as lm:
+        lm(messages=[{"role": "user", "content": "hi"}])
+    assert lm.cassette._writer is None
+
+
+def test_cassette_rejects_foreign_file(tmp_path):
+    """Files without the cassette header are refused"""
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a cassette")
+    with pytest.raises(ValueError):
+        Cassette(str(path))
+
+
+def test_record_requires_live_lm(tmp_path):
+    """Recording without an LM to call is an error"""
+    with pytest.raises(ValueError):
+        CassetteLM(str(tmp_path / "c"), mode="record")
+
+
+def test_processor_record_then_replay(tmp_path, stub_processor, sample_input_data):
+    """Replay reproduces recorded results, logprob confidence included"""
+    path = str(tmp_path / "traffic.cassette")
+    live = StubLM(StubResponder(values={"field_value": "Marcus"}))
+
+    recorder = stub_processor(lm=live, cassette=path, cassette_mode="record")
+    recorded = recorder.process(sample_input_data)
+    recorder.lm.cassette.close()
+
+    replay_lm = StubLM(StubResponder(values={"field_value": "Someone else"}))
+    replayer = stub_processor(lm=replay_lm, cassette=path)
+    replayed = replayer.process(sample_input_data)
+
+    assert replayed == recorded
+    assert replay_lm.calls == 0
+    assert live.calls == 1
+
+
+def test_evaluator_replay_keeps_top_logprobs(
+    tmp_path, stub_evaluator, sample_input_data
+):
+    """top_logprobs are stored so weighted scores can be recomputed"""
+    path = str(tmp_path / "traffic.cassette")
+    live = StubLM(StubResponder(values={"score": 7}), top_logprobs=5)
+
+    recorder = stub_evaluator(lm=live, cassette=path, cassette_mode="record")
+    recorded = recorder.evaluate(dict(sample_input_data))
+    recorder.lm.cassette.close()
+
+    replay_lm = CassetteLM(path, mode="replay", model=live.model)
+    replay_lm.kwargs = dict(live.kwargs)
+    replayer = stub_evaluator(lm=replay_lm)
+    replayed = replayer.evaluate(dict(sample_input_data))
+
+    assert replayed == recorded
+    assert recorded["result"]["confidence"] != 0.5
+
+
+def test_replay_miss_is_reported(tmp_path, stub_processor, sample_input_data):
+    """Unrecorded requests fail the field instead of calling the API"""
+    path = str(tmp_path / "empty.cassette")
+    Cassette(path, writable=True).close()
+    lm = StubLM()
+
+    processor = stub_processor(lm=lm, cassette=path)
+    field = processor.process(sample_input_data)["fields"][0]
+
+    assert field["field_confidence"] == 0.0
+    assert "No recorded response" in field["field_reason"]
+    assert lm.calls == 0
@@ -0,0 +1,120 @@
+"""
+Tests for the memory-mapped transcript corpus
+"""
+
+import io
+import json
+
+import pytest
+
+from transtype import TranscriptProcessor
+from transtype.corpus import CorpusStore
+from transtype.readers import iter_jsonl
+from transtype.testing import StubLM, StubResponder
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    }
+]
+
+
+def _transcript(i):
+    return {
+        "call_id": f"call-{i}",
+        "messages": [
+            {"speaker": "agent", "text": f"Hello, this is agent {i}."},
+            {"speaker": "caller", "text": "Hi, I need help with my bill."},
+        ],
+    }
+
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    path = str(tmp_path / "calls.corpus")
+    with CorpusStore(path, writable=True) as corpus:
+        assert corpus.extend(_transcript(i) for i in range(50)) == 50
+    return path
+
+
+def test_lookup_returns_normalized_messages(corpus_path):
+    """Transcripts read back by call ID in role/content form"""
+    with CorpusStore(corpus_path) as corpus:
+        assert len(corpus) == 50
+        assert "call-7" in corpus and "call-50" not in corpus
+        assert corpus.ids[:2] == ["call-0", "call-1"]
+        assert corpus["call-7"] == {
+            "messages": [
+                {"role": "assistant", "content": "Hello, this is agent 7."},
+                {"role": "user", "content": "Hi, I need help with my bill."},
+            ]
+        }
+        assert json.loads(bytes(corpus.raw("call-7")))[0]["role"] == "assistant"
+        assert corpus.get("missing") is None
+        with pytest.raises(KeyError):
+            corpus["missing"]
+
+
+def test_append_reopen_and_duplicates(corpus_path):
+    """Reopening for writing appends; duplicate IDs and read-only writes fail"""
+    with CorpusStore(corpus_path, writable=True) as corpus:
+        corpus.add("extra", [{"role": "user", "content": "Anyone there?"}])
+        with pytest.raises(ValueError, match="already in corpus"):
+            corpus.add("call-0", _transcript(0))
+        assert corpus["extra"]["messages"][0]["content"] == "Anyone there?"
+        # Reads through the shared write handle must not disturb appends
+        assert corpus["call-3"]["messages"][0]["content"].endswith("agent 3.")
+        corpus.add("later", [{"role": "user", "content": "Still there?"}])
+        assert corpus["later"]["messages"][0]["content"] == "Still there?"
+
+    with CorpusStore(corpus_path) as corpus:
+        assert len(corpus) == 52 and corpus.ids[-2:] == ["extra", "later"]
+        with pytest.raises(ValueError, match="read-only"):
+            corpus.add("other", [])
+
+
+def test_records_missing_from_the_index_are_recovered(corpus_path):
+    """A torn index (e.g. after a crash) is rebuilt from the data file"""
+    with open(f"{corpus_path}.idx", "r+b") as f:
+        f.truncate(100)
+
+    with CorpusStore(corpus_path, writable=True) as corpus:
+        assert len(corpus) == 50
+        corpus.add("after-crash", [{"role": "user", "content": "Hello?"}])
+    with CorpusStore(corpus_path) as corpus:
+        assert len(corpus) == 51
+        assert corpus["call-49"]["messages"][0]["content"].endswith("49.")
+
+
+def test_shards_partition_the_corpus(corpus_path):
+    """Shards are disjoint, complete and stable; samples are reproducible"""
+    with CorpusStore(corpus_path) as corpus:
+        shards = [corpus.shard(i, 4) for i in range(4)]
+        assert sorted(sum(shards, [])) == sorted(corpus.ids)
+        assert corpus.shard(1, 4) == shards[1]
+        assert corpus.sample(5, seed=3) == corpus.sample(5, seed=3)
+        with pytest.raises(ValueError):
+            corpus.shard(4, 4)
+
+
+def test_feeds_processor_and_readers(tmp_path):
+    """Reader output goes in and stored transcripts go straight to process()"""
+    export = io.BytesIO(
+        b"".join(json.dumps(_transcript(i)).encode() + b"\n" for i in range(3))
+    )
+    path = str(tmp_path / "export.corpus")
+    with CorpusStore(path, writable=True) as corpus:
+        corpus.extend(iter_jsonl(export))
+
+    processor = TranscriptProcessor(
+        api_key="unused",
+        fields=FIELDS,
+        lm=StubLM(StubResponder(values={"field_value": "Agent"})),
+    )
+    with CorpusStore(path) as corpus:
+        results = processor.process_batch(corpus.transcripts(corpus.shard(0, 1)))
+    assert len(results) == 3
+    assert all(r["fields"][0]["field_value"] == "Agent" for r in results)
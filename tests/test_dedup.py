@@ -0,0 +1,132 @@
+"""
+Tests for the near-duplicate transcript index
+"""
+
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.dedup import NearDuplicateIndex
+from transtype.testing import StubLM, StubResponder
+
+SCRIPT = [
+    ("assistant", "Hello, this is an automated reminder from Acme Dental."),
+    ("user", "Okay."),
+    ("assistant", "Your appointment is on {date} at ten in the morning."),
+    ("assistant", "Please say yes to confirm or stay on the line to reschedule."),
+    ("user", "Yes, this is {name}, I confirm."),
+    ("assistant", "Thank you, your appointment is confirmed. Have a nice day."),
+]
+
+FIELDS = [
+    {
+        "field_name": "appointment_date",
+        "field_type": "string",
+        "format_example": "March 3",
+        "field_description": "Date of the appointment",
+    },
+    {
+        "field_name": "patient_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the patient who confirmed",
+    },
+]
+
+
+def _call(date="March 3", name="Jordan Miles"):
+    return {
+        "messages": [
+            {"role": role, "content": text.format(date=date, name=name)}
+            for role, text in SCRIPT
+        ]
+    }
+
+
+def test_index_query_save_and_load(tmp_path):
+    """Near-duplicates match above the threshold and survive a round trip"""
+    index = NearDuplicateIndex(threshold=0.8)
+    text = " ".join(text for _, text in SCRIPT)
+    index.add(text, {"score": 1}, key="call-1")
+
+    match = index.query(text.replace("{name}", "Sam"))
+    assert match.key == "call-1" and match.value == {"score": 1}
+    assert index.query("I would like a refund for the duplicate charge") is None
+    assert index.stats() == {"entries": 1, "lookups": 2, "hits": 1, "hit_rate": 0.5}
+
+    index.save(tmp_path / "index.npz")
+    loaded = NearDuplicateIndex.load(tmp_path / "index.npz")
+    assert len(loaded) == 1
+    assert loaded.query(text).similarity == 1.0
+    assert (
+        NearDuplicateIndex.load(tmp_path / "index.npz", threshold=1.0).threshold == 1.0
+    )
+    with pytest.raises(ValueError, match="threshold"):
+        NearDuplicateIndex.load(tmp_path / "index.npz", threshold=0.0)
+
+
+def test_evaluator_reuses_near_duplicate_score():
+    """Templated calls are evaluated once"""
+    lm = StubLM(StubResponder(values={"score": 9}))
+    index = NearDuplicateIndex(threshold=0.8)
+    evaluator = AssertsEvaluator(
+        api_key="unused",
+        evaluation_steps=["Appointment is confirmed"],
+        lm=lm,
+        dedup_index=index,
+    )
+
+    first = evaluator.evaluate(_call(name="Jordan Miles"))
+    second = evaluator.evaluate(_call(name="Priya Natarajan"))
+
+    assert first == second
+    assert lm.calls == 1
+    assert index.hit_rate == 0.5
+
+
+def test_processor_reextracts_only_changed_fields():
+    """Fields whose evidence turns differ are sent to the LM again"""
+
+    def answer(messages):
+        transcript = messages[-1]["content"]
+        if "patient_name" in transcript:
+            return "Priya" if "Priya" in transcript else "Jordan Miles"
+        return "March 3"
+
+    lm = StubLM(StubResponder(values={"field_value": answer}))
+    processor = TranscriptProcessor(
+        api_key="unused",
+        fields=FIELDS,
+        lm=lm,
+        dedup_index=NearDuplicateIndex(threshold=0.8),
+    )
+
+    processor.process(_call(name="Jordan Miles"))
+    result = processor.process(_call(name="Priya"))
+
+    assert lm.calls == 3
+    assert [f["field_value"] for f in result["fields"]] == ["March 3", "Priya"]
+
+
+def test_processor_does_not_reuse_fields_of_an_edited_definition(tmp_path):
+    """Stored results only apply to the field definitions that produced them"""
+    index = NearDuplicateIndex(threshold=0.8)
+    first = TranscriptProcessor(
+        api_key="unused",
+        fields=FIELDS,
+        lm=StubLM(StubResponder(values={"field_value": "March 3"})),
+        dedup_index=index,
+    )
+    first.process(_call())
+    index.save(tmp_path / "index.npz")
+    assert "Jordan" not in str(index._values)
+
+    edited = [dict(FIELDS[0], field_description="Date the call was made"), FIELDS[1]]
+    lm = StubLM(StubResponder(values={"field_value": "March 3"}))
+    processor = TranscriptProcessor(
+        api_key="unused",
+        fields=edited,
+        lm=lm,
+        dedup_index=NearDuplicateIndex.load(tmp_path / "index.npz"),
+    )
+    processor.process(_call())
+    assert lm.calls == 1
@@ -0,0 +1,77 @@
+"""
+Tests for the direct OpenAI-client backend
+"""
+
+import dspy
+import openai
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.direct import DirectPredictor
+from transtype.processor import FieldExtractionSignature
+from transtype.testing import StubLM, StubResponder, StubServer
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    }
+]
+
+TRANSCRIPT = {"messages": [{"role": "assistant", "content": "Hi, this is {Sarah}."}]}
+
+
+def test_template_matches_dspy_format():
+    """Pre-rendered prompts equal the ChatAdapter's per-call formatting"""
+    inputs = {
+        "transcript": "Assistant: Hi, this is {Sarah}.",
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    }
+    predictor = DirectPredictor(FieldExtractionSignature, client=None, model="stub")
+
+    assert predictor.format(**inputs) == dspy.ChatAdapter().format(
+        FieldExtractionSignature, demos=[], inputs=inputs
+    )
+
+
+@pytest.mark.parametrize("output_mode", ["text", "json"])
+@pytest.mark.parametrize("cls", [TranscriptProcessor, AssertsEvaluator])
+def test_openai_backend_matches_dspy_backend(cls, output_mode):
+    """Both backends return identical results for the same responses"""
+    if cls is TranscriptProcessor:
+        options, run = {"fields": FIELDS}, cls.process
+    else:
+        options, run = {"evaluation_steps": ["Agent introduces themselves"]}, (
+            cls.evaluate
+        )
+
+    with StubServer(StubResponder(reasoning_tokens=5)) as server:
+        client = openai.OpenAI(api_key="unused", base_url=server.base_url)
+        direct = cls(
+            api_key="unused",
+            output_mode=output_mode,
+            backend="openai",
+            client=client,
+            **options,
+        )
+        result = run(direct, TRANSCRIPT)
+        assert server.calls == 1
+
+    expected = cls(
+        api_key="unused",
+        output_mode=output_mode,
+        lm=StubLM(StubResponder(reasoning_tokens=5)),
+        **options,
+    )
+    assert result == run(expected, TRANSCRIPT)
+
+
+def test_invalid_backend():
+    """Unknown backends are rejected"""
+    with pytest.raises(ValueError):
+        TranscriptProcessor(api_key="unused", fields=FIELDS, backend="http")
@@ -0,0 +1,198 @@
+"""
+Tests for fingerprint-based selective re-runs
+"""
+
+import copy
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.dedup import NearDuplicateIndex
+from transtype.fingerprint import (
+    evaluator_fingerprint,
+    field_fingerprints,
+    rerun_evaluate_batch,
+    rerun_process,
+    rerun_process_batch,
+    stale_fields,
+)
+from transtype.testing import StubLM, StubResponder
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    },
+    {
+        "field_name": "customer_name",
+        "field_type": "string",
+        "format_example": "John Smith",
+        "field_description": "Name of the customer",
+    },
+    {
+        "field_name": "issue",
+        "field_type": "string",
+        "format_example": "Billing error",
+        "field_description": "Reason for the call",
+    },
+]
+
+TRANSCRIPTS = [
+    {
+        "messages": [
+            {"role": "assistant", "content": f"Hi, this is Sarah, call {i}."},
+            {"role": "user", "content": "I was billed twice."},
+        ]
+    }
+    for i in range(4)
+]
+
+
+def _processor(fields, value="Sarah"):
+    return TranscriptProcessor(
+        api_key="unused",
+        fields=fields,
+        lm=StubLM(StubResponder(values={"field_value": value})),
+    )
+
+
+def test_fingerprints_track_each_field():
+    """Editing one field definition changes only that field's fingerprint"""
+    edited = copy.deepcopy(FIELDS)
+    edited[1]["field_description"] = "Full name of the customer"
+
+    before = field_fingerprints(_processor(FIELDS))
+    after = field_fingerprints(_processor(edited))
+
+    assert before == field_fingerprints(_processor(FIELDS))
+    assert [name for name in before if before[name] != after[name]] == ["customer_name"]
+
+
+def test_rerun_recomputes_only_changed_fields():
+    """Only edited fields cost LM calls; the rest are merged from before"""
+    first = rerun_process_batch(_processor(FIELDS), TRANSCRIPTS, [None] * 4)
+    assert all(
+        set(r["fingerprints"]) == {f["field_name"] for f in FIELDS} for r in first
+    )
+
+    edited = copy.deepcopy(FIELDS)
+    edited[2]["field_description"] = "Main reason the customer called"
+    processor = _processor(edited, value="Double billing")
+    second = rerun_process_batch(processor, TRANSCRIPTS, first)
+
+    assert processor.lm.calls == len(TRANSCRIPTS)
+    for old, new in zip(first, second):
+        assert new["fields"][:2] == old["fields"][:2]
+        assert new["fields"][2]["field_value"] == "Double billing"
+        assert stale_fields(field_fingerprints(processor), new) == []
+
+
+def test_rerun_handles_added_removed_and_legacy_results():
+    """New fields are extracted, dropped ones removed, old results redone"""
+    processor = _processor(FIELDS[:2])
+    previous = rerun_process(processor, dict(TRANSCRIPTS[0]))
+
+    grown = _processor(FIELDS[1:])
+    result = rerun_process(grown, dict(TRANSCRIPTS[0]), previous)
+    assert [f["field_name"] for f in result["fields"]] == ["customer_name", "issue"]
+    assert grown.lm.calls == 1
+
+    legacy = processor.process(dict(TRANSCRIPTS[0]))
+    assert stale_fields(field_fingerprints(processor), legacy) == [
+        "agent_name",
+        "customer_name",
+    ]
+
+
+def test_fingerprints_cover_the_presence_prescreen():
+    """The pre-screen model and presence prompt are part of every fingerprint"""
+
+    def fingerprints(**kwargs):
+        processor = TranscriptProcessor(
+            api_key="unused", fields=FIELDS, lm=StubLM(), prescreen=True, **kwargs
+        )
+        return processor, field_fingerprints(processor)
+
+    processor, base = fingerprints()
+    assert fingerprints(prescreen_model="openai/gpt-4o-mini")[1] != base
+
+    state = processor.presence_screener.dump_state()
+    state["signature"]["instructions"] = "Only answer yes when certain."
+    processor.presence_screener.load_state(state)
+    edited = field_fingerprints(processor)
+    assert all(edited[name] != base[name] for name in base)
+
+
+def test_rerun_does_not_reuse_the_stale_result_from_a_shared_index():
+    """Stale fields are extracted again even though the index holds them"""
+    index = NearDuplicateIndex()
+
+    def processor(value):
+        return TranscriptProcessor(
+            api_key="unused",
+            fields=FIELDS,
+            lm=StubLM(StubResponder(values={"field_value": value})),
+            dedup_index=index,
+        )
+
+    first = rerun_process(processor("old"), dict(TRANSCRIPTS[0]))
+
+    edited = processor("new")
+    state = edited.field_extractor.dump_state()
+    state["signature"]["instructions"] = "Extract the field verbatim."
+    edited.field_extractor.load_state(state)
+    result = rerun_process(edited, dict(TRANSCRIPTS[0]), first)
+
+    assert edited.lm.calls == len(FIELDS)
+    assert [f["field_value"] for f in result["fields"]] == ["new"] * len(FIELDS)
+    # The re-run result is registered and preferred over the outdated one
+    reused = edited.process(dict(TRANSCRIPTS[0]))
+    assert edited.lm.calls == len(FIELDS)
+    assert reused["fields"] == result["fields"]
+
+
+def test_partial_rerun_uses_the_prescreen_like_process():
+    """Stale fields screened as absent are skipped, as in a full run"""
+    values = {"field_0": "yes", "field_1": "yes", "field_2": "no"}
+
+    def processor(fields):
+        responder = StubResponder(values={**values, "field_value": "Sarah"}, seed=1)
+        return TranscriptProcessor(
+            api_key="unused", fields=fields, lm=StubLM(responder), prescreen=True
+        )
+
+    first = rerun_process(processor(FIELDS), dict(TRANSCRIPTS[0]))
+    assert first["fields"][2]["field_value"] is None
+
+    edited = copy.deepcopy(FIELDS)
+    edited[2]["field_description"] = "Main reason the customer called"
+    rerun = processor(edited)
+    result = rerun_process(rerun, dict(TRANSCRIPTS[0]), first)
+
+    assert rerun.lm.calls == 1  # the pre-screen only
+    assert result["fields"][:2] == first["fields"][:2]
+    full = processor(edited).process(dict(TRANSCRIPTS[0]))
+    assert result["fields"][2] == full["fields"][2]
+
+
+def test_rerun_evaluate_skips_unchanged_assertions():
+    """Assertions are re-evaluated only when steps or prompt change"""
+
+    def evaluator(steps):
+        return AssertsEvaluator(
+            api_key="unused",
+            evaluation_steps=steps,
+            lm=StubLM(StubResponder(values={"score": 8})),
+        )
+
+    original = evaluator(["Agent greets the customer"])
+    first = rerun_evaluate_batch(original, copy.deepcopy(TRANSCRIPTS), [None] * 4)
+
+    same = evaluator(["Agent greets the customer"])
+    assert rerun_evaluate_batch(same, copy.deepcopy(TRANSCRIPTS), first) == first
+    assert same.lm.calls == 0
+
+    changed = evaluator(["Agent greets the customer by name"])
+    rerun_evaluate_batch(changed, copy.deepcopy(TRANSCRIPTS), first)
+    assert changed.lm.calls == len(TRANSCRIPTS)
+    assert evaluator_fingerprint(changed) != evaluator_fingerprint(original)
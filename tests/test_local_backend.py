@@ -0,0 +1,141 @@
+"""
+Tests for OpenAI-compatible servers configured through api_base
+"""
+
+import math
+
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.processor import _build_client, _build_lm
+from transtype.testing import StubResponder, StubServer
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    }
+]
+
+TRANSCRIPT = {"messages": [{"role": "assistant", "content": "Hi, this is Sarah."}]}
+
+
+def test_build_lm_uses_provider_and_api_base():
+    """The provider prefixes the model and api_base is only set when given"""
+    lm = _build_lm("llama-3", "unused", "hosted_vllm", "http://gpu:8000/v1", None)
+    assert lm.model == "hosted_vllm/llama-3"
+    assert lm.kwargs["api_base"] == "http://gpu:8000/v1"
+
+    lm = _build_lm("gpt-4o", "key", "openai", None, {"num_retries": 2})
+    assert "api_base" not in lm.kwargs
+    assert lm.num_retries == 2
+
+
+def test_build_client_keeps_connections_alive():
+    """max_connections sizes both the pool and its keep-alive connections"""
+    client = _build_client("unused", "http://gpu:8000/v1", max_connections=64)
+    pool = client._client._transport._pool
+
+    assert str(client.base_url) == "http://gpu:8000/v1/"
+    assert pool._max_connections == 64
+    assert pool._max_keepalive_connections == 64
+
+    with pytest.raises(ValueError, match="max_connections"):
+        _build_client("unused", None, max_connections=0)
+
+
+@pytest.mark.parametrize("backend", ["dspy", "openai"])
+def test_processor_against_local_server(backend):
+    """Extraction through api_base reports logprob-based confidence"""
+    responder = StubResponder(reasoning_tokens=5, values={"field_value": "Sarah"})
+    with StubServer(responder) as server:
+        processor = TranscriptProcessor(
+            api_key="unused",
+            fields=FIELDS,
+            model="stub",
+            backend=backend,
+            api_base=server.base_url,
+            lm_kwargs={"cache": False},
+            max_connections=16,
+        )
+        result = processor.process(TRANSCRIPT)
+        calls = server.calls
+
+    field = result["fields"][0]
+    assert field["field_value"] == "Sarah"
+    assert field["field_confidence"] != 0.5
+    assert calls == 1
+
+
+def test_evaluator_against_local_server():
+    """Weighted scores use the top_logprobs returned by the server"""
+    with StubServer(StubResponder(reasoning_tokens=5)) as server:
+        evaluator = AssertsEvaluator(
+            api_key="unused",
+            evaluation_steps=["Agent introduces themselves"],
+            model="stub",
+            api_base=server.base_url,
+            lm_kwargs={"cache": False, "top_logprobs": 5},
+        )
+        result = evaluator.evaluate(TRANSCRIPT)
+
+    assert 0.0 <= result["result"]["score"] <= 1.0
+    assert result["result"]["confidence"] != 0.5
+
+
+def test_confidence_from_dict_logprobs():
+    """Servers returning plain JSON logprobs are handled like API objects"""
+    processor = TranscriptProcessor.__new__(TranscriptProcessor)
+    logprobs = {
+        "content": [
+            {"token": "Sarah", "logprob": math.log(0.8), "top_logprobs": []},
+            {"token": "!", "logprob": None, "top_logprobs": []},
+        ]
+    }
+
+    assert processor._calculate_confidence_from_logprobs(logprobs) == pytest.approx(0.8)
+    assert processor._calculate_confidence_from_logprobs(None) == 0.5
+
+    evaluator = AssertsEvaluator.__new__(AssertsEvaluator)
+    assert evaluator._calculate_confidence_from_logprobs(logprobs) == pytest.approx(0.8)
+
+
+def test_openai_backend_applies_lm_kwargs():
+    """Request parameters in lm_kwargs reach every chat completion"""
+    processor = TranscriptProcessor(
+        api_key="unused",
+        fields=FIELDS,
+        backend="openai",
+        lm_kwargs={"max_tokens": 64, "seed": 7, "num_retries": 0, "cache": False},
+    )
+    request_kwargs = processor.field_extractor.request_kwargs
+
+    assert request_kwargs["max_tokens"] == 64 and request_kwargs["seed"] == 7
+    assert "cache" not in request_kwargs
+    assert processor.field_extractor.client.max_retries == 0
+
+    evaluator = AssertsEvaluator(
+        api_key="unused",
+        evaluation_steps=["Step"],
+        backend="openai",
+        lm_kwargs={"top_logprobs": 5},
+    )
+    assert evaluator.evaluator.request_kwargs["top_logprobs"] == 5
+
+    with pytest.raises(ValueError, match="not supported by the openai backend"):
+        TranscriptProcessor(
+            api_key="unused",
+            fields=FIELDS,
+            backend="openai",
+            lm_kwargs={"rollout_id": 1},
+        )
+    with pytest.raises(ValueError, match="num_retries"):
+        TranscriptProcessor(
+            api_key="unused",
+            fields=FIELDS,
+            backend="openai",
+            client=_build_client("unused", None, None),
+            lm_kwargs={"num_retries": 3},
+        )
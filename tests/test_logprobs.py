@@ -0,0 +1,151 @@
+"""
+Tests for structured-output mode and JSON logprobs mapping
+"""
+
+import math
+
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.logprobs import (
+    json_value_span,
+    select_json_field_logprobs,
+    select_marker_field_logprobs,
+    value_distribution_confidence,
+)
+from transtype.testing import StubLM, StubResponder
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    }
+]
+
+TRANSCRIPT = {"messages": [{"role": "assistant", "content": "Hi, this is Sarah."}]}
+
+
+def _logprobs(*tokens):
+    return {"content": [{"token": t, "logprob": -0.1} for t in tokens]}
+
+
+def test_json_value_span():
+    """Spans point at the value, excluding the quotes of strings"""
+    text = '{"reasoning": "a \\"b\\"", "score": 7}'
+    start, end = json_value_span(text, "score")
+    assert text[start:end] == "7"
+    start, end = json_value_span(text, "reasoning")
+    assert text[start:end] == 'a \\"b\\"'
+    assert json_value_span(text, "missing") is None
+    assert json_value_span("not json", "score") is None
+
+
+def test_select_json_field_logprobs():
+    """Only the tokens of the requested value are kept"""
+    data = _logprobs('{"', "reason", '":"', "ok", '","', "score", '":', " 8", "}")
+
+    selected = select_json_field_logprobs(data, "score")
+
+    assert [entry["token"] for entry in selected.content] == [" 8"]
+    assert select_json_field_logprobs(data, "other") is None
+    assert select_json_field_logprobs(None, "score") is None
+
+
+def test_select_marker_field_logprobs():
+    """Value tokens are located between DSPy field markers"""
+    data = _logprobs(
+        "[[ ## field_value ## ]]", "\n", "yes", "\n\n", "[[ ## completed ## ]]"
+    )
+
+    selected = select_marker_field_logprobs(data, "field_value")
+
+    assert [entry["token"] for entry in selected.content] == ["yes"]
+
+
+def test_value_distribution_confidence():
+    """Alternatives are pooled per allowed value they could begin"""
+    data = {
+        "content": [
+            {
+                "token": "yes",
+                "logprob": math.log(0.6),
+                "top_logprobs": [
+                    {"token": "yes", "logprob": math.log(0.6)},
+                    {"token": "no", "logprob": math.log(0.2)},
+                    {"token": "NOT", "logprob": math.log(0.1)},
+                    {"token": "maybe", "logprob": math.log(0.1)},
+                ],
+            }
+        ]
+    }
+
+    confidence = value_distribution_confidence(data, "yes", ["yes", "no", "NOT_FOUND"])
+
+    assert confidence == pytest.approx(0.6 / 0.9)
+    assert value_distribution_confidence(_logprobs("yes"), "yes", ["yes"]) is None
+
+
+def test_value_distribution_confidence_shared_prefixes():
+    """Alternatives are counted once across values sharing a prefix, any case"""
+
+    def first_token(*alternatives):
+        top = [{"token": t, "logprob": math.log(p)} for t, p in alternatives]
+        return {"content": [{**top[0], "top_logprobs": top}]}
+
+    statuses = ["pending", "pending_review", "closed"]
+    data = first_token(("p", 0.6), ("closed", 0.4))
+    assert value_distribution_confidence(data, "pending", statuses) == (
+        pytest.approx(0.3)
+    )
+
+    data = first_token(("No", 0.5), ("not", 0.3), ("Yes", 0.2))
+    answers = ["yes", "no", "not_applicable"]
+    assert value_distribution_confidence(data, "no", answers) == pytest.approx(0.5)
+    assert value_distribution_confidence(data, "yes", answers) == pytest.approx(0.2)
+
+
+def test_processor_json_mode_sends_schema():
+    """Field extraction requests a strict JSON schema and parses its value"""
+    responder = StubResponder(values={"field_value": "Sarah Chen"})
+    requests = []
+    complete = responder.complete
+    responder.complete = lambda messages, **kwargs: (
+        requests.append(kwargs) or complete(messages, **kwargs)
+    )
+    lm = StubLM(responder)
+    processor = TranscriptProcessor(
+        api_key="unused", fields=FIELDS, lm=lm, output_mode="json"
+    )
+
+    result = processor.process(TRANSCRIPT)
+
+    field = result["fields"][0]
+    assert field["field_value"] == "Sarah Chen"
+    assert 0.0 < field["field_confidence"] <= 1.0
+    response_format = requests[0]["response_format"]
+    assert response_format["type"] == "json_schema"
+    schema = response_format["json_schema"]["schema"]
+    assert set(schema["required"]) == {"reasoning", "field_value"}
+
+
+def test_evaluator_json_mode_weights_score_tokens():
+    """Score logprobs are located inside the JSON response"""
+    evaluator = AssertsEvaluator(
+        api_key="unused",
+        evaluation_steps=["Agent greets the customer"],
+        lm=StubLM(StubResponder(values={"score": 8}), top_logprobs=5),
+        output_mode="json",
+    )
+
+    result = evaluator.evaluate(TRANSCRIPT)["result"]
+
+    assert 0.7 <= result["score"] <= 0.9
+    assert result["confidence"] > 0.5
+
+
+def test_invalid_output_mode():
+    """Unknown output modes are rejected"""
+    with pytest.raises(ValueError):
+        TranscriptProcessor(api_key="unused", fields=FIELDS, output_mode="xml")
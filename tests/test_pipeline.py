@@ -0,0 +1,173 @@
+"""
+Tests for the evaluation matrix pipeline
+"""
+
+import threading
+import time
+
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.pipeline import EvaluationPipeline
+from transtype.testing import StubLM, StubResponder
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    },
+    {
+        "field_name": "agent_first_name",
+        "field_type": "string",
+        "format_example": "Sarah",
+        "field_description": "First name of the agent",
+    },
+]
+
+TRANSCRIPT = {
+    "messages": [
+        {"speaker": "agent", "text": "Hi, this is Sarah."},
+        {"speaker": "customer", "text": "My issue is fixed, thanks!"},
+    ]
+}
+
+
+def _lm(latency=0.0):
+    # Constant token probabilities make results independent of call order
+    return StubLM(
+        StubResponder(
+            latency=latency,
+            reasoning_tokens=5,
+            token_confidence=(0.9, 0.0),
+            values={
+                "field_value": "Sarah",
+                "reasoning": "The agent says so.",
+                "score": 8,
+                "reason": "The agent greets the customer.",
+            },
+        )
+    )
+
+
+def _matrix(latency=0.0):
+    processors = {
+        name: TranscriptProcessor(api_key="unused", fields=FIELDS, lm=_lm(latency))
+        for name in ("crm", "qa")
+    }
+    evaluators = {
+        name: AssertsEvaluator(
+            api_key="unused", evaluation_steps=[step], lm=_lm(latency)
+        )
+        for name, step in (("greeting", "Agent greets"), ("close", "Agent closes"))
+    }
+    return processors, evaluators
+
+
+def test_pipeline_matches_individual_calls():
+    """The combined result equals running each processor and evaluator alone"""
+    processors, evaluators = _matrix()
+    role_transcript = {
+        "messages": [
+            {"role": "assistant", "content": "Hi, this is Sarah."},
+            {"role": "user", "content": "My issue is fixed, thanks!"},
+        ]
+    }
+
+    with EvaluationPipeline(processors, evaluators) as pipeline:
+        result = pipeline.run(TRANSCRIPT)
+
+    assert result == {
+        "extractions": {
+            name: p.process(role_transcript) for name, p in processors.items()
+        },
+        "evaluations": {
+            name: e.evaluate(dict(TRANSCRIPT)) for name, e in evaluators.items()
+        },
+    }
+
+
+def test_latency_is_that_of_the_slowest_call():
+    """Twelve calls of 0.2s finish in about 0.2s, not 2.4s"""
+    processors, evaluators = _matrix(latency=0.2)
+    with EvaluationPipeline(processors, evaluators, max_workers=16) as pipeline:
+        start = time.perf_counter()
+        results = pipeline.run_batch([TRANSCRIPT, TRANSCRIPT], max_transcripts=2)
+        elapsed = time.perf_counter() - start
+
+    assert len(results) == 2
+    assert elapsed < 0.8
+
+
+def test_prefix_warmup_runs_one_call_per_prefix_first():
+    """Followers of a prefix group start only after its leader finished"""
+    events = []
+    lock = threading.Lock()
+
+    def call(name):
+        def run():
+            with lock:
+                events.append(f"start {name}")
+            time.sleep(0.05)
+            with lock:
+                events.append(f"end {name}")
+            return name
+
+        return run
+
+    jobs = [("a", call("a1")), ("b", call("b1")), ("a", call("a2"))]
+    processors, _ = _matrix()
+    with EvaluationPipeline(processors, prefix_warmup=True) as pipeline:
+        futures = pipeline._dispatch(jobs)
+        assert [f.result(timeout=5) for f in futures] == ["a1", "b1", "a2"]
+
+    assert events.index("start a2") > events.index("end a1")
+    assert events.index("start b1") < events.index("end a1")
+
+
+def test_prescreen_runs_on_the_shared_pool():
+    """The presence call is a pooled job that its field calls wait for"""
+    calls = []
+
+    def record(kind, answer):
+        def value(messages):
+            calls.append((kind, threading.current_thread()))
+            return answer
+
+        return value
+
+    lm = StubLM(
+        StubResponder(
+            values={
+                "field_0": record("presence", "yes"),
+                "field_1": "yes",
+                "field_value": record("field", "Sarah"),
+            }
+        )
+    )
+    processor = TranscriptProcessor(
+        api_key="unused", fields=FIELDS, lm=lm, prescreen=True
+    )
+
+    with EvaluationPipeline({"crm": processor}, max_workers=1) as pipeline:
+        result = pipeline.run(TRANSCRIPT)
+
+    assert [kind for kind, _ in calls] == ["presence", "field", "field"]
+    assert threading.current_thread() not in {thread for _, thread in calls}
+    assert lm.calls == 3
+    assert [f["field_value"] for f in result["extractions"]["crm"]["fields"]] == [
+        "Sarah",
+        "Sarah",
+    ]
+
+
+def test_invalid_input():
+    """Inputs are validated once for the whole matrix"""
+    processors, evaluators = _matrix()
+    with EvaluationPipeline(processors, evaluators) as pipeline:
+        with pytest.raises(ValueError, match="Invalid input format"):
+            pipeline.run({"messages": [{"speaker": "agent"}]})
+
+    with pytest.raises(ValueError):
+        EvaluationPipeline()
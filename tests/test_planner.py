@@ -0,0 +1,138 @@
+"""
+Tests for the token and cost planner
+"""
+
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.planner import (
+    CharTokenizer,
+    CostPlanner,
+    TokenBudget,
+    tiktoken_tokenizer,
+)
+from transtype.testing import StubLM, StubResponder
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    },
+    {
+        "field_name": "resolved",
+        "field_type": "boolean",
+        "format_example": "true",
+        "field_description": "Whether the issue was resolved",
+    },
+]
+
+
+def _transcript(turns):
+    return {
+        "messages": [
+            {"role": "assistant", "content": "Hi, this is Sarah from support."},
+            {"role": "user", "content": "My router keeps dropping the connection."},
+        ]
+        * turns
+    }
+
+
+def _processor(**kwargs):
+    return TranscriptProcessor(
+        api_key="unused", fields=FIELDS, lm=StubLM(StubResponder()), **kwargs
+    )
+
+
+def _evaluator():
+    return AssertsEvaluator(
+        api_key="unused",
+        evaluation_steps=["Agent greets the customer"],
+        lm=StubLM(StubResponder(values={"score": 8})),
+    )
+
+
+def test_calls_cover_every_request():
+    """One call per field and per evaluator, with the adapter's overhead"""
+    planner = CostPlanner([_processor(), _evaluator()])
+    short, long = planner.calls(_transcript(1)), planner.calls(_transcript(20))
+
+    assert [c.kind for c in short] == ["field", "field", "evaluation"]
+    assert all(c.model == "stub" for c in short)
+    transcript_tokens = CharTokenizer()("Agent: Hi, this is Sarah from support.")
+    assert all(c.prompt_tokens > 10 * transcript_tokens for c in short)
+    assert all(b.prompt_tokens > a.prompt_tokens for a, b in zip(short, long))
+
+    json_calls = CostPlanner([_processor(output_mode="json")]).calls(_transcript(1))
+    assert json_calls[0].prompt_tokens != short[0].prompt_tokens
+
+    prescreened = CostPlanner([_processor(prescreen=True)]).calls(_transcript(1))
+    assert [c.kind for c in prescreened] == ["presence", "field", "field"]
+
+
+def test_relevance_fields_count_the_fallback_call():
+    """Relevance-limited fields count their context call and the full fallback"""
+    full = CostPlanner([_processor()]).calls(_transcript(20))
+    limited = CostPlanner([_processor(relevance_top_k=1)]).calls(_transcript(20))
+
+    assert [c.kind for c in limited] == ["field", "fallback"] * 2
+    assert [c.prompt_tokens for c in limited[1::2]] == [c.prompt_tokens for c in full]
+    assert all(a.prompt_tokens < b.prompt_tokens for a, b in zip(limited[::2], full))
+
+
+def test_estimate_projects_cost_and_duration():
+    """Totals scale from a sample; time follows the binding rate limit"""
+    planner = CostPlanner([_processor()], prices={"stub": (1.0, 2.0)})
+    sample = [_transcript(3)] * 10
+    one = planner.estimate(sample[:1])
+    estimate = planner.estimate(sample, total_transcripts=1000, tpm_limit=1e6)
+
+    assert estimate.transcripts == 1000 and estimate.calls == 2000
+    assert estimate.prompt_tokens == 1000 * one.prompt_tokens
+    assert estimate.cost == pytest.approx(
+        (estimate.prompt_tokens + 2 * estimate.completion_tokens) / 1e6, rel=1e-3
+    )
+    assert estimate.seconds == pytest.approx(estimate.total_tokens / 1e6 * 60, 0.01)
+    assert planner.estimate(sample, rpm_limit=1).seconds == 20 * 60
+    assert planner.estimate(sample).seconds is None
+
+    # Known models are priced from LiteLLM's table by default
+    assert CostPlanner([_processor()]).estimate(sample).cost is None
+    gpt4o = TranscriptProcessor(api_key="unused", fields=FIELDS, model="gpt-4o")
+    assert CostPlanner([gpt4o]).estimate(sample).cost > 0
+    assert estimate.to_dict()["total_tokens"] == estimate.total_tokens
+
+
+def test_budget_stops_cleanly():
+    """The run stops before the first transcript that does not fit"""
+    processor = _processor()
+    planner = CostPlanner([processor])
+    inputs = [_transcript(2) for _ in range(5)]
+    per_transcript = planner.transcript_tokens(inputs[0])
+    budget = TokenBudget(int(per_transcript * 2.5))
+
+    results = list(planner.run(processor.process, inputs, budget, max_workers=2))
+
+    assert len(results) == 2
+    assert budget.exhausted and budget.used == 2 * per_transcript
+    assert processor.lm.calls == 2 * len(FIELDS)
+    assert not budget.reserve(1)
+
+
+def test_tokenizers():
+    """The heuristic calibrates to known counts; tiktoken counts exactly"""
+    tokenizer = CharTokenizer.calibrate(["a" * 30, "b" * 50], [10, 10])
+    assert tokenizer.chars_per_token == 4.0
+    assert tokenizer("x" * 9) == 3
+    with pytest.raises(ValueError):
+        CharTokenizer.calibrate(["text"], [0])
+    with pytest.raises(ValueError):
+        CostPlanner([object()])
+
+    pytest.importorskip("tiktoken")
+    try:
+        count = tiktoken_tokenizer()
+    except Exception:  # the encoding is downloaded on first use
+        pytest.skip("tiktoken encoding unavailable offline")
+    assert 0 < count("Agent: Hi, this is Sarah from support.") < 15
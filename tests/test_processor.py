@@ -2,12 +2,15 @@
 Tests for the transtype package
 """
 
+import itertools
+import json
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
 
-from transtype import TranscriptInput, TranscriptProcessor
+from transtype import AssertsEvaluator, TranscriptInput, TranscriptProcessor
 from transtype.models import FieldResult
+from transtype.testing import StubLM, StubResponder
 
 
 class TestTranscriptProcessor:
@@ -188,6 +191,241 @@ class TestTranscriptProcessor:
         assert result["fields"][0]["field_value"] == "Marcus"
         assert result["fields"][0]["field_reason"] is None
 
+    @patch("transtype.processor.dspy")
+    def test_process_json_bytes(self, mock_dspy, sample_fields, sample_input_data):
+        """Test bytes-in/bytes-out processing produces compact JSON"""
+        mock_result = Mock()
+        mock_result.field_value = "Marcus"
+        mock_result.reasoning = "Representative introduced himself as Marcus"
+        mock_result.logprobs = None
+        mock_dspy.Predict.return_value = MagicMock(return_value=mock_result)
+
+        processor = TranscriptProcessor(api_key="test_key", fields=sample_fields)
+        payload = json.dumps(sample_input_data).encode()
+        result = processor.process_json_bytes(payload)
+
+        assert isinstance(result, bytes)
+        assert b"\n" not in result
+        assert json.loads(result) == processor.process(sample_input_data)
+        assert json.loads(processor.process_json_bytes(payload, indent=2)) == (
+            json.loads(result)
+        )
+
+    @patch("transtype.processor.dspy")
+    def test_process_json_bytes_invalid_input(self, mock_dspy, sample_fields):
+        """Test bytes processing rejects malformed JSON and bad messages"""
+        processor = TranscriptProcessor(api_key="test_key", fields=sample_fields)
+
+        with pytest.raises(ValueError, match="Invalid JSON input"):
+            processor.process_json_bytes(b"{not json")
+        with pytest.raises(ValueError, match="Invalid input format"):
+            processor.process_json_bytes(b'{"messages": [{"role": "user"}]}')
+
+    @pytest.mark.parametrize("output_mode", ["text", "json"])
+    def test_process_typed_fields(self, sample_input_data, output_mode):
+        """Test enum, boolean, integer and date fields are parsed to their types"""
+        fields = [
+            {
+                "field_name": "category",
+                "field_type": "enum",
+                "allowed_values": ["billing", "technical"],
+                "format_example": "billing",
+                "field_description": "Reason for the call",
+            },
+            {
+                "field_name": "resolved",
+                "field_type": "boolean",
+                "format_example": "yes",
+                "field_description": "Whether the issue was resolved",
+            },
+            {
+                "field_name": "ticket_count",
+                "field_type": "integer",
+                "format_example": "2",
+                "field_description": "Number of open tickets",
+            },
+            {
+                "field_name": "due_date",
+                "field_type": "date",
+                "format_example": "2024-01-31",
+                "field_description": "Payment due date",
+            },
+        ]
+        answers = {
+            "category": "technical",
+            "resolved": "no",
+            "ticket_count": "1,204",
+            "due_date": "2024-03-01",
+        }
+        lm = StubLM(
+            StubResponder(
+                values={
+                    "field_value": lambda messages: next(
+                        v for k, v in answers.items() if k in messages[-1]["content"]
+                    )
+                }
+            ),
+            top_logprobs=5,
+        )
+        processor = TranscriptProcessor(
+            api_key="unused", fields=fields, lm=lm, output_mode=output_mode
+        )
+
+        result = processor.process(sample_input_data)
+
+        values = {f["field_name"]: f["field_value"] for f in result["fields"]}
+        assert values == {
+            "category": "technical",
+            "resolved": False,
+            "ticket_count": 1204,
+            "due_date": "2024-03-01",
+        }
+        assert all(f["field_confidence"] > 0.1 for f in result["fields"])
+        typed = processor._extract_field("", fields[3])
+        assert typed.field_value.isoformat() == "2024-03-01"
+
+    @pytest.mark.parametrize("vote", ["majority", "weighted"])
+    def test_process_self_consistency(self, sample_fields, sample_input_data, vote):
+        """Test n samples come from one request and are voted on"""
+        values = itertools.cycle(["Marcus", "marcus ", "Mark"])
+        lm = StubLM(StubResponder(values={"field_value": lambda _: next(values)}))
+        processor = TranscriptProcessor(
+            api_key="unused", fields=sample_fields, lm=lm, num_samples=3, vote=vote
+        )
+
+        field = processor.process(sample_input_data)["fields"][0]
+
+        assert lm.calls == 1
+        assert field["field_value"] == "Marcus"
+        assert 0.1 <= field["field_confidence"] <= 0.99
+
+    @pytest.mark.parametrize("output_mode", ["text", "json"])
+    def test_process_presence_prescreen(
+        self, sample_fields, sample_input_data, output_mode
+    ):
+        """Test fields screened as absent skip the full extraction"""
+        fields = sample_fields + [
+            {
+                "field_name": "callback_number",
+                "field_type": "string",
+                "format_example": "555-0100",
+                "field_description": "Phone number to call the customer back on",
+            }
+        ]
+        lm = StubLM(StubResponder(values={"field_0": "yes", "field_1": "no"}, seed=1))
+        processor = TranscriptProcessor(
+            api_key="unused",
+            fields=fields,
+            lm=lm,
+            output_mode=output_mode,
+            prescreen=True,
+        )
+
+        present, absent = processor.process(sample_input_data)["fields"]
+
+        assert lm.calls == 2
+        assert present["field_value"] == "Sarah Chen"
+        assert absent["field_value"] is None
+        assert absent["field_confidence"] == 0.99
+        assert "pre-screen" in absent["field_reason"]
+
+    def test_process_prescreen_without_logprobs(self, sample_fields, sample_input_data):
+        """Test fields are extracted when the pre-screen is uncertain"""
+        lm = StubLM(StubResponder(values={"field_0": "no"}))
+        processor = TranscriptProcessor(
+            api_key="unused", fields=sample_fields, lm=lm, prescreen=True
+        )
+        processor.presence_screener.config.pop("top_logprobs")
+
+        field = processor.process(sample_input_data)["fields"][0]
+
+        assert lm.calls == 2
+        assert field["field_value"] == "Sarah Chen"
+
+    def test_invalid_field_definition(self):
+        """Test enum fields without allowed values are rejected"""
+        with pytest.raises(ValueError, match="Invalid field definition"):
+            TranscriptProcessor(
+                api_key="unused",
+                fields=[
+                    {
+                        "field_name": "category",
+                        "field_type": "enum",
+                        "format_example": "billing",
+                        "field_description": "Reason for the call",
+                    }
+                ],
+                lm=StubLM(),
+            )
+
+
+class TestAssertsEvaluator:
+    """Test cases for AssertsEvaluator"""
+
+    @pytest.fixture
+    def mock_evaluator(self):
+        """Evaluator whose DSPy predictor returns a fixed score"""
+        with patch("transtype.processor.dspy") as mock_dspy:
+            mock_result = Mock()
+            mock_result.score = 8
+            mock_result.reason = "The agent greeted the customer"
+            mock_result.logprobs = None
+            mock_dspy.Predict.return_value = MagicMock(return_value=mock_result)
+            yield AssertsEvaluator(
+                api_key="test_key", evaluation_steps=["Did the agent greet?"]
+            )
+
+    def test_evaluate(self, mock_evaluator):
+        """Test evaluation with a mocked score"""
+        result = mock_evaluator.evaluate(
+            {"messages": [{"role": "assistant", "content": "Hello!"}]}
+        )
+
+        assert result["result"]["score"] == 0.8
+        assert result["result"]["confidence"] == 0.5
+        assert result["result"]["success"] is True
+
+    def test_evaluate_self_consistency(self):
+        """Test sampled scores are averaged and disagreement lowers confidence"""
+        scores = itertools.cycle([6, 8, 7])
+        lm = StubLM(StubResponder(values={"score": lambda _: next(scores)}))
+        evaluator = AssertsEvaluator(
+            api_key="unused",
+            evaluation_steps=["Did the agent greet?"],
+            lm=lm,
+            num_samples=3,
+        )
+
+        result = evaluator.evaluate(
+            {"messages": [{"role": "assistant", "content": "Hello!"}]}
+        )["result"]
+
+        assert lm.calls == 1
+        assert result["score"] == 0.7
+        assert result["confidence"] < 0.99
+        with pytest.raises(ValueError):
+            AssertsEvaluator(api_key="unused", evaluation_steps=[], num_samples=0)
+
+    def test_evaluate_json_bytes_speaker_format(self, mock_evaluator):
+        """Test bytes evaluation accepts speaker/text messages"""
+        payload = json.dumps(
+            {"messages": [{"speaker": "agent", "text": "Hello!"}]}
+        ).encode()
+
+        result = json.loads(mock_evaluator.evaluate_json_bytes(payload))
+        expected = mock_evaluator.evaluate(
+            {"messages": [{"role": "assistant", "content": "Hello!"}]}
+        )
+
+        assert result == expected
+
+    def test_evaluate_json_bytes_invalid_input(self, mock_evaluator):
+        """Test bytes evaluation rejects malformed payloads"""
+        with pytest.raises(ValueError, match="Invalid JSON input"):
+            mock_evaluator.evaluate_json_bytes(b"[1, 2")
+        with pytest.raises(ValueError, match="Invalid message format"):
+            mock_evaluator.evaluate_json_bytes(b'{"messages": [{"speaker": "a"}]}')
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,143 @@
+"""
+Tests for saving and loading compiled programs
+"""
+
+import openai
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.testing import StubLM, StubResponder, StubServer
+
+FIELDS = [
+    {
+        "field_name": "agent_name",
+        "field_type": "string",
+        "format_example": "Sarah Chen",
+        "field_description": "Name of the agent",
+    },
+    {
+        "field_name": "resolved",
+        "field_type": "boolean",
+        "format_example": "yes",
+        "field_description": "Whether the issue was resolved",
+    },
+]
+
+TRANSCRIPT = {"messages": [{"role": "assistant", "content": "Hi, this is Sarah."}]}
+
+
+def _optimize(processor):
+    """Stand-in for an offline optimizer: shorter instructions and one demo"""
+    predictor = processor.field_extractor
+    predictor.signature = predictor.signature.with_instructions("Extract the field.")
+    predictor.demos = [
+        {
+            "transcript": "User: Hi Tom",
+            "field_name": "agent_name",
+            "field_type": "string",
+            "format_example": "Sarah Chen",
+            "field_description": "Name of the agent",
+            "field_value": "Tom",
+            "reasoning": "Greeted by name",
+        }
+    ]
+
+
+def test_program_round_trip(tmp_path):
+    """Loaded programs send the optimized instructions and demos"""
+    path = tmp_path / "extractor.json"
+    source = TranscriptProcessor(api_key="unused", fields=FIELDS, lm=StubLM())
+    _optimize(source)
+    source.save_program(path)
+
+    system_prompts = []
+
+    def answer(messages):
+        system_prompts.append(messages[0]["content"])
+        return "Sarah"
+
+    worker = TranscriptProcessor(
+        api_key="unused",
+        fields=FIELDS[:1],
+        lm=StubLM(StubResponder(values={"field_value": answer})),
+        program=path,
+    )
+
+    assert worker.process(TRANSCRIPT)["fields"][0]["field_value"] == "Sarah"
+    assert system_prompts[0].endswith("Extract the field.")
+    assert len(worker.field_extractor.demos) == 1
+
+
+def test_program_applies_to_direct_backend(tmp_path):
+    """Programs recompile the pre-rendered prompts of the openai backend"""
+    path = tmp_path / "extractor.json"
+    source = TranscriptProcessor(api_key="unused", fields=FIELDS[:1], lm=StubLM())
+    _optimize(source)
+    source.save_program(path)
+
+    with StubServer() as server:
+        worker = TranscriptProcessor(
+            api_key="unused",
+            fields=FIELDS[:1],
+            model="stub",
+            backend="openai",
+            client=openai.OpenAI(api_key="unused", base_url=server.base_url),
+            program=path,
+        )
+        messages = worker.field_extractor.format(
+            transcript="Assistant: Hi",
+            field_name="agent_name",
+            field_type="string",
+            format_example="Sarah Chen",
+            field_description="Name of the agent",
+        )
+
+    assert messages[0]["content"].endswith("Extract the field.")
+    assert "Tom" in messages[2]["content"]
+
+
+def test_program_mismatch_is_rejected(tmp_path):
+    """Programs for another model, kind or field set are not loaded"""
+    path = tmp_path / "extractor.json"
+    TranscriptProcessor(api_key="unused", fields=FIELDS[:1], lm=StubLM()).save_program(
+        path
+    )
+
+    with pytest.raises(ValueError, match="compiled for"):
+        TranscriptProcessor(
+            api_key="unused",
+            fields=FIELDS[:1],
+            lm=StubLM(model="openai/other"),
+            program=path,
+        )
+    with pytest.raises(ValueError, match="no predictor"):
+        TranscriptProcessor(api_key="unused", fields=FIELDS, lm=StubLM(), program=path)
+    with pytest.raises(ValueError, match="evaluator program"):
+        AssertsEvaluator(
+            api_key="unused", evaluation_steps=["Step"], lm=StubLM(), program=path
+        )
+
+
+def test_program_includes_presence_screener(tmp_path):
+    """The pre-screen predictor's state is saved and required on load"""
+    path = tmp_path / "extractor.json"
+    source = TranscriptProcessor(
+        api_key="unused", fields=FIELDS, lm=StubLM(), prescreen=True
+    )
+    screener = source.presence_screener
+    screener.signature = screener.signature.with_instructions("Which are present?")
+    source.save_program(path)
+
+    worker = TranscriptProcessor(
+        api_key="unused", fields=FIELDS, lm=StubLM(), prescreen=True, program=path
+    )
+    assert worker.presence_screener.signature.instructions == "Which are present?"
+
+    plain = tmp_path / "plain.json"
+    TranscriptProcessor(api_key="unused", fields=FIELDS, lm=StubLM()).save_program(
+        plain
+    )
+    with pytest.raises(ValueError, match="no predictor"):
+        TranscriptProcessor(
+            api_key="unused", fields=FIELDS, lm=StubLM(), prescreen=True, program=plain
+        )
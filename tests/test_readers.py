@@ -0,0 +1,207 @@
+"""
+Tests for the streaming transcript readers
+"""
+
+import gzip
+import io
+import json
+
+import pytest
+
+from transtype import AssertsEvaluator, TranscriptInput, TranscriptProcessor
+from transtype.readers import (
+    iter_jsonl,
+    iter_srt_messages,
+    iter_transcripts,
+    iter_webvtt_messages,
+    normalize_message,
+    read_diarized_json,
+)
+from transtype.testing import StubLM, StubResponder
+
+WEBVTT = """WEBVTT
+
+1
+00:00:00.000 --> 00:00:02.000
+<v Agent>Hi, this is Marcus.</v>
+
+2
+00:00:02.000 --> 00:00:04.000
+<v Agent>How can I help?</v>
+
+3
+00:00:04.000 --> 00:00:06.000
+<v Caller>My internet is down.
+"""
+
+SRT = """1
+00:00:00,000 --> 00:00:02,000
+Agent: Thanks for calling.
+
+2
+00:00:02,000 --> 00:00:04,000
+Customer: I need a refund.
+
+3
+00:00:04,000 --> 00:00:05,000
+It was charged twice.
+"""
+
+
+def test_normalize_message_matches_evaluator():
+    """Speaker/text messages map to roles the same way as AssertsEvaluator"""
+    evaluator = AssertsEvaluator.__new__(AssertsEvaluator)
+    messages = [
+        {"speaker": "Caller", "text": "Hello"},
+        {"speaker": "agent", "text": "Hi"},
+        {"role": "user", "content": "Bye"},
+    ]
+    assert evaluator._normalize_messages(messages) == [
+        normalize_message(m) for m in messages
+    ]
+    assert normalize_message(messages[0]) == {"role": "user", "content": "Hello"}
+    with pytest.raises(ValueError):
+        normalize_message({"speaker": "agent"})
+
+
+def test_iter_jsonl_transcript_per_line(tmp_path):
+    """Each line becomes one transcript input, extra keys preserved"""
+    path = tmp_path / "export.jsonl.gz"
+    with gzip.open(path, "wt") as f:
+        for call_id in ("a", "b"):
+            record = {
+                "call_id": call_id,
+                "utterances": [{"speaker": "caller", "text": f"call {call_id}"}],
+            }
+            f.write(json.dumps(record) + "\n\n")
+
+    records = list(iter_jsonl(str(path), messages_key="utterances"))
+
+    assert [r["call_id"] for r in records] == ["a", "b"]
+    assert records[0]["messages"] == [{"role": "user", "content": "call a"}]
+    assert TranscriptInput(**records[1]).messages[0].content == "call b"
+
+
+def test_iter_jsonl_grouped_utterances():
+    """Consecutive utterance lines with the same id form one transcript"""
+    lines = [
+        {"call_id": 1, "speaker": "agent", "text": "Hello"},
+        {"call_id": 1, "speaker": "caller", "text": "Hi"},
+        {"call_id": 2, "role": "user", "content": "Help"},
+    ]
+    stream = io.BytesIO(b"".join(json.dumps(x).encode() + b"\n" for x in lines))
+
+    records = list(iter_jsonl(stream, group_by="call_id"))
+
+    assert [r["call_id"] for r in records] == [1, 2]
+    assert [m["role"] for m in records[0]["messages"]] == ["assistant", "user"]
+    assert not stream.closed
+
+
+def test_iter_webvtt_messages_merges_turns():
+    """Voice tags set the speaker and consecutive cues are merged"""
+    stream = io.BytesIO(WEBVTT.encode())
+
+    messages = list(iter_webvtt_messages(stream))
+
+    assert messages == [
+        {"role": "assistant", "content": "Hi, this is Marcus. How can I help?"},
+        {"role": "user", "content": "My internet is down."},
+    ]
+
+
+def test_iter_srt_messages_with_speaker_roles():
+    """Prefixed speakers are mapped and unlabelled cues continue the turn"""
+    stream = io.BytesIO(SRT.encode())
+
+    messages = list(iter_srt_messages(stream, speaker_roles={"Customer": "user"}))
+
+    assert messages == [
+        {"role": "assistant", "content": "Thanks for calling."},
+        {"role": "user", "content": "I need a refund. It was charged twice."},
+    ]
+
+
+def test_srt_colon_inside_sentence_is_not_a_speaker():
+    """Only speaker-like prefixes switch turns; other colons stay in the text"""
+    srt = """1
+00:00:00,000 --> 00:00:02,000
+Caller: I was charged twice.
+
+2
+00:00:02,000 --> 00:00:04,000
+Here is the problem: I never got a refund.
+
+3
+00:00:04,000 --> 00:00:06,000
+[Agent 2]: Let me check that.
+Note the date: it was May 3.
+"""
+
+    messages = list(iter_srt_messages(io.BytesIO(srt.encode())))
+
+    assert messages == [
+        {
+            "role": "user",
+            "content": "I was charged twice. Here is the problem: I never got a refund.",
+        },
+        {
+            "role": "assistant",
+            "content": "Let me check that. Note the date: it was May 3.",
+        },
+    ]
+
+
+def test_read_diarized_json():
+    """Vendor segment lists become role/content messages"""
+    document = {
+        "utterances": [
+            {"speaker_label": "spk_0", "transcript": " Hello there "},
+            {"speaker_label": "spk_1", "transcript": "Hi"},
+        ]
+    }
+    stream = io.BytesIO(json.dumps(document).encode())
+
+    transcript = read_diarized_json(
+        stream, speaker_roles={"spk_0": "assistant", "spk_1": "user"}
+    )
+
+    assert transcript == {
+        "messages": [
+            {"role": "assistant", "content": "Hello there"},
+            {"role": "user", "content": "Hi"},
+        ]
+    }
+
+
+def test_iter_transcripts_feeds_batch_api(tmp_path):
+    """Mixed export files stream straight into process_batch"""
+    (tmp_path / "call.vtt").write_text(WEBVTT)
+    (tmp_path / "call.srt").write_text(SRT)
+    (tmp_path / "calls.ndjson").write_text(
+        json.dumps({"messages": [{"role": "user", "content": "Hi"}]}) + "\n"
+    )
+    paths = [tmp_path / "call.vtt", tmp_path / "call.srt", tmp_path / "calls.ndjson"]
+    processor = TranscriptProcessor(
+        api_key="unused",
+        fields=[
+            {
+                "field_name": "agent_name",
+                "field_type": "string",
+                "format_example": "Sarah Chen",
+                "field_description": "Name of the agent",
+            }
+        ],
+        lm=StubLM(StubResponder(values={"field_value": "Marcus"})),
+    )
+
+    results = processor.process_batch(iter_transcripts(paths), max_workers=2)
+
+    assert len(results) == 3
+    assert all(r["fields"][0]["field_value"] == "Marcus" for r in results)
+
+
+def test_iter_transcripts_rejects_unknown_extension(tmp_path):
+    """Unknown file types are reported rather than guessed"""
+    with pytest.raises(ValueError):
+        list(iter_transcripts([tmp_path / "call.txt"]))
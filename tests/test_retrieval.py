@@ -0,0 +1,105 @@
+"""
+Tests for the turn relevance index
+"""
+
+from transtype import TranscriptProcessor
+from transtype.retrieval import GAP_MARKER, TurnIndex, field_query
+from transtype.testing import StubLM, StubResponder
+
+TURNS = [
+    "Assistant: Thanks for calling, this is Sarah.",
+    "User: Hi, I was charged twice this month.",
+    "Assistant: Sorry about that, let me check the invoice.",
+    "User: Sure, take your time.",
+    "Assistant: Can I confirm your email address?",
+    "User: It is jordan.miles@example.com.",
+    "Assistant: Thanks, the refund is on its way.",
+]
+
+EMAIL_FIELD = {
+    "field_name": "customer_email",
+    "field_type": "string",
+    "format_example": "name@example.com",
+    "field_description": "Email address of the customer",
+}
+
+
+def test_select_top_turns_with_neighborhood():
+    """The best-matching turns are kept with their neighbors, in order"""
+    index = TurnIndex(TURNS)
+
+    assert index.select(field_query(EMAIL_FIELD), top_k=1, window=1) == [3, 4, 5]
+    assert index.select(field_query(EMAIL_FIELD), top_k=2, window=0) == [4, 5]
+    assert index.select("warranty", top_k=3) == []
+
+
+def test_context_marks_gaps():
+    """Skipped stretches of the call are replaced by a marker"""
+    index = TurnIndex(TURNS)
+
+    context = index.context([1, 4, 5])
+
+    assert context.split("\n") == [
+        GAP_MARKER,
+        TURNS[1],
+        GAP_MARKER,
+        TURNS[4],
+        TURNS[5],
+        GAP_MARKER,
+    ]
+
+
+def _transcript():
+    return {
+        "messages": [
+            {
+                "role": "assistant" if turn.startswith("Assistant") else "user",
+                "content": turn.split(": ", 1)[1],
+            }
+            for turn in TURNS
+        ]
+    }
+
+
+def test_process_sends_relevant_turns_only():
+    """Field calls see only the selected turns when the value is found there"""
+    prompts = []
+
+    def answer(messages):
+        prompts.append(messages[-1]["content"])
+        return "jordan.miles@example.com"
+
+    processor = TranscriptProcessor(
+        api_key="unused",
+        fields=[EMAIL_FIELD],
+        lm=StubLM(StubResponder(values={"field_value": answer})),
+        relevance_top_k=2,
+        relevance_window=0,
+    )
+
+    result = processor.process(_transcript())
+
+    assert result["fields"][0]["field_value"] == "jordan.miles@example.com"
+    assert len(prompts) == 1
+    assert TURNS[5] in prompts[0] and TURNS[0] not in prompts[0]
+
+
+def test_process_falls_back_to_full_transcript():
+    """NOT_FOUND in the selected turns retries with the whole call"""
+    prompts = []
+
+    def answer(messages):
+        prompts.append(messages[-1]["content"])
+        return "Sarah" if TURNS[0] in messages[-1]["content"] else "NOT_FOUND"
+
+    processor = TranscriptProcessor(
+        api_key="unused",
+        fields=[EMAIL_FIELD],
+        lm=StubLM(StubResponder(values={"field_value": answer})),
+        relevance_top_k=1,
+    )
+
+    result = processor.process(_transcript())
+
+    assert result["fields"][0]["field_value"] == "Sarah"
+    assert len(prompts) == 2
@@ -0,0 +1,148 @@
+"""
+Tests for the priority- and deadline-aware scheduler
+"""
+
+import threading
+
+import pytest
+
+from transtype import TranscriptProcessor
+from transtype.scheduler import DeadlineExceeded, PriorityClass, Scheduler
+from transtype.testing import StubLM, StubResponder
+
+
+def _blocked(scheduler, **options):
+    """Occupy one worker until the returned event is set"""
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    future = scheduler.submit(block, **options)
+    assert started.wait(5)
+    return release, future
+
+
+def test_realtime_overtakes_queued_batch_work():
+    """Realtime jobs submitted later run before queued batch jobs"""
+    order = []
+    with Scheduler(max_workers=1) as scheduler:
+        release, _ = _blocked(scheduler)
+        for i in range(3):
+            scheduler.submit(order.append, f"batch{i}", priority_class="batch")
+        scheduler.submit(order.append, "live", priority_class="realtime")
+        release.set()
+
+    assert order == ["live", "batch0", "batch1", "batch2"]
+
+
+def test_tenants_share_a_class_fairly():
+    """A tenant with a large backlog does not starve other tenants"""
+    order = []
+    with Scheduler(max_workers=1, tenant_weights={"big": 2.0}) as scheduler:
+        release, _ = _blocked(scheduler)
+        for i in range(6):
+            scheduler.submit(order.append, "big", tenant="big")
+        for i in range(2):
+            scheduler.submit(order.append, "small", tenant="small")
+        release.set()
+
+    assert order[:6] == ["big", "small", "big", "big", "small", "big"]
+
+
+def test_class_limit_keeps_workers_for_realtime():
+    """Batch work at its concurrency limit leaves a worker free"""
+    classes = [PriorityClass("realtime", 0), PriorityClass("batch", 1, 1)]
+    with Scheduler(max_workers=2, classes=classes) as scheduler:
+        release, _ = _blocked(scheduler, priority_class="batch")
+        queued = scheduler.submit(lambda: "batch", priority_class="batch")
+        live = scheduler.submit(lambda: "live", priority_class="realtime")
+
+        assert live.result(timeout=5) == "live"
+        assert not queued.done()
+        release.set()
+        assert queued.result(timeout=5) == "batch"
+
+
+def test_expired_jobs_fail_without_running():
+    """Jobs whose deadline passes in the queue raise DeadlineExceeded"""
+    calls = []
+    with Scheduler(max_workers=1) as scheduler:
+        release, _ = _blocked(scheduler)
+        late = scheduler.submit(calls.append, 1, deadline=0.0)
+        release.set()
+
+        with pytest.raises(DeadlineExceeded):
+            late.result(timeout=5)
+        metrics = scheduler.metrics()
+
+    assert calls == []
+    assert metrics["batch"]["expired"] == 1
+    assert metrics["batch"]["completed"] == 1
+    assert metrics["batch"]["wait_max"] >= 0.0
+
+
+def test_cancelled_expired_job_keeps_worker_alive():
+    """Cancelling a queued job whose deadline passes does not stall the pool"""
+    calls = []
+    with Scheduler(max_workers=1) as scheduler:
+        release, _ = _blocked(scheduler)
+        late = scheduler.submit(calls.append, 1, deadline=0.0)
+        assert late.cancel()
+        release.set()
+
+        assert scheduler.submit(lambda: "next").result(timeout=5) == "next"
+        metrics = scheduler.metrics()
+
+    assert calls == [] and late.cancelled()
+    assert metrics["batch"]["expired"] == 0
+    assert metrics["batch"]["cancelled"] == 1
+
+
+def test_cancelled_job_is_not_counted_as_completed():
+    """A job cancelled while queued adds no completion or wait sample"""
+    calls = []
+    with Scheduler(max_workers=1) as scheduler:
+        release, _ = _blocked(scheduler)
+        dropped = scheduler.submit(calls.append, 1)
+        assert dropped.cancel()
+        release.set()
+
+        assert scheduler.submit(lambda: "next").result(timeout=5) == "next"
+    # Read after shutdown, once the workers have recorded every completion
+    metrics = scheduler.metrics()["batch"]
+
+    assert calls == []
+    assert metrics["cancelled"] == 1
+    assert metrics["completed"] == 2
+    assert metrics["in_flight"] == 0
+
+
+def test_schedules_processor_calls():
+    """process() results and exceptions are delivered through futures"""
+    fields = [
+        {
+            "field_name": "agent_name",
+            "field_type": "string",
+            "format_example": "Sarah Chen",
+            "field_description": "Name of the agent",
+        }
+    ]
+    responder = StubResponder(values={"field_value": "Sarah"})
+    processor = TranscriptProcessor(
+        api_key="unused", fields=fields, lm=StubLM(responder)
+    )
+    transcript = {"messages": [{"role": "assistant", "content": "Hi, I'm Sarah."}]}
+
+    with Scheduler(max_workers=2) as scheduler:
+        result = scheduler.process(processor, transcript, priority_class="realtime")
+        invalid = scheduler.process(processor, {"messages": "nope"})
+
+        assert result.result(timeout=5)["fields"][0]["field_value"] == "Sarah"
+        with pytest.raises(ValueError):
+            invalid.result(timeout=5)
+        assert scheduler.metrics()["realtime"]["completed"] == 1
+
+    with pytest.raises(ValueError):
+        scheduler.submit(print, priority_class="urgent")
@@ -0,0 +1,106 @@
+"""
+Tests for vectorized confidence and weighted-score computation
+"""
+
+import math
+import random
+from types import SimpleNamespace
+
+import numpy as np
+from openai.types.chat.chat_completion import ChoiceLogprobs
+
+from transtype import AssertsEvaluator, TranscriptProcessor
+from transtype.logprobs import LogprobsSlice
+from transtype.scoring import batch_confidence, batch_weighted_scores
+
+_ALTERNATIVES = ["0", "3", "7", "8", "10", "11", "7.5", "1.2.3", "a", " 9", ""]
+
+
+def _random_logprobs(rng: random.Random, raw_score: int):
+    """A logprobs payload with the edge cases the scalar path handles"""
+    if rng.random() < 0.05:
+        return None
+    kind = rng.random()
+    content = []
+    for _ in range(rng.randint(0, 6)):
+        token = rng.choice(["[[", " ##", "score", str(raw_score), "\n", " reason"])
+        alternatives = [
+            {
+                "token": rng.choice(_ALTERNATIVES),
+                "logprob": math.log(rng.uniform(0.001, 1.0)),
+                "bytes": None,
+            }
+            for _ in range(rng.randint(0, 5))
+        ]
+        content.append(
+            {
+                "token": token,
+                # API objects always carry a logprob; dictionaries may not
+                "logprob": (
+                    None
+                    if kind >= 0.3 and rng.random() < 0.1
+                    else math.log(rng.random())
+                ),
+                "bytes": None,
+                "top_logprobs": alternatives,
+            }
+        )
+    payload = {"content": content}
+    if kind < 0.3:
+        return ChoiceLogprobs.model_validate(payload)
+    if kind < 0.4:
+        # Entries of other client libraries may lack logprob altogether
+        return LogprobsSlice(
+            [
+                SimpleNamespace(
+                    **{
+                        k: v
+                        for k, v in entry.items()
+                        if v is not None or k != "logprob"
+                    }
+                )
+                for entry in content
+            ]
+        )
+    return payload
+
+
+def _corpus(size: int, seed: int = 0):
+    rng = random.Random(seed)
+    raw_scores = [rng.randint(0, 10) for _ in range(size)]
+    return raw_scores, [_random_logprobs(rng, score) for score in raw_scores]
+
+
+def test_batch_confidence_matches_scalar():
+    """Average-probability confidence equals the per-response computation"""
+    _, logprobs_list = _corpus(2000)
+    processor = TranscriptProcessor.__new__(TranscriptProcessor)
+
+    expected = [
+        processor._calculate_confidence_from_logprobs(lp) for lp in logprobs_list
+    ]
+
+    assert batch_confidence(logprobs_list).tolist() == expected
+
+
+def test_batch_weighted_scores_match_scalar():
+    """G-Eval weighted scores and confidences equal the scalar path"""
+    raw_scores, logprobs_list = _corpus(2000, seed=1)
+    evaluator = AssertsEvaluator.__new__(AssertsEvaluator)
+
+    expected = [
+        evaluator._generate_weighted_summed_score(score, lp)
+        for score, lp in zip(raw_scores, logprobs_list)
+    ]
+    scores, confidences = batch_weighted_scores(raw_scores, logprobs_list)
+
+    np.testing.assert_allclose(scores, [s for s, _ in expected], rtol=1e-12)
+    assert confidences.tolist() == [c for _, c in expected]
+    assert 0.5 in confidences and (confidences != 0.5).any()
+
+
+def test_empty_batches():
+    """Empty inputs give empty results"""
+    assert batch_confidence([]).size == 0
+    scores, confidences = batch_weighted_scores([], [])
+    assert scores.size == confidences.size == 0
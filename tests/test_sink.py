@@ -0,0 +1,144 @@
+"""
+Tests for the columnar result sink
+"""
+
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from transtype.sink import ResultSink, read_tables
+
+REASON = "The agent introduces themselves by name at the start of the call. " * 5
+
+
+def _extraction(i):
+    return {
+        "fields": [
+            {
+                "field_name": "agent_name",
+                "field_value": f"Agent {i % 7}",
+                "field_confidence": 0.9,
+                "field_reason": REASON,
+            },
+            {
+                "field_name": "resolved",
+                "field_value": None if i % 3 == 0 else bool(i % 2),
+                "field_confidence": 0.75,
+                "field_reason": None,
+            },
+        ]
+    }
+
+
+def _evaluation(i):
+    return {
+        "result": {
+            "score": i / 10,
+            "confidence": 0.5,
+            "reason": REASON,
+            "success": i >= 5,
+        }
+    }
+
+
+def _deep_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, list):
+        size += sum(_deep_size(v) for v in value)
+    return size
+
+
+@pytest.mark.parametrize("format", ["npz", "parquet"])
+def test_round_trip(tmp_path, format):
+    """Written tables decode to the original values"""
+    if format == "parquet":
+        pytest.importorskip("pyarrow")
+    sink = ResultSink(format=format, keep_reasons=True)
+    sink.update(
+        [_extraction(i) for i in range(6)], keys=[f"call-{i}" for i in range(6)]
+    )
+    sink.update([_evaluation(i) for i in range(3)], assertion="greeting")
+    sink.write(str(tmp_path / "results"))
+
+    tables = read_tables(str(tmp_path / "results"))
+    fields = tables["fields"]
+    assert fields["key"].tolist()[:4] == ["call-0", "call-0", "call-1", "call-1"]
+    assert fields["field"].tolist()[:2] == ["agent_name", "resolved"]
+    assert [json.loads(v) for v in fields["value"][:4]] == [
+        "Agent 0",
+        None,
+        "Agent 1",
+        True,
+    ]
+    assert fields["confidence"].dtype == np.float32
+    assert fields["reason"].tolist()[:2] == [REASON, None]
+
+    assertions = tables["assertions"]
+    assert assertions["key"].tolist() == ["6", "7", "8"]
+    assert assertions["assertion"].tolist() == ["greeting"] * 3
+    np.testing.assert_allclose(assertions["score"], [0.0, 0.1, 0.2], rtol=1e-6)
+    assert assertions["success"].tolist() == [False, False, False]
+
+
+def test_flush_parts(tmp_path):
+    """Records flush to numbered parts that read back as one table"""
+    with ResultSink(directory=str(tmp_path), flush_records=5, format="npz") as sink:
+        sink.update(_extraction(i) for i in range(8))
+    assert len(sink.parts) == 3
+    assert len(sink) == 0
+
+    fields = read_tables(str(tmp_path))["fields"]
+    assert fields["key"].tolist() == [str(i) for i in range(8) for _ in range(2)]
+    assert "reason" not in fields
+
+
+def test_npz_strings_are_not_padded(tmp_path):
+    """Interned strings and reasons are stored as UTF-8 bytes plus offsets"""
+    sink = ResultSink(format="npz", keep_reasons=True)
+    long_reason = "x" * 10_000
+    for reason in (long_reason, "", "café", None):
+        sink.add(
+            {
+                "fields": [
+                    {
+                        "field_name": "agent_name",
+                        "field_value": "Zoë",
+                        "field_confidence": 0.5,
+                        "field_reason": reason,
+                    }
+                ]
+            }
+        )
+    (path,) = sink.write(str(tmp_path / "results"))
+
+    with np.load(path) as archive:
+        assert archive["fields/reason.values"].dtype == np.uint8
+        assert archive["fields/reason.values"].nbytes < 10_100
+        assert archive["fields/reason"].tolist() == [0, 1, 2, -1]
+    fields = read_tables(str(tmp_path / "results"))["fields"]
+    assert fields["reason"].tolist() == [long_reason, "", "café", None]
+    assert fields["value"].tolist() == ['"Zo\\u00eb"'] * 4
+
+
+def test_memory_per_record():
+    """Buffers take an order of magnitude less memory than the dictionaries"""
+    results = [_extraction(i) for i in range(2000)]
+    sink = ResultSink().update(results)
+
+    assert sink.nbytes * 10 < sum(_deep_size(r) for r in results)
+
+
+def test_invalid_arguments():
+    """Unknown formats, directory-less flushes and unknown results are rejected"""
+    with pytest.raises(ValueError):
+        ResultSink(format="csv")
+    with pytest.raises(ValueError):
+        ResultSink(flush_records=10)
+    with pytest.raises(ValueError):
+        ResultSink().flush()
+    with pytest.raises(ValueError):
+        ResultSink().add({"messages": []})
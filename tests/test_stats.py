@@ -0,0 +1,116 @@
+"""
+Tests for streaming aggregate statistics
+"""
+
+import numpy as np
+import pytest
+
+from transtype.stats import Histogram, ResultAggregator
+
+
+def _extraction(value, confidence):
+    return {
+        "fields": [
+            {
+                "field_name": "agent_name",
+                "field_value": value,
+                "field_confidence": confidence,
+                "field_reason": None,
+            }
+        ]
+    }
+
+
+def _evaluation(score, confidence, threshold=0.5):
+    return {
+        "result": {
+            "score": score,
+            "confidence": confidence,
+            "reason": None,
+            "success": score >= threshold,
+        }
+    }
+
+
+def test_histogram_quantiles_track_exact_values():
+    """Interpolated quantiles are within one bin of the exact ones"""
+    values = np.random.RandomState(0).beta(5, 2, size=5000)
+    histogram = Histogram()
+    histogram.update(values)
+
+    assert histogram.count == 5000
+    assert histogram.mean == pytest.approx(values.mean())
+    for q in (0.1, 0.5, 0.9, 0.99):
+        assert histogram.quantile(q) == pytest.approx(np.quantile(values, q), abs=0.01)
+
+
+def test_histogram_add_matches_update():
+    """Single and bulk insertion bin values identically, including bounds"""
+    values = [0.0, 0.25, 0.999, 1.0, 1.5, -0.2]
+    one, bulk = Histogram(bins=4), Histogram(bins=4)
+    for value in values:
+        one.add(value)
+    bulk.update(values)
+
+    assert one.counts.tolist() == bulk.counts.tolist() == [2, 1, 0, 3]
+    assert (one.min, one.max) == (bulk.min, bulk.max) == (-0.2, 1.5)
+
+
+def test_aggregates_fields_and_assertions():
+    """Pass rates, NOT_FOUND and error rates are counted per name"""
+    aggregator = ResultAggregator()
+    aggregator.update(
+        [_extraction("Sarah", 0.9), _extraction(None, 0.1), _extraction(None, 0.0)]
+    )
+    aggregator.update(
+        [_evaluation(0.8, 0.9), _evaluation(0.2, 0.7), _evaluation(0.0, 0.0)],
+        assertion="greeting",
+    )
+    summary = aggregator.to_dict()
+
+    field = summary["fields"]["agent_name"]
+    assert (field["count"], field["not_found"], field["errors"]) == (3, 1, 1)
+    assert field["not_found_rate"] == pytest.approx(1 / 3, abs=1e-4)
+    assert field["confidence"]["mean"] == 0.9
+
+    assertion = summary["assertions"]["greeting"]
+    assert (assertion["count"], assertion["passed"], assertion["errors"]) == (3, 1, 1)
+    assert assertion["score"]["mean"] == 0.5
+
+    with pytest.raises(ValueError):
+        aggregator.add({"messages": []})
+
+
+def test_merge_equals_single_pass_and_round_trips_json():
+    """Per-worker aggregators merged via JSON equal one aggregator over all"""
+    rng = np.random.RandomState(1)
+    scores = rng.uniform(size=300).round(3)
+    results = [_evaluation(score, 0.8) for score in scores]
+    whole = ResultAggregator().update(results)
+
+    parts = [ResultAggregator().update(results[i::3]) for i in range(3)]
+    merged = ResultAggregator.from_json(parts[0].to_json())
+    for part in parts[1:]:
+        merged.merge(ResultAggregator.from_json(part.to_json()))
+
+    expected = whole.to_dict()["assertions"]["default"]
+    actual = merged.to_dict()["assertions"]["default"]
+    assert actual["passed"] == expected["passed"] == sum(s >= 0.5 for s in scores)
+    assert actual["score"]["counts"] == expected["score"]["counts"]
+    for key in ("mean", "p50", "p90", "p99", "min", "max"):
+        assert actual["score"][key] == pytest.approx(expected["score"][key])
+    with pytest.raises(ValueError):
+        merged.merge(ResultAggregator(bins=10).update(results[:1]))
+
+
+def test_merge_rejects_other_bins_for_new_names():
+    """Fields and assertion sets new to the aggregator are checked too"""
+    aggregator = ResultAggregator().update([_evaluation(0.9, 0.8)])
+    coarse = ResultAggregator(bins=10)
+    coarse.add(_extraction("Sarah", 0.9))
+    coarse.add(_evaluation(0.9, 0.8), assertion="greeting")
+
+    with pytest.raises(ValueError, match="different bins"):
+        aggregator.merge(coarse)
+    assert not aggregator.fields
+    assert set(aggregator.assertions) == {"default"}
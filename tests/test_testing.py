@@ -0,0 +1,133 @@
+"""
+Tests for the offline stub LM and stub server
+"""
+
+import dspy
+import openai
+import pytest
+
+from transtype.testing import StubLM, StubResponder, StubServer, _tokenize
+
+
+def test_tokenize_round_trip():
+    """Pseudo-tokens concatenate back to the original text"""
+    text = '[[ ## score ## ]]\n7\n\n{"field_value": "Sarah Chen"}'
+    tokens = _tokenize(text)
+    assert "".join(tokens) == text
+    assert "7" in tokens
+
+
+def test_processor_with_stub_lm(stub_processor, sample_input_data):
+    """The real DSPy adapter path parses stub responses and logprobs"""
+    processor = stub_processor(values={"field_value": "Marcus"})
+
+    result = processor.process(sample_input_data)
+
+    field = result["fields"][0]
+    assert field["field_value"] == "Marcus"
+    assert 0.1 <= field["field_confidence"] <= 0.99
+    assert field["field_reason"]
+    assert processor.lm.calls == 1
+
+
+def test_evaluator_with_stub_lm(stub_evaluator, sample_input_data):
+    """Evaluator scores come from the stub's score field"""
+    evaluator = stub_evaluator(values={"score": 8})
+
+    result = evaluator.evaluate(sample_input_data)
+
+    assert result["result"]["score"] == 0.8
+    assert result["result"]["success"] is True
+
+
+def test_not_found_rate(stub_processor, sample_input_data):
+    """not_found_rate=1 always answers NOT_FOUND"""
+    processor = stub_processor(lm=StubLM(StubResponder(not_found_rate=1.0)))
+
+    field = processor.process(sample_input_data)["fields"][0]
+
+    assert field["field_value"] is None
+    assert field["field_confidence"] == 0.1
+
+
+def test_process_batch_preserves_order(stub_processor):
+    """Batch results come back in input order"""
+    names = [f"Agent {i}" for i in range(10)]
+    lm = StubLM(
+        StubResponder(
+            latency=0.01,
+            values={
+                "field_value": lambda messages: next(
+                    n for n in names if n + "." in messages[-1]["content"]
+                )
+            },
+        )
+    )
+    processor = stub_processor(lm=lm)
+    inputs = [
+        {"messages": [{"role": "assistant", "content": f"I am {name}."}]}
+        for name in names
+    ]
+
+    results = processor.process_batch(inputs, max_workers=4)
+
+    assert [r["fields"][0]["field_value"] for r in results] == names
+
+
+def test_process_batch_rejects_zero_workers(stub_processor):
+    """max_workers must be positive"""
+    processor = stub_processor()
+    with pytest.raises(ValueError):
+        processor.process_batch([], max_workers=0)
+
+
+def test_stub_server_through_litellm(stub_processor, sample_input_data):
+    """The HTTP stub serves OpenAI-shaped responses including logprobs"""
+    with StubServer(StubResponder(values={"field_value": "Marcus"})) as server:
+        lm = dspy.LM(
+            "openai/stub",
+            api_key="unused",
+            api_base=server.base_url,
+            logprobs=True,
+            cache=False,
+        )
+        processor = stub_processor(lm=lm)
+
+        field = processor.process(sample_input_data)["fields"][0]
+
+    assert field["field_value"] == "Marcus"
+    assert field["field_confidence"] != 0.5
+    assert server.calls == 1
+
+
+def test_rate_limit_injection(stub_processor, sample_input_data):
+    """Rejected requests raise 429 errors and surface as failed fields"""
+    responder = StubResponder(rate_limit=1.0)
+    processor = stub_processor(lm=StubLM(responder))
+
+    field = processor.process(sample_input_data)["fields"][0]
+
+    assert field["field_confidence"] == 0.0
+    assert responder.rate_limited == 1 and responder.in_flight == 0
+
+
+def test_max_in_flight_rejects_excess_requests(stub_processor, sample_input_data):
+    """Requests beyond the in-flight limit are rejected while others are served"""
+    responder = StubResponder(latency=0.2, max_in_flight=2)
+    processor = stub_processor(lm=StubLM(responder))
+
+    results = processor.process_batch([sample_input_data] * 4, max_workers=4)
+
+    failed = [r for r in results if r["fields"][0]["field_confidence"] == 0.0]
+    assert len(failed) == responder.rate_limited == 2
+
+
+def test_stub_server_returns_429():
+    """The HTTP stub answers rejected requests with status 429"""
+    with StubServer(StubResponder(rate_limit=1.0)) as server:
+        client = openai.OpenAI(api_key="unused", base_url=server.base_url)
+        with pytest.raises(openai.RateLimitError):
+            client.with_options(max_retries=0).chat.completions.create(
+                model="stub", messages=[{"role": "user", "content": "Hi"}]
+            )
+    assert server.calls == 0
@@ -0,0 +1,96 @@
+"""
+DSPy adapter for provider-native structured output
+
+The default ChatAdapter asks the model to write ``[[ ## field ## ]]`` markers
+and parses them back out of free text. StructuredOutputAdapter instead sends
+the signature's output fields as a strict JSON schema ``response_format`` so
+the provider guarantees a parseable object, and keeps the response logprobs
+attached to each completion.
+"""
+
+import json
+from typing import Any, Dict, List
+
+import dspy
+from dspy.adapters.utils import parse_value
+from pydantic import TypeAdapter
+
+
+def signature_response_format(signature: Any) -> Dict[str, Any]:
+    """
+    Build an OpenAI ``json_schema`` response format for a signature's outputs
+
+    Args:
+        signature: DSPy signature class
+
+    Returns:
+        response_format dictionary with a strict schema of the output fields
+    """
+    properties = {}
+    for name, field in signature.output_fields.items():
+        schema = TypeAdapter(field.annotation).json_schema()
+        schema.pop("title", None)
+        desc = (field.json_schema_extra or {}).get("desc")
+        if desc:
+            schema["description"] = desc
+        properties[name] = schema
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": signature.__name__,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+class StructuredOutputAdapter(dspy.JSONAdapter):
+    """JSON adapter that requests schema-constrained output and keeps logprobs"""
+
+    def __init__(self):
+        super().__init__()
+        self._response_formats: Dict[Any, Dict[str, Any]] = {}
+
+    def _response_format(self, signature: Any) -> Dict[str, Any]:
+        """Return the cached response format for a signature"""
+        if signature not in self._response_formats:
+            self._response_formats[signature] = signature_response_format(signature)
+        return self._response_formats[signature]
+
+    def __call__(self, lm, lm_kwargs, signature, demos, inputs) -> List[Dict]:
+        messages = self.format(signature, demos, inputs)
+        outputs = lm(
+            messages=messages,
+            **lm_kwargs,
+            response_format=self._response_format(signature),
+        )
+
+        values = []
+        for output in outputs:
+            logprobs = None
+            if isinstance(output, dict):
+                output, logprobs = output["text"], output["logprobs"]
+
+            value = self.parse(signature, output)
+            if logprobs is not None:
+                value["logprobs"] = logprobs
+            values.append(value)
+        return values
+
+    def parse(self, signature, completion: str) -> Dict[str, Any]:
+        """Parse a schema-constrained completion without repair heuristics"""
+        fields = json.loads(completion)
+        if not isinstance(fields, dict) or set(fields) != set(signature.output_fields):
+            raise ValueError(
+                f"Expected output fields {list(signature.output_fields)}, "
+                f"got {completion[:200]!r}"
+            )
+        return {
+            name: parse_value(fields[name], field.annotation)
+            for name, field in signature.output_fields.items()
+        }
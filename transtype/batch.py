@@ -0,0 +1,532 @@
+"""
+Batch API submission for non-urgent bulk extraction and evaluation
+
+A corpus of process()/evaluate() jobs is turned into one request line per
+field extraction or evaluation, in the JSONL format of the OpenAI Batch API.
+The file is submitted and polled through a pluggable BatchTransport, and the
+output file is parsed back into TranscriptOutput/AssertionOutput dictionaries
+per transcript with the same voting, typed-value and logprob confidence code
+as the real-time path.
+
+Prompts are rendered with DirectPredictor templates, so compiled programs and
+both backends are supported. Relevant-turn context and near-duplicate reuse
+apply to real-time calls only; batch requests always send the full transcript.
+"""
+
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .direct import DirectPredictor
+from .models import AssertionInput, TranscriptInput, TranscriptOutput
+from .processor import AssertsEvaluator, TranscriptProcessor, _map_concurrent
+from .readers import _loads
+from .scoring import batch_confidence, batch_weighted_scores
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batch statuses after which no more results will be produced
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# dspy.LM parameters that are part of the request body
+_BODY_LM_KWARGS = ("temperature", "max_tokens", "top_logprobs")
+
+
+class BatchError(RuntimeError):
+    """Raised when a batch fails as a whole or does not finish in time"""
+
+
+class BatchTransport(ABC):
+    """
+    Submits a batch request file and retrieves its output
+
+    Subclasses must implement submit(), status() and output(); see
+    OpenAIBatchTransport for the provider Batch API and LocalBatchTransport
+    for running the same file against any OpenAI-compatible server.
+    """
+
+    @abstractmethod
+    def submit(self, requests: bytes) -> str:
+        """Upload a JSONL request file and start the batch; returns its id"""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Current status of a batch, e.g. "in_progress" or "completed" """
+
+    @abstractmethod
+    def output(self, batch_id: str) -> bytes:
+        """JSONL output of a finished batch, including per-request errors"""
+
+
+class OpenAIBatchTransport(BatchTransport):
+    """BatchTransport for the OpenAI Batch API (files + batches endpoints)"""
+
+    def __init__(self, client: Any, completion_window: str = "24h"):
+        """
+        Initialize the transport
+
+        Args:
+            client: openai.OpenAI client
+            completion_window: Time frame the batch must complete in
+                (default: 24h)
+        """
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, requests: bytes) -> str:
+        input_file = self.client.files.create(
+            file=("batch.jsonl", requests), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def output(self, batch_id: str) -> bytes:
+        batch = self.client.batches.retrieve(batch_id)
+        parts = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                parts.append(self.client.files.content(file_id).content)
+        return b"\n".join(part.rstrip(b"\n") for part in parts)
+
+
+class LocalBatchTransport(BatchTransport):
+    """
+    Runs a batch request file synchronously against an OpenAI-compatible client
+
+    Useful as a stand-in for the Batch API in tests, or for local servers
+    without a batch endpoint. Requests are sent when the batch is submitted.
+    """
+
+    def __init__(self, client: Any, max_workers: int = 8):
+        """
+        Initialize the transport
+
+        Args:
+            client: OpenAI-compatible client (e.g. openai.OpenAI(base_url=...))
+            max_workers: Number of requests sent in parallel (default: 8)
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self._outputs: Dict[str, bytes] = {}
+
+    def _send(self, line: Dict[str, Any]) -> Dict[str, Any]:
+        custom_id = line["custom_id"]
+        try:
+            response = self.client.chat.completions.create(**line["body"])
+        except Exception as e:
+            return {
+                "custom_id": custom_id,
+                "response": None,
+                "error": {"message": str(e)},
+            }
+        return {
+            "custom_id": custom_id,
+            "response": {"status_code": 200, "body": response.model_dump(mode="json")},
+            "error": None,
+        }
+
+    def submit(self, requests: bytes) -> str:
+        lines = [_loads(line) for line in requests.splitlines() if line.strip()]
+        results = _map_concurrent(self._send, lines, self.max_workers)
+        batch_id = f"local_batch_{len(self._outputs)}"
+        self._outputs[batch_id] = b"".join(
+            json.dumps(result).encode("utf-8") + b"\n" for result in results
+        )
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        if batch_id not in self._outputs:
+            raise BatchError(f"Unknown batch: {batch_id}")
+        return "completed"
+
+    def output(self, batch_id: str) -> bytes:
+        return self._outputs[batch_id]
+
+
+def _direct_predictor(predictor: Any, lm: Any, adapter: Any) -> DirectPredictor:
+    """Return a DirectPredictor rendering the same prompt as a predictor"""
+    if isinstance(predictor, DirectPredictor):
+        return predictor
+    lm_kwargs = getattr(lm, "kwargs", {})
+    direct = DirectPredictor(
+        predictor.signature,
+        client=None,
+        model=lm.model.split("/", 1)[-1],
+        adapter=adapter,
+        **{key: lm_kwargs[key] for key in _BODY_LM_KWARGS if key in lm_kwargs},
+        **predictor.config,
+    )
+    return direct.load_state(predictor.dump_state())
+
+
+def _request_line(custom_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": body,
+    }
+
+
+def process_requests(
+    processor: TranscriptProcessor, inputs: Iterable[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Build one batch request line per field of every transcript
+
+    Args:
+        processor: Processor whose fields, prompts and sampling are used
+        inputs: Dictionaries containing messages
+
+    Returns:
+        Request lines; custom ids are "<transcript index>:<field index>"
+
+    Raises:
+        ValueError: If an input is not a valid transcript
+    """
+    predictors = {}
+    lines = []
+    for i, input_data in enumerate(inputs):
+        try:
+            validated_input = TranscriptInput(**input_data)
+        except Exception as e:
+            raise ValueError(f"Invalid input format: {str(e)}")
+        transcript = processor._format_transcript(
+            [msg.model_dump() for msg in validated_input.messages]
+        )
+        for j, field_def in enumerate(processor.fields):
+            name = field_def["field_name"]
+            if name not in predictors:
+                predictors[name] = _direct_predictor(
+                    processor._field_predictor(field_def),
+                    processor.lm,
+                    processor.adapter,
+                )
+            body = predictors[name].request(
+                processor.num_samples,
+                **processor._field_inputs(transcript, field_def),
+            )
+            lines.append(_request_line(f"{i}:{j}", body))
+    return lines
+
+
+def evaluate_requests(
+    evaluator: AssertsEvaluator, inputs: Iterable[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Build one batch request line per transcript
+
+    Args:
+        evaluator: Evaluator whose steps, prompt and sampling are used
+        inputs: Dictionaries containing messages
+
+    Returns:
+        Request lines; custom ids are the transcript indices
+
+    Raises:
+        ValueError: If an input is not a valid transcript
+    """
+    predictor = _direct_predictor(evaluator.evaluator, evaluator.lm, evaluator.adapter)
+    evaluation_steps = evaluator._format_evaluation_steps()
+    lines = []
+    for i, input_data in enumerate(inputs):
+        messages = evaluator._normalize_messages(input_data.get("messages", []))
+        try:
+            validated_input = AssertionInput(**{**input_data, "messages": messages})
+        except Exception as e:
+            raise ValueError(f"Invalid input format: {str(e)}")
+        transcript = evaluator._format_transcript(
+            [msg.model_dump() for msg in validated_input.messages]
+        )
+        body = predictor.request(
+            evaluator.num_samples,
+            transcript=transcript,
+            evaluation_steps=evaluation_steps,
+        )
+        lines.append(_request_line(str(i), body))
+    return lines
+
+
+def dump_requests(lines: List[Dict[str, Any]]) -> bytes:
+    """Serialize request lines to a JSONL batch file"""
+    return b"".join(json.dumps(line).encode("utf-8") + b"\n" for line in lines)
+
+
+def load_requests(data: Union[bytes, str]) -> List[Dict[str, Any]]:
+    """Parse a JSONL batch file written by dump_requests()"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return [_loads(line) for line in data.splitlines() if line.strip()]
+
+
+def read_output(data: Union[bytes, str]) -> Dict[str, Union[List[Any], Exception]]:
+    """
+    Index a batch output file by custom id
+
+    Args:
+        data: JSONL output (and error) file content
+
+    Returns:
+        The choices of each successful request, or the error of a failed one
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    results: Dict[str, Union[List[Any], Exception]] = {}
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        record = _loads(line)
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or body.get("error") or {}
+            message = error.get("message") if isinstance(error, dict) else error
+            results[record["custom_id"]] = RuntimeError(
+                message or f"Batch request failed with {response.get('status_code')}"
+            )
+        else:
+            results[record["custom_id"]] = body.get("choices") or []
+    return results
+
+
+def _samples(
+    predictor: DirectPredictor,
+    results: Dict[str, Union[List[Any], Exception]],
+    custom_id: str,
+) -> List[Any]:
+    """
+    Parse the completions of one request
+
+    Raises:
+        RuntimeError: If the request failed or has no result
+        ValueError: If no completion contains the output fields
+    """
+    choices = results.get(custom_id)
+    if choices is None:
+        raise RuntimeError(f"No result for batch request {custom_id}")
+    if isinstance(choices, Exception):
+        raise choices
+    return predictor.parse_choices(choices)
+
+
+def process_results(
+    processor: TranscriptProcessor,
+    requests: List[Dict[str, Any]],
+    output: Union[bytes, str],
+) -> List[Dict[str, Any]]:
+    """
+    Rebuild the process() result of every transcript from a batch output
+
+    Args:
+        processor: Processor that built the requests
+        requests: Request lines from process_requests()
+        output: Batch output file content
+
+    Returns:
+        Extraction results, in the order of the original inputs
+    """
+    results = read_output(output)
+    predictors = {
+        field_def["field_name"]: _direct_predictor(
+            processor._field_predictor(field_def), processor.lm, processor.adapter
+        )
+        for field_def in processor.fields
+    }
+    count = 1 + max(
+        (int(line["custom_id"].split(":")[0]) for line in requests), default=-1
+    )
+
+    # Read every completion first so that all token-average confidences are
+    # computed in a single vectorized pass
+    fields = processor.fields
+    read: List[Union[List[Any], Exception]] = []  # per transcript, then field
+    pending: List[Tuple[List[Any], int, Any]] = []
+    for i in range(count):
+        for j, field_def in enumerate(fields):
+            try:
+                samples = _samples(
+                    predictors[field_def["field_name"]], results, f"{i}:{j}"
+                )
+            except Exception as e:
+                read.append(e)
+                continue
+            item: List[Any] = []
+            for sample in samples:
+                try:
+                    value, confidence, logprobs, reasoning = (
+                        processor._read_field_value(sample, field_def)
+                    )
+                except Exception as e:
+                    item.append(e)
+                    continue
+                if confidence is None:
+                    pending.append((item, len(item), logprobs))
+                item.append((value, confidence, reasoning))
+            read.append(item)
+    confidences = batch_confidence([logprobs for _, _, logprobs in pending])
+    for (item, k, _), confidence in zip(pending, confidences):
+        value, _, reasoning = item[k]
+        item[k] = (value, float(confidence), reasoning)
+
+    outputs = []
+    for i in range(count):
+        field_results = []
+        for j, field_def in enumerate(fields):
+            item = read[i * len(fields) + j]
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                field_results.append(processor._field_result_from_read(item, field_def))
+            except Exception as e:
+                field_results.append(processor._field_error(e, field_def))
+        outputs.append(TranscriptOutput(fields=field_results).model_dump(mode="json"))
+    return outputs
+
+
+def evaluate_results(
+    evaluator: AssertsEvaluator,
+    requests: List[Dict[str, Any]],
+    output: Union[bytes, str],
+) -> List[Dict[str, Any]]:
+    """
+    Rebuild the evaluate() result of every transcript from a batch output
+
+    Args:
+        evaluator: Evaluator that built the requests
+        requests: Request lines from evaluate_requests()
+        output: Batch output file content
+
+    Returns:
+        Evaluation results, in the order of the original inputs
+    """
+    results = read_output(output)
+    predictor = _direct_predictor(evaluator.evaluator, evaluator.lm, evaluator.adapter)
+
+    # Read every completion first so that all weighted scores are computed
+    # in a single vectorized pass
+    read: List[Union[List[Tuple[Any, Any, Optional[str]]], Exception]] = []
+    for line in requests:
+        try:
+            samples = _samples(predictor, results, line["custom_id"])
+            read_samples = [evaluator._read_score_sample(r) for r in samples]
+            for raw_score, _, _ in read_samples:
+                float(raw_score)
+            read.append(read_samples)
+        except Exception as e:
+            read.append(e)
+    flat = [sample for item in read if isinstance(item, list) for sample in item]
+    scores, confidences = batch_weighted_scores(
+        [raw_score for raw_score, _, _ in flat], [logprobs for _, logprobs, _ in flat]
+    )
+
+    outputs = []
+    position = 0
+    for item in read:
+        if isinstance(item, Exception):
+            assertion_output = evaluator._assertion_error(item)
+        else:
+            scored = [
+                (float(scores[position + k]), float(confidences[position + k]), reason)
+                for k, (_, _, reason) in enumerate(item)
+            ]
+            position += len(item)
+            try:
+                assertion_output = evaluator._assertion_from_scores(scored)
+            except Exception as e:
+                assertion_output = evaluator._assertion_error(e)
+        outputs.append(assertion_output.model_dump())
+    return outputs
+
+
+class BatchRunner:
+    """
+    Submit extraction or evaluation jobs as a batch and wait for the results
+
+    Example:
+        runner = BatchRunner(OpenAIBatchTransport(openai.OpenAI()))
+        results = runner.process(processor, transcripts)
+        results = runner.evaluate(evaluator, transcripts)
+    """
+
+    def __init__(
+        self,
+        transport: BatchTransport,
+        poll_interval: float = 60.0,
+        timeout: Optional[float] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the runner
+
+        Args:
+            transport: Transport submitting and polling the batch
+            poll_interval: Seconds between status checks (default: 60)
+            timeout: Seconds to wait for the batch before giving up
+                (default: None, wait until it finishes)
+            sleep: Function used to wait between status checks
+        """
+        self.transport = transport
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.sleep = sleep
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        """Submit request lines; returns the batch id"""
+        return self.transport.submit(dump_requests(requests))
+
+    def wait(self, batch_id: str) -> bytes:
+        """
+        Poll a batch until it finishes and return its output
+
+        Expired and cancelled batches return their partial output; requests
+        without a result are reported as errors by process_results() and
+        evaluate_results().
+
+        Raises:
+            BatchError: If the batch failed or did not finish within timeout
+        """
+        started = time.monotonic()
+        while True:
+            status = self.transport.status(batch_id)
+            if status in TERMINAL_STATUSES:
+                break
+            if self.timeout is not None and time.monotonic() - started > self.timeout:
+                raise BatchError(f"Batch {batch_id} still {status} after timeout")
+            self.sleep(self.poll_interval)
+        if status == "failed":
+            raise BatchError(f"Batch {batch_id} failed")
+        return self.transport.output(batch_id)
+
+    def process(
+        self, processor: TranscriptProcessor, inputs: Iterable[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract the processor's fields from every transcript in one batch
+
+        Returns:
+            Extraction results, in the same order as inputs
+        """
+        requests = process_requests(processor, inputs)
+        output = self.wait(self.submit(requests))
+        return process_results(processor, requests, output)
+
+    def evaluate(
+        self, evaluator: AssertsEvaluator, inputs: Iterable[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate every transcript in one batch
+
+        Returns:
+            Evaluation results, in the same order as inputs
+        """
+        requests = evaluate_requests(evaluator, inputs)
+        output = self.wait(self.submit(requests))
+        return evaluate_results(evaluator, requests, output)
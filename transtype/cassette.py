@@ -0,0 +1,303 @@
+"""
+Record/replay of LM traffic for deterministic offline runs
+
+A cassette is a single append-only file of LM responses keyed by a hash of the
+request. Recording wraps a live DSPy LM and stores every response, including
+logprobs and top_logprobs; replaying serves the stored responses from a
+memory-mapped file without touching the network, so confidence calculation and
+scoring changes can be re-run over recorded traffic.
+
+File layout: an 8-byte magic header followed by records of
+``sha256 digest (32 bytes) | payload length (uint32, little endian) | payload``
+where the payload is zlib-compressed JSON. The index is rebuilt on open by
+walking the record headers; later records win over earlier ones.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import dspy
+from openai.types.chat.chat_completion import ChoiceLogprobs
+
+MAGIC = b"TTCASS01"
+_RECORD_HEADER = struct.Struct("<32sI")
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+def request_key(model: str, messages: List[Dict[str, Any]], **kwargs) -> bytes:
+    """
+    Compute the cassette key of an LM request
+
+    Args:
+        model: Model identifier of the LM
+        messages: Chat messages sent to the model
+        **kwargs: Request parameters; credentials (api_*) are ignored
+
+    Returns:
+        32-byte sha256 digest identifying the request
+    """
+    params = {}
+    for name, value in kwargs.items():
+        if name.startswith("api_"):
+            continue
+        if isinstance(value, type) and hasattr(value, "model_json_schema"):
+            value = value.model_json_schema()
+        params[name] = value
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).digest()
+
+
+class Cassette:
+    """Indexed, append-only file of recorded LM outputs"""
+
+    def __init__(self, path: str, writable: bool = False):
+        """
+        Open a cassette file
+
+        Args:
+            path: Location of the cassette file
+            writable: Open for appending, creating the file if needed (default: False)
+        """
+        self.path = path
+        self.writable = writable
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._decoded: Dict[bytes, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._writer = None
+
+        if writable and not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+        elif not os.path.exists(path):
+            raise FileNotFoundError(f"Cassette not found: {path}")
+
+        self._build_index()
+        if writable:
+            self._writer = open(path, "ab")
+
+    def _build_index(self) -> None:
+        """
+        Scan record headers and map each key to its payload location
+
+        A partially written last record (e.g. from an interrupted recording)
+        is left out of the index, and truncated away in writable mode so that
+        new records append after the last complete one.
+        """
+        size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a transtype cassette: {self.path}")
+            end = len(MAGIC)
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                key, length = _RECORD_HEADER.unpack(header)
+                offset = end + _RECORD_HEADER.size
+                if offset + length > size:
+                    break  # partially written last record
+                self._index[key] = (offset, length)
+                end = offset + length
+                f.seek(end)
+
+        if self.writable and end < size:
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+
+        if not self.writable and os.path.getsize(self.path) > len(MAGIC):
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._index
+
+    def get(self, key: bytes) -> List[Dict[str, Any]]:
+        """
+        Return the recorded outputs for a key
+
+        Args:
+            key: Request key from request_key()
+
+        Returns:
+            List of outputs, each a dict with "text" and "logprobs" entries
+        """
+        outputs = self._decoded.get(key)
+        if outputs is not None:
+            return outputs
+        if key not in self._index:
+            raise CassetteMissError(f"No recorded response for key {key.hex()}")
+
+        offset, length = self._index[key]
+        end = offset + length
+        if self._mmap is not None:
+            payload = self._mmap[offset:end]
+        else:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                payload = f.read(length)
+        outputs = json.loads(zlib.decompress(payload))["outputs"]
+        self._decoded[key] = outputs
+        return outputs
+
+    def put(self, key: bytes, outputs: List[Dict[str, Any]]) -> None:
+        """
+        Append the outputs of one request to the cassette
+
+        Args:
+            key: Request key from request_key()
+            outputs: List of dicts with "text" and JSON-serializable "logprobs"
+        """
+        if not self.writable:
+            raise ValueError("Cassette was opened read-only")
+        payload = zlib.compress(
+            json.dumps({"outputs": outputs}, separators=(",", ":")).encode("utf-8")
+        )
+        with self._lock:
+            self._writer.write(_RECORD_HEADER.pack(key, len(payload)))
+            offset = self._writer.tell()
+            self._writer.write(payload)
+            self._writer.flush()
+            self._index[key] = (offset, len(payload))
+            self._decoded[key] = outputs
+
+    def close(self) -> None:
+        """Release the file handles held by the cassette"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _serialize_logprobs(logprobs: Any) -> Optional[Dict[str, Any]]:
+    """Convert a response's logprobs object into plain JSON data"""
+    if logprobs is None:
+        return None
+    if hasattr(logprobs, "model_dump"):
+        return logprobs.model_dump()
+    return dict(logprobs)
+
+
+class CassetteLM(dspy.LM):
+    """
+    DSPy LM that records responses of a live LM or replays them from a cassette
+
+    Example:
+        live = dspy.LM("openai/gpt-4o", api_key=key, logprobs=True)
+        with CassetteLM("traffic.cassette", mode="record", lm=live) as recorder:
+            ...
+        replayer = CassetteLM("traffic.cassette", mode="replay", lm=live)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        lm: Optional[dspy.LM] = None,
+        model: Optional[str] = None,
+    ):
+        """
+        Initialize the cassette LM
+
+        Args:
+            path: Location of the cassette file
+            mode: "record" to call lm and store responses, "replay" to serve them
+            lm: Live LM; required for recording, and supplies model and request
+                defaults when replaying
+            model: Model identifier used for keys when replaying without lm
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"mode must be one of {CASSETTE_MODES}, got {mode!r}")
+        if mode == "record" and lm is None:
+            raise ValueError("Recording requires a live lm")
+        if lm is None and model is None:
+            raise ValueError("Replaying requires either lm or model")
+
+        super().__init__(lm.model if lm is not None else model, cache=False)
+        if lm is not None:
+            self.kwargs = dict(lm.kwargs)
+        else:
+            self.kwargs["logprobs"] = True
+        self.inner = lm
+        self.mode = mode
+        self.cassette = Cassette(path, writable=mode == "record")
+        self._replayed: Dict[Tuple[bytes, bool], List[Any]] = {}
+
+    def close(self) -> None:
+        """Release the file handles held by the cassette"""
+        self.cassette.close()
+
+    def __enter__(self) -> "CassetteLM":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        messages = messages or [{"role": "user", "content": prompt}]
+        request = {**self.kwargs, **kwargs}
+        key = request_key(self.model, messages, **request)
+
+        if self.mode == "replay":
+            replayed = self._replayed.get((key, bool(request.get("logprobs"))))
+            if replayed is not None:
+                return replayed
+            outputs = self.cassette.get(key)
+        else:
+            live_outputs = self.inner(messages=messages, **kwargs)
+            outputs = [
+                (
+                    {
+                        "text": output["text"],
+                        "logprobs": _serialize_logprobs(output["logprobs"]),
+                    }
+                    if isinstance(output, dict)
+                    else {"text": output, "logprobs": None}
+                )
+                for output in live_outputs
+            ]
+            self.cassette.put(key, outputs)
+
+        if not request.get("logprobs"):
+            result = [output["text"] for output in outputs]
+        else:
+            result = [
+                {
+                    "text": output["text"],
+                    "logprobs": (
+                        ChoiceLogprobs.model_validate(output["logprobs"])
+                        if output["logprobs"] is not None
+                        else None
+                    ),
+                }
+                for output in outputs
+            ]
+        if self.mode == "replay":
+            self._replayed[(key, bool(request.get("logprobs")))] = result
+        return result
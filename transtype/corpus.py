@@ -0,0 +1,333 @@
+"""
+Memory-mapped transcript corpus with random access by call ID
+
+A corpus is an append-only data file of normalized message lists plus a
+sidecar offset index, so batch jobs can look up, sample and shard
+transcripts of a large corpus without re-scanning JSONL or loading it into
+memory. Lookups decode straight from a read-only memory map and return
+input dictionaries that can be passed to process()/evaluate(),
+process_batch()/iter_process() and the batch runners.
+
+Data file layout: an 8-byte magic header followed by records of
+``id length (uint16) | payload length (uint32) | call ID (utf-8) | payload``
+where the payload is compact JSON of the role/content message list. The
+index file (``<path>.idx``) holds an 8-byte magic header and entries of
+``payload offset (uint64) | payload length (uint32) | id length (uint16) |
+call ID``. Records written after the last index entry (e.g. after a crash)
+are recovered from the data file on open.
+"""
+
+import json
+import mmap
+import os
+import random
+import struct
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .readers import normalize_message
+
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+    def _dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+MAGIC = b"TTCORP01"
+INDEX_MAGIC = b"TTCIDX01"
+_RECORD_HEADER = struct.Struct("<HI")
+_INDEX_ENTRY = struct.Struct("<QIH")
+
+
+def _loads(payload: memoryview) -> Any:
+    """Decode a payload view; orjson reads it without copying"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(bytes(payload))
+
+
+class CorpusStore:
+    """
+    Append-only transcript corpus indexed by call ID
+
+    Example:
+        with CorpusStore("calls.corpus", writable=True) as corpus:
+            corpus.extend(iter_jsonl("export.jsonl.gz"), id_key="call_id")
+
+        corpus = CorpusStore("calls.corpus")
+        result = processor.process(corpus["call-42"])
+        shard = corpus.shard(worker_index, worker_count)
+        results = processor.process_batch(corpus.transcripts(shard))
+    """
+
+    def __init__(self, path: str, writable: bool = False):
+        """
+        Open a corpus
+
+        Args:
+            path: Location of the data file; the index is kept at <path>.idx
+            writable: Open for appending, creating the files if needed
+                (default: False)
+
+        Raises:
+            FileNotFoundError: If a read-only corpus does not exist
+            ValueError: If a file is not a transtype corpus
+        """
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.writable = writable
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._ids: List[str] = []
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._file = None
+        self._index_file = None
+
+        if not os.path.exists(path):
+            if not writable:
+                raise FileNotFoundError(f"Corpus not found: {path}")
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+            with open(self.index_path, "wb") as f:
+                f.write(INDEX_MAGIC)
+
+        self._load_index()
+        if writable:
+            self._file = open(path, "r+b")
+            self._index_file = open(self.index_path, "ab")
+        elif os.path.getsize(path) > len(MAGIC):
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load_index(self) -> None:
+        """Read the sidecar index, then recover records it does not cover"""
+        end = len(MAGIC)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+            if not data.startswith(INDEX_MAGIC):
+                raise ValueError(f"Not a transtype corpus index: {self.index_path}")
+            position = len(INDEX_MAGIC)
+            while position + _INDEX_ENTRY.size <= len(data):
+                offset, length, id_length = _INDEX_ENTRY.unpack_from(data, position)
+                start = position + _INDEX_ENTRY.size
+                if start + id_length > len(data):
+                    break
+                position = start + id_length
+                call_id = data[start:position].decode("utf-8")
+                self._remember(call_id, offset, length)
+                end = max(end, offset + length)
+            if self.writable and position < len(data):
+                # Drop a partially written last entry before appending
+                with open(self.index_path, "r+b") as f:
+                    f.truncate(position)
+
+        recovered = []
+        size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a transtype corpus: {self.path}")
+            f.seek(end)
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                id_length, length = _RECORD_HEADER.unpack(header)
+                call_id = f.read(id_length)
+                offset = f.tell()
+                if len(call_id) < id_length or offset + length > size:
+                    break  # partially written last record
+                recovered.append((call_id.decode("utf-8"), offset, length))
+                end = offset + length
+                f.seek(end)
+
+        for call_id, offset, length in recovered:
+            self._remember(call_id, offset, length)
+        if self.writable and not os.path.exists(self.index_path):
+            with open(self.index_path, "wb") as f:
+                f.write(INDEX_MAGIC)
+        if recovered and self.writable:
+            with open(self.index_path, "ab") as f:
+                for call_id, offset, length in recovered:
+                    f.write(self._index_entry(call_id, offset, length))
+        self._end = end
+
+    def _remember(self, call_id: str, offset: int, length: int) -> None:
+        if call_id not in self._index:
+            self._ids.append(call_id)
+        self._index[call_id] = (offset, length)
+
+    @staticmethod
+    def _index_entry(call_id: str, offset: int, length: int) -> bytes:
+        encoded = call_id.encode("utf-8")
+        return _INDEX_ENTRY.pack(offset, length, len(encoded)) + encoded
+
+    def add(self, call_id: str, transcript: Any) -> None:
+        """
+        Append one transcript
+
+        Args:
+            call_id: Unique identifier of the transcript
+            transcript: Input dictionary with "messages", or a message list;
+                messages may use 'role'/'content' or 'speaker'/'text'
+
+        Raises:
+            ValueError: If the corpus is read-only, the call ID is already
+                stored or too long, or a message has an invalid format
+        """
+        if not self.writable:
+            raise ValueError("Corpus was opened read-only")
+        call_id = str(call_id)
+        encoded_id = call_id.encode("utf-8")
+        if len(encoded_id) > 0xFFFF:
+            raise ValueError("Call IDs must be at most 65535 bytes")
+        messages = (
+            transcript["messages"] if isinstance(transcript, dict) else transcript
+        )
+        payload = _dumps(
+            [
+                {"role": m["role"], "content": m["content"]}
+                for m in map(normalize_message, messages)
+            ]
+        )
+
+        with self._lock:
+            if call_id in self._index:
+                raise ValueError(f"Call ID already in corpus: {call_id}")
+            self._file.seek(self._end)
+            self._file.write(_RECORD_HEADER.pack(len(encoded_id), len(payload)))
+            self._file.write(encoded_id)
+            offset = self._file.tell()
+            self._file.write(payload)
+            self._file.flush()
+            self._index_file.write(self._index_entry(call_id, offset, len(payload)))
+            self._index_file.flush()
+            self._end = offset + len(payload)
+            self._remember(call_id, offset, len(payload))
+
+    def extend(self, inputs: Iterable[Dict[str, Any]], id_key: str = "call_id") -> int:
+        """
+        Append many input dictionaries, e.g. from transtype.readers
+
+        Args:
+            inputs: Dictionaries with "messages" and a call ID
+            id_key: Key holding the call ID (default: "call_id")
+
+        Returns:
+            Number of transcripts added
+
+        Raises:
+            ValueError: If an input has no call ID; see add()
+        """
+        count = 0
+        for record in inputs:
+            if record.get(id_key) is None:
+                raise ValueError(f"Input without {id_key!r}: cannot index it")
+            self.add(record[id_key], record)
+            count += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, call_id: str) -> bool:
+        return call_id in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    @property
+    def ids(self) -> List[str]:
+        """Call IDs in the order they were added"""
+        return list(self._ids)
+
+    def raw(self, call_id: str) -> memoryview:
+        """
+        Return the JSON payload of a transcript without decoding it
+
+        Raises:
+            KeyError: If the call ID is not in the corpus
+        """
+        offset, length = self._index[call_id]
+        end = offset + length
+        if self._mmap is not None:
+            return memoryview(self._mmap)[offset:end]
+        # Writable corpora share one handle with add(), which also seeks
+        with self._lock:
+            self._file.seek(offset)
+            return memoryview(self._file.read(length))
+
+    def __getitem__(self, call_id: str) -> Dict[str, Any]:
+        """
+        Return a fresh input dictionary for a transcript
+
+        Raises:
+            KeyError: If the call ID is not in the corpus
+        """
+        return {"messages": _loads(self.raw(call_id))}
+
+    def get(
+        self, call_id: str, default: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Input dictionary of a transcript, or default if it is not stored"""
+        return self[call_id] if call_id in self._index else default
+
+    def transcripts(
+        self, ids: Optional[Iterable[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield input dictionaries
+
+        Args:
+            ids: Call IDs to read, in order (default: the whole corpus)
+
+        Yields:
+            Input dictionaries with "messages", decoded one at a time
+        """
+        for call_id in self._ids if ids is None else ids:
+            yield self[call_id]
+
+    def shard(self, index: int, count: int) -> List[str]:
+        """
+        Call IDs of one shard
+
+        Shards are assigned by a hash of the call ID, so a transcript stays
+        in the same shard as the corpus grows.
+
+        Args:
+            index: Shard number, from 0 to count - 1
+            count: Total number of shards
+
+        Raises:
+            ValueError: If index is not in [0, count)
+        """
+        if not 0 <= index < count:
+            raise ValueError(f"Shard index must be in [0, {count}), got {index}")
+        return [
+            call_id
+            for call_id in self._ids
+            if zlib.crc32(call_id.encode("utf-8")) % count == index
+        ]
+
+    def sample(self, n: int, seed: Optional[int] = None) -> List[str]:
+        """Call IDs of n transcripts drawn without replacement"""
+        return random.Random(seed).sample(self._ids, min(n, len(self._ids)))
+
+    def close(self) -> None:
+        """Release the file handles held by the corpus"""
+        for handle in (self._file, self._index_file, self._mmap):
+            if handle is not None:
+                handle.close()
+        self._file = self._index_file = self._mmap = None
+
+    def __enter__(self) -> "CorpusStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,300 @@
+"""
+Near-duplicate transcript index for reusing results of templated calls
+
+NearDuplicateIndex stores a MinHash signature of each transcript's word
+shingles and finds candidates through LSH banding, so a lookup costs a few
+dictionary probes regardless of how many transcripts are indexed. Matches
+above the similarity threshold return the value stored with the earlier
+transcript (an evaluation result, or per-field extraction results).
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .retrieval import TurnIndex
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Universal hashing parameters: 32-bit shingle hashes, a Mersenne-like prime
+# just above 2**32 so a * x + b fits in uint64 without overflow
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+class DuplicateMatch(NamedTuple):
+    """A near-duplicate found by NearDuplicateIndex.query()"""
+
+    key: str
+    similarity: float
+    value: Any
+
+
+def _lsh_bands(
+    num_perm: int, threshold: float, recall: float = 0.95
+) -> Tuple[int, int]:
+    """
+    Choose LSH (bands, rows) for a similarity threshold
+
+    Picks the largest number of rows per band (fewest spurious candidates)
+    for which a pair exactly at the threshold still becomes a candidate with
+    the given probability; candidates are then verified on the full signature.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1.0 - (1.0 - threshold**rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over formatted transcripts
+
+    Example:
+        index = NearDuplicateIndex(threshold=0.9)
+        evaluator = AssertsEvaluator(api_key=key, evaluation_steps=steps,
+                                     dedup_index=index)
+        ...
+        index.save("evaluations.dedup.npz")
+
+    Use one index per processor/evaluator configuration: stored values are
+    only meaningful for the fields or evaluation steps that produced them.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ):
+        """
+        Initialize an empty index
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity of word shingles for
+                a match (default: 0.9)
+            num_perm: Number of MinHash permutations (default: 128)
+            shingle_size: Words per shingle (default: 3)
+            seed: Seed of the hash permutations; indexes are only comparable
+                with the same seed and num_perm (default: 1)
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = _lsh_bands(num_perm, threshold)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2**32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2**32, size=num_perm, dtype=np.uint64)
+
+        self._keys: List[str] = []
+        self._values: List[Any] = []
+        self._signatures: List[np.ndarray] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (uint32 array of num_perm values) of a text"""
+        words = _WORD_PATTERN.findall(text.lower())
+        size = self.shingle_size
+        # Overlapping word n-grams; texts shorter than n form a single shingle
+        shingles = {
+            " ".join(gram) for gram in zip(*(words[k:] for k in range(size)))
+        } or {" ".join(words)}
+        hashes = np.fromiter(
+            (
+                int.from_bytes(
+                    hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(),
+                    "little",
+                )
+                for s in shingles
+            ),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, self.rows)]
+
+    def _insert(self, key: str, value: Any, signature: np.ndarray) -> None:
+        position = len(self._keys)
+        self._keys.append(key)
+        self._values.append(value)
+        self._signatures.append(signature)
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band_key, []).append(position)
+
+    def add(self, text: str, value: Any, key: Optional[str] = None) -> None:
+        """
+        Index a transcript with the value to return for its near-duplicates
+
+        Args:
+            text: Formatted transcript
+            value: JSON-serializable value to store
+            key: Identifier of the transcript, e.g. a call id (default: a hash
+                of the text)
+        """
+        if key is None:
+            key = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+        signature = self.signature(text)
+        with self._lock:
+            self._insert(key, value, signature)
+
+    def query(self, text: str) -> Optional[DuplicateMatch]:
+        """
+        Find the most similar indexed transcript above the threshold; among
+        equally similar ones, the most recently added
+
+        Args:
+            text: Formatted transcript
+
+        Returns:
+            DuplicateMatch with the stored value, or None
+        """
+        signature = self.signature(text)
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(bucket.get(band_key, ()))
+
+            best = None
+            # Newest first, so that ties go to the most recently added entry
+            for position in sorted(candidates, reverse=True):
+                similarity = float(np.mean(self._signatures[position] == signature))
+                if similarity >= self.threshold and (
+                    best is None or similarity > best[1]
+                ):
+                    best = (position, similarity)
+            if best is None:
+                return None
+            self.hits += 1
+            position, similarity = best
+            return DuplicateMatch(
+                self._keys[position], similarity, self._values[position]
+            )
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups that found a near-duplicate"""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup counters and size of the index"""
+        return {
+            "entries": len(self),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Write the signatures and stored values to an .npz file
+
+        The values are stored as JSON alongside the keys, so the file holds
+        whatever the processor or evaluator stored: evaluation results, or
+        field results with digests of their definitions and evidence turns.
+        Transcript text itself is not stored, but extracted values (names,
+        dates) and reasons are.
+        """
+        with self._lock:
+            meta = {
+                "threshold": self.threshold,
+                "num_perm": self.num_perm,
+                "shingle_size": self.shingle_size,
+                "seed": self.seed,
+                "keys": self._keys,
+                "values": self._values,
+            }
+            signatures = (
+                np.stack(self._signatures)
+                if self._signatures
+                else np.empty((0, self.num_perm), dtype=np.uint32)
+            )
+        with open(os.fspath(path), "wb") as f:
+            np.savez_compressed(
+                f, signatures=signatures, meta=np.array(json.dumps(meta))
+            )
+
+    @classmethod
+    def load(cls, path: str, threshold: Optional[float] = None) -> "NearDuplicateIndex":
+        """
+        Read an index written by save()
+
+        Args:
+            path: File written by save()
+            threshold: Override the saved similarity threshold (optional)
+
+        Returns:
+            NearDuplicateIndex with the saved entries
+        """
+        with np.load(os.fspath(path)) as data:
+            meta = json.loads(str(data["meta"]))
+            signatures = data["signatures"]
+        index = cls(
+            threshold=meta["threshold"] if threshold is None else threshold,
+            num_perm=meta["num_perm"],
+            shingle_size=meta["shingle_size"],
+            seed=meta["seed"],
+        )
+        for key, value, signature in zip(meta["keys"], meta["values"], signatures):
+            index._insert(key, value, signature)
+        return index
+
+
+def text_digest(text: str) -> str:
+    """Short stable digest of a text, to compare texts without storing them"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def evidence_turns(
+    turns: List[str], value: Any, query: str, top_k: int = 3
+) -> List[str]:
+    """
+    Turns supporting a field value: those containing it, or else the turns
+    most relevant to the field's query
+
+    Args:
+        turns: Formatted transcript turns
+        value: Extracted field value (None when not found)
+        query: Retrieval query of the field
+        top_k: Relevant turns used when the value is not quoted verbatim
+
+    Returns:
+        Text of the evidence turns, in order
+    """
+    if value is not None:
+        needle = str(value).lower()
+        quoted = [turn for turn in turns if needle in turn.lower()]
+        if quoted:
+            return quoted
+    index = TurnIndex(turns)
+    return [turns[i] for i in index.select(query, top_k=top_k, window=0)]
+
+
+def evidence_digests(
+    turns: List[str], value: Any, query: str, top_k: int = 3
+) -> List[str]:
+    """Digests of the evidence turns of a field value; see evidence_turns()"""
+    return [text_digest(turn) for turn in evidence_turns(turns, value, query, top_k)]
@@ -0,0 +1,205 @@
+"""
+Direct OpenAI-client backend for the fixed processor signatures
+
+DirectPredictor renders a signature's prompt once into a template, fills it
+with plain string joins on every call and sends it straight to an
+OpenAI-compatible client. Parsing reuses the DSPy adapter of the output mode,
+so results match the DSPy backend while skipping dspy.Predict, the per-call
+prompt formatting and litellm routing.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import dspy
+
+from .adapters import StructuredOutputAdapter, signature_response_format
+from .logprobs import _get
+
+BACKENDS = ("dspy", "openai")
+
+# dspy.LM arguments that are also chat.completions.create parameters
+REQUEST_KWARGS = (
+    "max_tokens",
+    "max_completion_tokens",
+    "temperature",
+    "top_p",
+    "top_logprobs",
+    "seed",
+    "stop",
+    "presence_penalty",
+    "frequency_penalty",
+    "logit_bias",
+    "timeout",
+)
+
+_SENTINEL = "\x00"
+
+
+class DirectPrediction:
+    """Prediction returned by DirectPredictor: output fields plus logprobs"""
+
+    def __init__(self, fields: Dict[str, Any], logprobs: Any = None):
+        self.__dict__.update(fields)
+        self.logprobs = logprobs
+
+
+def _compile_template(content: str, names: List[str]) -> Tuple[List[str], List[str]]:
+    """Split a message rendered with sentinel inputs into literals and slots"""
+    parts = content.split(_SENTINEL)
+    literals, slots = parts[0::2], parts[1::2]
+    unknown = set(slots) - set(names)
+    if unknown:
+        raise ValueError(f"Unexpected template slots: {sorted(unknown)}")
+    return literals, slots
+
+
+class DirectPredictor:
+    """
+    Call an OpenAI-compatible chat completions client for one signature
+
+    Example:
+        predictor = DirectPredictor(FieldExtractionSignature, openai.OpenAI(), "gpt-4o")
+        result = predictor(transcript=..., field_name=..., ...)
+        result.field_value, result.logprobs
+    """
+
+    def __init__(
+        self,
+        signature: Any,
+        client: Any,
+        model: str,
+        adapter: Optional[dspy.ChatAdapter] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 1000,
+        **request_kwargs,
+    ):
+        """
+        Initialize the predictor
+
+        Args:
+            signature: DSPy signature whose prompt and parsing are reproduced
+            client: OpenAI-compatible client (e.g. openai.OpenAI())
+            model: Model name sent with each request
+            adapter: DSPy adapter defining the prompt and output format
+                (default: ChatAdapter; StructuredOutputAdapter adds a JSON schema)
+            temperature: Sampling temperature (default: 0.0, as dspy.LM)
+            max_tokens: Completion token limit (default: 1000, as dspy.LM)
+            **request_kwargs: Extra chat.completions.create parameters
+        """
+        self.signature = signature
+        self.client = client
+        self.adapter = adapter or dspy.ChatAdapter()
+        self.demos: List[Dict[str, Any]] = []
+        self.request_kwargs = {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "logprobs": True,
+            **request_kwargs,
+        }
+        self._compile()
+
+    def _compile(self) -> None:
+        """Render the signature and demos once into message templates"""
+        self.input_names = list(self.signature.input_fields)
+        rendered = self.adapter.format(
+            self.signature,
+            demos=self.demos,
+            inputs={name: f"{_SENTINEL}{name}{_SENTINEL}" for name in self.input_names},
+        )
+        self._templates = [
+            (message["role"], *_compile_template(message["content"], self.input_names))
+            for message in rendered
+        ]
+        if isinstance(self.adapter, StructuredOutputAdapter):
+            self.request_kwargs["response_format"] = signature_response_format(
+                self.signature
+            )
+
+    def dump_state(self) -> Dict[str, Any]:
+        """Serialize instructions, field descriptions and demos like dspy.Predict"""
+        predict = dspy.Predict(self.signature)
+        predict.demos = self.demos
+        return predict.dump_state()
+
+    def load_state(self, state: Dict[str, Any]) -> "DirectPredictor":
+        """Apply a dspy.Predict state (e.g. an optimized program) and recompile"""
+        predict = dspy.Predict(self.signature).load_state(state)
+        self.signature = predict.signature
+        self.demos = list(predict.demos)
+        self._compile()
+        return self
+
+    def format(self, **inputs: str) -> List[Dict[str, str]]:
+        """Fill the compiled prompt template with input values"""
+        messages = []
+        for role, literals, slots in self._templates:
+            pieces = [literals[0]]
+            for slot, literal in zip(slots, literals[1:]):
+                pieces.append(str(inputs[slot]))
+                pieces.append(literal)
+            messages.append({"role": role, "content": "".join(pieces)})
+        return messages
+
+    def __call__(self, **inputs: str) -> DirectPrediction:
+        """
+        Run the signature on one set of inputs
+
+        Returns:
+            DirectPrediction with the parsed output fields and the logprobs of
+            the first choice
+
+        Raises:
+            ValueError: If the completion does not contain the output fields
+        """
+        return self.sample(1, **inputs)[0]
+
+    def request(self, n: int = 1, **inputs: str) -> Dict[str, Any]:
+        """
+        Build the chat.completions.create parameters for one set of inputs
+
+        As with dspy.Predict, a temperature of 0.15 or less is raised to 0.7
+        when n > 1 so the samples can differ.
+
+        Returns:
+            JSON-serializable request body with messages and model parameters
+        """
+        request_kwargs = self.request_kwargs
+        if n > 1:
+            request_kwargs = {**request_kwargs, "n": n}
+            if request_kwargs["temperature"] <= 0.15:
+                request_kwargs["temperature"] = 0.7
+        return {"messages": self.format(**inputs), **request_kwargs}
+
+    def parse_choices(self, choices: List[Any]) -> List[DirectPrediction]:
+        """
+        Parse the choices of a chat completion (API objects or dictionaries)
+
+        Returns:
+            One DirectPrediction per choice
+
+        Raises:
+            ValueError: If a completion does not contain the output fields
+        """
+        return [
+            DirectPrediction(
+                self.adapter.parse(
+                    self.signature, _get(_get(choice, "message"), "content") or ""
+                ),
+                _get(choice, "logprobs"),
+            )
+            for choice in choices
+        ]
+
+    def sample(self, n: int, **inputs: str) -> List[DirectPrediction]:
+        """
+        Request n completions for one set of inputs in a single call
+
+        Returns:
+            One DirectPrediction per choice
+
+        Raises:
+            ValueError: If a completion does not contain the output fields
+        """
+        response = self.client.chat.completions.create(**self.request(n, **inputs))
+        return self.parse_choices(response.choices)
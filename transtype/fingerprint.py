@@ -0,0 +1,291 @@
+"""
+Fingerprints of extraction and evaluation configurations for selective re-runs
+
+A field's fingerprint hashes its definition together with everything else
+that shapes its result: the model, output adapter, prompt state of the
+predictor that extracts it (instructions, field descriptions, demos), the
+signature version and the sampling, voting, relevance and pre-screen
+settings (threshold, model and presence predictor state). An
+assertion's fingerprint does the same for the evaluation steps, prompt
+template and threshold of an AssertsEvaluator. Re-run results carry their
+fingerprints, so a later re-run with edited definitions only recomputes the
+fields and assertions whose fingerprint changed and keeps the rest.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from .models import FieldResult, TranscriptInput
+from .processor import AssertsEvaluator, TranscriptProcessor, _map_concurrent
+from .programs import signature_version
+
+# Bump when the fingerprinted inputs change, to invalidate stored results
+FINGERPRINT_FORMAT = 2
+
+FINGERPRINTS_KEY = "fingerprints"
+FINGERPRINT_KEY = "fingerprint"
+
+
+def _digest(data: Dict[str, Any]) -> str:
+    canonical = json.dumps(
+        {"format": FINGERPRINT_FORMAT, **data},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _predictor_data(predictor: Any) -> Dict[str, Any]:
+    return {
+        "signature_version": signature_version(predictor.signature),
+        "state": predictor.dump_state(),
+    }
+
+
+def field_fingerprints(processor: TranscriptProcessor) -> Dict[str, str]:
+    """
+    Fingerprint every field of a processor
+
+    Args:
+        processor: Configured TranscriptProcessor
+
+    Returns:
+        Fingerprint by field name
+    """
+    shared = {
+        "model": processor.lm.model,
+        "adapter": type(processor.adapter).__name__,
+        "include_reasoning": processor.include_reasoning,
+        "num_samples": processor.num_samples,
+        "vote": processor.vote,
+        "relevance_top_k": processor.relevance_top_k,
+        "relevance_window": processor.relevance_window,
+        "prescreen": None,
+    }
+    if processor.prescreen:
+        shared["prescreen"] = {
+            "threshold": processor.prescreen_threshold,
+            "model": processor.prescreen_model,
+            "predictor": _predictor_data(processor.presence_screener),
+        }
+    default = _predictor_data(processor.field_extractor)
+    fingerprints = {}
+    for field_def in processor.fields:
+        name = field_def["field_name"]
+        predictor = processor.typed_extractors.get(name)
+        fingerprints[name] = _digest(
+            {
+                **shared,
+                "field": field_def,
+                "predictor": (
+                    default if predictor is None else _predictor_data(predictor)
+                ),
+            }
+        )
+    return fingerprints
+
+
+def evaluator_fingerprint(evaluator: AssertsEvaluator) -> str:
+    """
+    Fingerprint the assertion of an evaluator
+
+    Args:
+        evaluator: Configured AssertsEvaluator
+
+    Returns:
+        Fingerprint of its evaluation steps, prompt and settings
+    """
+    return _digest(
+        {
+            "model": evaluator.lm.model,
+            "adapter": type(evaluator.adapter).__name__,
+            "include_reasoning": evaluator.include_reasoning,
+            "num_samples": evaluator.num_samples,
+            "evaluation_steps": evaluator.evaluation_steps,
+            "prompt_template": evaluator.prompt_template,
+            "threshold": evaluator.threshold,
+            "predictor": _predictor_data(evaluator.evaluator),
+        }
+    )
+
+
+def stale_fields(
+    fingerprints: Dict[str, str], previous: Optional[Dict[str, Any]]
+) -> List[str]:
+    """
+    Names of the fields that a previous result does not cover
+
+    Args:
+        fingerprints: Current fingerprints from field_fingerprints()
+        previous: Earlier re-run result (or None)
+
+    Returns:
+        Fields that are missing from the previous result or whose
+        fingerprint changed, in processor order
+    """
+    if not previous:
+        return list(fingerprints)
+    old = previous.get(FINGERPRINTS_KEY) or {}
+    present = {field["field_name"] for field in previous.get("fields", [])}
+    return [
+        name
+        for name, fingerprint in fingerprints.items()
+        if name not in present or old.get(name) != fingerprint
+    ]
+
+
+def _rerun_fields(
+    processor: TranscriptProcessor,
+    fingerprints: Dict[str, str],
+    input_data: Dict[str, Any],
+    previous: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    stale = stale_fields(fingerprints, previous)
+    fields = {}
+    if len(stale) < len(fingerprints):
+        fields = {field["field_name"]: field for field in previous["fields"]}
+    if not stale:
+        return {
+            "fields": [fields[name] for name in fingerprints],
+            FINGERPRINTS_KEY: dict(fingerprints),
+        }
+
+    try:
+        validated_input = TranscriptInput(**input_data)
+    except Exception as e:
+        raise ValueError(f"Invalid input format: {str(e)}")
+    turns = processor._format_turns(
+        [msg.model_dump() for msg in validated_input.messages]
+    )
+    stale_defs = [f for f in processor.fields if f["field_name"] in stale]
+    # Stale fields must not come back from the dedup index, which may hold this
+    # very transcript's outdated result. The pre-screen covers every field, as
+    # in process(); only the stale fields' answers are used.
+    prepare, jobs, finish = processor._field_jobs(turns, stale_defs, reuse=False)
+    if prepare is not None:
+        prepare()
+    for field_def, job in zip(stale_defs, jobs):
+        fields[field_def["field_name"]] = job().model_dump(mode="json")
+    # Register the merged result with the dedup index, as process() does
+    output = finish([FieldResult(**fields[name]) for name in fingerprints])
+    result = output.model_dump(mode="json")
+    result[FINGERPRINTS_KEY] = dict(fingerprints)
+    return result
+
+
+def rerun_process(
+    processor: TranscriptProcessor,
+    input_data: Dict[str, Any],
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Extract only the fields whose fingerprint changed since a previous run
+
+    Args:
+        processor: Configured TranscriptProcessor
+        input_data: Dictionary containing messages
+        previous: Earlier rerun_process() result for the same transcript
+            (None, or a result without fingerprints, extracts every field)
+
+    Returns:
+        process() result in the processor's field order, with the field
+        fingerprints under "fingerprints"; unchanged fields are copied from
+        previous and fields no longer defined are dropped
+
+    Raises:
+        ValueError: If the input is invalid
+    """
+    return _rerun_fields(processor, field_fingerprints(processor), input_data, previous)
+
+
+def rerun_process_batch(
+    processor: TranscriptProcessor,
+    inputs: Iterable[Dict[str, Any]],
+    previous: Iterable[Optional[Dict[str, Any]]],
+    max_workers: int = 8,
+) -> List[Dict[str, Any]]:
+    """
+    rerun_process() over many transcripts concurrently
+
+    Args:
+        processor: Configured TranscriptProcessor
+        inputs: Dictionaries containing messages
+        previous: Earlier results, one per input (None entries allowed)
+        max_workers: Number of transcripts processed in parallel (default: 8)
+
+    Returns:
+        Results in the same order as inputs
+    """
+    fingerprints = field_fingerprints(processor)
+    return list(
+        _map_concurrent(
+            lambda pair: _rerun_fields(processor, fingerprints, *pair),
+            zip(inputs, previous),
+            max_workers,
+        )
+    )
+
+
+def _rerun_assertion(
+    evaluator: AssertsEvaluator,
+    fingerprint: str,
+    input_data: Dict[str, Any],
+    previous: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    if previous and previous.get(FINGERPRINT_KEY) == fingerprint:
+        return previous
+    result = evaluator.evaluate(input_data)
+    result[FINGERPRINT_KEY] = fingerprint
+    return result
+
+
+def rerun_evaluate(
+    evaluator: AssertsEvaluator,
+    input_data: Dict[str, Any],
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Evaluate a transcript unless a previous result has the same fingerprint
+
+    Args:
+        evaluator: Configured AssertsEvaluator
+        input_data: Dictionary containing messages list
+        previous: Earlier rerun_evaluate() result for the same transcript
+
+    Returns:
+        evaluate() result with the assertion fingerprint under "fingerprint"
+        (previous itself when it is still current)
+    """
+    return _rerun_assertion(
+        evaluator, evaluator_fingerprint(evaluator), input_data, previous
+    )
+
+
+def rerun_evaluate_batch(
+    evaluator: AssertsEvaluator,
+    inputs: Iterable[Dict[str, Any]],
+    previous: Iterable[Optional[Dict[str, Any]]],
+    max_workers: int = 8,
+) -> List[Dict[str, Any]]:
+    """
+    rerun_evaluate() over many transcripts concurrently
+
+    Args:
+        evaluator: Configured AssertsEvaluator
+        inputs: Dictionaries containing messages lists
+        previous: Earlier results, one per input (None entries allowed)
+        max_workers: Number of transcripts evaluated in parallel (default: 8)
+
+    Returns:
+        Results in the same order as inputs
+    """
+    fingerprint = evaluator_fingerprint(evaluator)
+    return list(
+        _map_concurrent(
+            lambda pair: _rerun_assertion(evaluator, fingerprint, *pair),
+            zip(inputs, previous),
+            max_workers,
+        )
+    )
@@ -0,0 +1,207 @@
+"""
+Helpers for locating output values inside token logprobs
+
+Structured (JSON) responses interleave keys, punctuation and free-text fields
+with the values we score. These helpers map the response tokens back to the
+character span of one output field so confidence is computed from that
+field's tokens only.
+"""
+
+import json
+import math
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+_MARKER_PATTERN = re.compile(r"\[\[ ## (\w+) ## \]\]")
+
+
+class LogprobsSlice:
+    """Logprobs restricted to a subset of tokens, shaped like the API object"""
+
+    def __init__(self, content: List[Any]):
+        self.content = content
+
+    def __bool__(self) -> bool:
+        return bool(self.content)
+
+
+def _get(entry: Any, name: str, default: Any = None) -> Any:
+    """Read an attribute from an API object or a plain dictionary"""
+    if isinstance(entry, dict):
+        return entry.get(name, default)
+    return getattr(entry, name, default)
+
+
+def token_entries(logprobs_data: Any) -> List[Any]:
+    """Return the per-token entries of a logprobs payload (empty if missing)"""
+    if not logprobs_data:
+        return []
+    return list(_get(logprobs_data, "content") or [])
+
+
+def json_value_span(text: str, key: str) -> Optional[Tuple[int, int]]:
+    """
+    Find the character span of a top-level value in a JSON object
+
+    Args:
+        text: JSON text of the model response
+        key: Name of the top-level key
+
+    Returns:
+        (start, end) offsets of the value, excluding the quotes of strings,
+        or None if the key is missing or the text is not a JSON object
+    """
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    if start < 0:
+        return None
+    index = start + 1
+    while index < len(text):
+        while index < len(text) and text[index] in " \t\r\n,":
+            index += 1
+        if index >= len(text) or text[index] == "}":
+            return None
+        try:
+            name, index = decoder.raw_decode(text, index)
+        except ValueError:
+            return None
+        while index < len(text) and text[index] in " \t\r\n:":
+            index += 1
+        value_start = index
+        try:
+            _, index = decoder.raw_decode(text, index)
+        except ValueError:
+            return None
+        if name == key:
+            if text[value_start] == '"':
+                return value_start + 1, index - 1
+            return value_start, index
+    return None
+
+
+def marker_value_span(text: str, key: str) -> Optional[Tuple[int, int]]:
+    """
+    Find the character span of a field in DSPy's ``[[ ## key ## ]]`` format
+
+    Args:
+        text: Text of the model response
+        key: Name of the output field
+
+    Returns:
+        (start, end) offsets of the stripped value, or None if the marker is missing
+    """
+    for match in _MARKER_PATTERN.finditer(text):
+        if match.group(1) != key:
+            continue
+        following = _MARKER_PATTERN.search(text, match.end())
+        begin = match.end()
+        end = following.start() if following else len(text)
+        value = text[begin:end]
+        start = begin + len(value) - len(value.lstrip())
+        return start, begin + len(value.rstrip())
+    return None
+
+
+def tokens_in_span(entries: List[Any], start: int, end: int) -> List[Any]:
+    """Return the token entries overlapping the [start, end) character span"""
+    selected = []
+    offset = 0
+    for entry in entries:
+        token = _get(entry, "token") or ""
+        token_end = offset + len(token)
+        if token_end > start and offset < end:
+            selected.append(entry)
+        elif offset >= end:
+            break
+        offset = token_end
+    return selected
+
+
+def select_json_field_logprobs(logprobs_data: Any, key: str) -> Optional[LogprobsSlice]:
+    """
+    Restrict a JSON response's logprobs to the tokens of one field's value
+
+    Args:
+        logprobs_data: Logprobs object or dictionary of the response
+        key: Output field whose value tokens should be kept
+
+    Returns:
+        LogprobsSlice with the value tokens, or None if they cannot be located
+    """
+    return _select_field_logprobs(logprobs_data, key, json_value_span)
+
+
+def select_marker_field_logprobs(
+    logprobs_data: Any, key: str
+) -> Optional[LogprobsSlice]:
+    """
+    Restrict a ``[[ ## key ## ]]``-formatted response's logprobs to one value
+
+    Args:
+        logprobs_data: Logprobs object or dictionary of the response
+        key: Output field whose value tokens should be kept
+
+    Returns:
+        LogprobsSlice with the value tokens, or None if they cannot be located
+    """
+    return _select_field_logprobs(logprobs_data, key, marker_value_span)
+
+
+def value_distribution_confidence(
+    value_logprobs: Any, value: str, candidates: Sequence[str]
+) -> Optional[float]:
+    """
+    Probability of a value among a closed set, from its first token's alternatives
+
+    Each top_logprob of the value's first token is assigned to the candidates
+    it could begin, compared case-insensitively: to the one it spells out
+    completely if any (so "no" is not also counted for "not_applicable"),
+    and otherwise split evenly across all candidates it is a prefix of. The
+    chosen value's mass is normalized by the mass of all candidates.
+
+    Args:
+        value_logprobs: Logprobs restricted to the value tokens
+        value: Value produced by the model
+        candidates: All values the model was allowed to produce
+
+    Returns:
+        Probability between 0 and 1, or None without top_logprobs
+    """
+    entries = token_entries(value_logprobs)
+    alternatives = _get(entries[0], "top_logprobs") if entries else None
+    if not alternatives:
+        return None
+
+    mass = {candidate: 0.0 for candidate in candidates}
+    folded = [(candidate, candidate.casefold()) for candidate in candidates]
+    for alternative in alternatives:
+        prefix = (_get(alternative, "token") or "").strip().casefold()
+        logprob = _get(alternative, "logprob")
+        if not prefix or logprob is None:
+            continue
+        matches = [c for c, f in folded if f == prefix]
+        if not matches:
+            matches = [c for c, f in folded if f.startswith(prefix)]
+        for candidate in matches:
+            mass[candidate] += math.exp(logprob) / len(matches)
+
+    total = sum(mass.values())
+    if value not in mass or total <= 0:
+        return None
+    return mass[value] / total
+
+
+def _select_field_logprobs(logprobs_data, key, find_span) -> Optional[LogprobsSlice]:
+    """Select the logprobs of the value located by find_span(text, key)"""
+    entries = token_entries(logprobs_data)
+    if not entries:
+        return None
+    text = "".join(_get(entry, "token") or "" for entry in entries)
+    span = find_span(text, key)
+    if span is None:
+        return None
+    start, end = span
+    if start == end:
+        # Empty strings have no value tokens; score the closing quote instead
+        end += 1
+    return LogprobsSlice(tokens_in_span(entries, start, end))
@@ -2,9 +2,12 @@
 Data models for transtype package using Pydantic
 """
 
-from typing import List, Literal, Optional
+from datetime import date
+from typing import List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+FieldType = Literal["string", "enum", "boolean", "integer", "float", "date"]
 
 
 class Message(BaseModel):
@@ -20,8 +23,9 @@ class FieldDefinition(BaseModel):
     """Defines a field to be extracted from the transcript"""
 
     field_name: str = Field(description="Name of the field to extract")
-    field_type: Literal["string"] = Field(
-        description="Type of the field (currently only 'string' is supported)"
+    field_type: FieldType = Field(
+        description="Type of the field: string, enum, boolean, integer, float or "
+        "date (ISO 8601)"
     )
     format_example: str = Field(
         description="Example of the expected format for this field"
@@ -29,6 +33,17 @@ class FieldDefinition(BaseModel):
     field_description: str = Field(
         description="Context and description for the field to help with extraction"
     )
+    allowed_values: Optional[List[str]] = Field(
+        default=None, description="Values an enum field may take (enum fields only)"
+    )
+
+    @model_validator(mode="after")
+    def _check_allowed_values(self) -> "FieldDefinition":
+        if self.field_type == "enum" and not self.allowed_values:
+            raise ValueError("enum fields require a non-empty allowed_values list")
+        if self.field_type != "enum" and self.allowed_values is not None:
+            raise ValueError("allowed_values is only supported for enum fields")
+        return self
 
 
 class TranscriptInput(BaseModel):
@@ -41,7 +56,9 @@ class FieldResult(BaseModel):
     """Result for a single extracted field"""
 
     field_name: str = Field(description="Name of the extracted field")
-    field_value: Optional[str] = Field(description="Extracted value for the field")
+    field_value: Optional[Union[bool, int, float, date, str]] = Field(
+        description="Extracted value for the field, typed by its field_type"
+    )
     field_confidence: float = Field(
         description="Confidence score between 0 and 1", ge=0, le=1
     )
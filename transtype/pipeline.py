@@ -0,0 +1,262 @@
+"""
+Evaluation matrix: many field schemas and assertion sets over one transcript
+
+EvaluationPipeline validates and formats each transcript once, then runs
+every field extraction of every TranscriptProcessor and every
+AssertsEvaluator as independent calls on one shared thread pool, so the
+latency of a transcript is about that of its slowest call rather than the
+sum. Calls whose prompts share a prefix (same signature, hence the same
+system message followed by the same transcript) are dispatched together so
+provider prompt caching can reuse it. A processor's presence pre-screen is a
+call on the same pool too; its field calls are submitted once it finished.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import AssertionInput
+from .processor import AssertsEvaluator, TranscriptProcessor, _map_concurrent
+from .readers import normalize_message
+
+
+class EvaluationPipeline:
+    """
+    Run several processors and evaluators over each transcript in one pass
+
+    Example:
+        pipeline = EvaluationPipeline(
+            processors={"crm": crm_processor, "qa": qa_processor},
+            evaluators={"greeting": greeting, "compliance": compliance},
+            max_workers=32,
+        )
+        result = pipeline.run(transcript)
+        result["extractions"]["crm"]["fields"], result["evaluations"]["greeting"]
+    """
+
+    def __init__(
+        self,
+        processors: Optional[Dict[str, TranscriptProcessor]] = None,
+        evaluators: Optional[Dict[str, AssertsEvaluator]] = None,
+        max_workers: int = 16,
+        prefix_warmup: bool = False,
+    ):
+        """
+        Initialize the pipeline
+
+        Args:
+            processors: Field extraction processors by name (optional)
+            evaluators: Assertion evaluators by name (optional)
+            max_workers: LLM calls in flight at once across all transcripts
+                (default: 16)
+            prefix_warmup: Send one call per shared prompt prefix first and
+                the rest of its group once it returns, so they hit a warm
+                prompt cache; costs one extra call latency (default: False)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.processors = dict(processors or {})
+        self.evaluators = dict(evaluators or {})
+        if not self.processors and not self.evaluators:
+            raise ValueError("At least one processor or evaluator is required")
+        self.max_workers = max_workers
+        self.prefix_warmup = prefix_warmup
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _validate(self, input_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Normalize and validate messages once for all processors and evaluators"""
+        try:
+            messages = [
+                normalize_message(msg) for msg in input_data.get("messages", [])
+            ]
+            validated_input = AssertionInput(**{**input_data, "messages": messages})
+        except Exception as e:
+            raise ValueError(f"Invalid input format: {str(e)}")
+        return [msg.model_dump() for msg in validated_input.messages]
+
+    def _jobs(self, messages: List[Dict[str, Any]]) -> Tuple[
+        List[Tuple[Any, Callable[[], Any]]],
+        Dict[int, int],
+        Callable[[List[Any]], Dict],
+    ]:
+        """
+        Plan every call of a transcript
+
+        Returns:
+            (prefix key, job) pairs; the position of the job each job must
+            wait for (a processor's presence pre-screen), by job position; and
+            a function assembling the combined result from the jobs' results,
+            in the same order
+        """
+        jobs: List[Tuple[Any, Callable[[], Any]]] = []
+        requires: Dict[int, int] = {}
+        finishers = []
+        if self.processors:
+            # All processors format turns identically, so format once
+            turns = next(iter(self.processors.values()))._format_turns(messages)
+            for name, processor in self.processors.items():
+                prepare, field_jobs, finish = processor._field_jobs(turns)
+                if prepare is not None:
+                    prescreen = len(jobs)
+                    jobs.append((("prescreen", name), prepare))
+                keys = [
+                    processor._field_predictor(field_def).signature
+                    for field_def in processor.fields
+                ]
+                positions = range(len(jobs), len(jobs) + len(field_jobs))
+                if prepare is not None:
+                    requires.update((position, prescreen) for position in positions)
+                finishers.append(("extractions", name, finish, positions))
+                jobs.extend(zip(keys, field_jobs))
+        if self.evaluators:
+            transcript = next(iter(self.evaluators.values()))._format_transcript(
+                messages
+            )
+            for name, evaluator in self.evaluators.items():
+                finishers.append(("evaluations", name, None, [len(jobs)]))
+                jobs.append(
+                    (
+                        evaluator.evaluator.signature,
+                        lambda e=evaluator: e._evaluate_transcript(transcript),
+                    )
+                )
+
+        def assemble(results: List[Any]) -> Dict[str, Dict[str, Any]]:
+            combined: Dict[str, Dict[str, Any]] = {"extractions": {}, "evaluations": {}}
+            for section, name, finish, positions in finishers:
+                chunk = [results[position] for position in positions]
+                if finish is not None:
+                    combined[section][name] = finish(chunk).model_dump(mode="json")
+                else:
+                    combined[section][name] = chunk[0].model_dump()
+            return combined
+
+        return jobs, requires, assemble
+
+    def _dispatch(
+        self,
+        jobs: List[Tuple[Any, Callable[[], Any]]],
+        requires: Optional[Dict[int, int]] = None,
+    ) -> List[Future]:
+        """
+        Submit jobs grouped by prompt prefix; returns futures in job order
+
+        A job listed in requires is submitted once the job it requires is
+        done, so waiting never occupies a worker. With prefix_warmup, the
+        followers of a prefix group likewise wait for its leader.
+        """
+        requires = requires or {}
+        groups: Dict[Any, List[int]] = {}
+        for position, (key, _) in enumerate(jobs):
+            groups.setdefault(key, []).append(position)
+
+        gates: Dict[int, List[int]] = {}
+        for position, prerequisite in requires.items():
+            gates.setdefault(position, []).append(prerequisite)
+        if self.prefix_warmup:
+            for leader, *followers in groups.values():
+                for position in followers:
+                    gates.setdefault(position, []).append(leader)
+
+        futures: List[Optional[Future]] = [
+            Future() if position in gates else None for position in range(len(jobs))
+        ]
+        for positions in groups.values():
+            for position in positions:
+                if position not in gates:
+                    futures[position] = self._executor.submit(jobs[position][1])
+        for position, waits_on in gates.items():
+            self._submit_after(
+                [futures[gate] for gate in waits_on],
+                jobs[position][1],
+                futures[position],
+            )
+        return futures
+
+    def _submit_after(
+        self, gates: List[Future], job: Callable[[], Any], target: Future
+    ) -> None:
+        """Submit job once every gate is done, completing target with it"""
+        remaining = [len(gates)]
+        lock = threading.Lock()
+
+        def release(_: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            _chain(self._executor.submit(job), target)
+
+        for gate in gates:
+            gate.add_done_callback(release)
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run every processor and evaluator over one transcript
+
+        Args:
+            input_data: Dictionary containing messages ('role'/'content' or
+                'speaker'/'text')
+
+        Returns:
+            {"extractions": {name: process() result},
+             "evaluations": {name: evaluate() result}}
+
+        Raises:
+            ValueError: If the input is not a valid transcript
+        """
+        jobs, requires, assemble = self._jobs(self._validate(input_data))
+        futures = self._dispatch(jobs, requires)
+        return assemble([future.result() for future in futures])
+
+    def run_batch(
+        self, inputs: Iterable[Dict[str, Any]], max_transcripts: int = 4
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Run many transcripts; see iter_run()
+
+        Returns:
+            Combined results, in the same order as inputs
+        """
+        return list(self.iter_run(inputs, max_transcripts))
+
+    def iter_run(
+        self, inputs: Iterable[Dict[str, Any]], max_transcripts: int = 4
+    ) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Run a stream of transcripts, yielding combined results in order
+
+        All calls still share the pipeline's max_workers budget; this only
+        bounds how many transcripts are planned and waiting at once.
+
+        Args:
+            inputs: Iterable of dictionaries containing messages
+            max_transcripts: Transcripts in progress at once (default: 4)
+
+        Yields:
+            Combined results, in the same order as inputs
+        """
+        return _map_concurrent(self.run, inputs, max_transcripts)
+
+    def close(self) -> None:
+        """Shut down the shared thread pool"""
+        self._executor.shutdown()
+
+    def __enter__(self) -> "EvaluationPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _chain(source: Future, target: Future) -> None:
+    """Complete target with the outcome of source once it is done"""
+
+    def copy(done: Future) -> None:
+        error = done.exception()
+        if error is not None:
+            target.set_exception(error)
+        else:
+            target.set_result(done.result())
+
+    source.add_done_callback(copy)
@@ -0,0 +1,481 @@
+"""
+Pre-flight token, cost and duration estimates with budget enforcement
+
+CostPlanner renders the request of every call a TranscriptProcessor or
+AssertsEvaluator would make for a transcript, exactly as the batch request
+builders do: the adapter's signature overhead, demos, instructions and, in
+json mode, the response schema are all part of the counted prompt. Prompt
+text is counted with a pluggable offline tokenizer (a calibrated
+characters-per-token heuristic by default, or tiktoken when installed), and
+completions with per-call allowances. The estimate projects total tokens,
+cost from the LiteLLM price table, and wall-clock time under a TPM/RPM
+limit. TokenBudget stops a run once the per-transcript estimates reserved
+from it would exceed its limit. It is estimate-based: actual usage is not
+read back, so prompt counts are only as exact as the tokenizer and
+completions only bounded when the allowances are the LM's max_tokens.
+"""
+
+import json
+import math
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import litellm
+
+from .batch import _direct_predictor
+from .models import AssertionInput, TranscriptInput
+from .processor import AssertsEvaluator, TranscriptProcessor, _map_concurrent
+from .retrieval import TurnIndex, field_query
+
+Tokenizer = Callable[[str], int]
+
+# OpenAI's chat accounting: tokens per message for role and separators, and
+# tokens priming the assistant reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+# Completion allowance per call: output field markers and value, reasoning
+# when included, and one short answer per field of a presence pre-screen
+DEFAULT_COMPLETION_TOKENS = {
+    "field": 25,
+    "evaluation": 25,
+    "reasoning": 80,
+    "presence_field": 6,
+}
+
+
+class CharTokenizer:
+    """
+    Count tokens as characters divided by a characters-per-token ratio
+
+    Example:
+        tokenizer = CharTokenizer.calibrate(sample_texts, exact_counts)
+        tokenizer("Agent: Hello, how can I help?")
+    """
+
+    def __init__(self, chars_per_token: float = 4.0):
+        """
+        Initialize the heuristic
+
+        Args:
+            chars_per_token: Average characters per token; about 4 for
+                English text with OpenAI tokenizers (default: 4.0)
+        """
+        if chars_per_token <= 0:
+            raise ValueError("chars_per_token must be positive")
+        self.chars_per_token = chars_per_token
+
+    def __call__(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    @classmethod
+    def calibrate(
+        cls, texts: Iterable[str], token_counts: Iterable[int]
+    ) -> "CharTokenizer":
+        """
+        Fit the ratio to texts with known token counts
+
+        Args:
+            texts: Sample texts, e.g. formatted transcripts of the corpus
+            token_counts: Exact token count of each text (from a tokenizer or
+                the usage reported by the API)
+
+        Raises:
+            ValueError: If the samples hold no tokens
+        """
+        chars = tokens = 0
+        for text, count in zip(texts, token_counts):
+            chars += len(text)
+            tokens += count
+        if tokens <= 0:
+            raise ValueError("Calibration needs samples with a positive token count")
+        return cls(chars / tokens)
+
+
+def tiktoken_tokenizer(encoding: str = "o200k_base") -> Tokenizer:
+    """
+    Exact token counts with tiktoken
+
+    tiktoken downloads the encoding on first use and caches it; set
+    TIKTOKEN_CACHE_DIR to a pre-populated directory on offline machines.
+
+    Args:
+        encoding: tiktoken encoding name; o200k_base for the gpt-4o family
+            (default), cl100k_base for gpt-4 and gpt-3.5
+
+    Raises:
+        ValueError: If tiktoken is not installed
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        raise ValueError("tiktoken_tokenizer requires tiktoken to be installed")
+    codec = tiktoken.get_encoding(encoding)
+    return lambda text: len(codec.encode(text, disallowed_special=()))
+
+
+class CallEstimate(NamedTuple):
+    """Estimated tokens of one LM call"""
+
+    kind: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class CostEstimate(NamedTuple):
+    """Projected totals of a run"""
+
+    transcripts: int
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    cost: Optional[float]
+    seconds: Optional[float]
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Totals as a JSON-serializable dictionary"""
+        return {**self._asdict(), "total_tokens": self.total_tokens}
+
+
+def _model_price(model: str) -> Optional[Tuple[float, float]]:
+    """USD per 1M input and output tokens from LiteLLM's price table"""
+    for name in (model, model.split("/", 1)[-1]):
+        entry = litellm.model_cost.get(name)
+        if entry and "input_cost_per_token" in entry:
+            return (
+                entry["input_cost_per_token"] * 1e6,
+                entry.get("output_cost_per_token", 0.0) * 1e6,
+            )
+    return None
+
+
+class CostPlanner:
+    """
+    Estimate the tokens, cost and duration of running processors and
+    evaluators over a corpus
+
+    Example:
+        planner = CostPlanner([processor, evaluator])
+        estimate = planner.estimate(corpus.transcripts(corpus.sample(500)),
+                                    total_transcripts=len(corpus),
+                                    tpm_limit=2_000_000)
+        budget = TokenBudget(50_000_000)
+        for result in planner.run(processor.process, transcripts, budget):
+            ...
+
+    Estimates are upper bounds with respect to near-duplicate reuse and the
+    presence pre-screen's skips. A relevance-limited field counts both its
+    call on the relevant turns and the full-transcript "fallback" call made
+    when the value is not found there. Retries are not counted.
+    """
+
+    def __init__(
+        self,
+        components: Iterable[Any],
+        tokenizer: Optional[Tokenizer] = None,
+        completion_tokens: Optional[Dict[str, int]] = None,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        """
+        Initialize the planner
+
+        Args:
+            components: TranscriptProcessors and AssertsEvaluators run on
+                every transcript
+            tokenizer: Text to token count function (default: CharTokenizer())
+            completion_tokens: Overrides of DEFAULT_COMPLETION_TOKENS; set
+                them to the max_tokens of the LM to bound completions
+            prices: USD per 1M (input, output) tokens by model, for models
+                missing from or priced differently than LiteLLM's table
+
+        Raises:
+            ValueError: If a component is neither a processor nor an evaluator
+        """
+        self.tokenizer = tokenizer or CharTokenizer()
+        self.completion_tokens = {
+            **DEFAULT_COMPLETION_TOKENS,
+            **(completion_tokens or {}),
+        }
+        self.prices = dict(prices or {})
+        self.components = list(components)
+        # Predictors rendering the exact request of each call
+        self._predictors: List[Dict[str, Any]] = []
+        for component in self.components:
+            if isinstance(component, TranscriptProcessor):
+                predictors = {
+                    field_def["field_name"]: _direct_predictor(
+                        component._field_predictor(field_def),
+                        component.lm,
+                        component.adapter,
+                    )
+                    for field_def in component.fields
+                }
+                if component.prescreen:
+                    predictors[None] = _direct_predictor(
+                        component.presence_screener,
+                        component.prescreen_lm,
+                        component.adapter,
+                    )
+            elif isinstance(component, AssertsEvaluator):
+                predictors = {
+                    None: _direct_predictor(
+                        component.evaluator, component.lm, component.adapter
+                    )
+                }
+            else:
+                raise ValueError(
+                    f"Expected a TranscriptProcessor or AssertsEvaluator, "
+                    f"got {type(component).__name__}"
+                )
+            self._predictors.append(predictors)
+
+    def _prompt_tokens(self, body: Dict[str, Any]) -> int:
+        tokens = REPLY_PRIMING_TOKENS
+        for message in body["messages"]:
+            content = message.get("content") or ""
+            if not isinstance(content, str):
+                content = json.dumps(content)
+            tokens += self.tokenizer(content) + MESSAGE_OVERHEAD_TOKENS
+        if body.get("response_format"):
+            tokens += self.tokenizer(json.dumps(body["response_format"]))
+        return tokens
+
+    def _call(self, kind: str, body: Dict[str, Any], completion: int) -> CallEstimate:
+        return CallEstimate(
+            kind,
+            body.get("model", ""),
+            self._prompt_tokens(body),
+            completion * body.get("n", 1),
+        )
+
+    def _processor_calls(
+        self, processor: TranscriptProcessor, predictors: Dict[Any, Any], input_data
+    ) -> List[CallEstimate]:
+        try:
+            validated_input = TranscriptInput(**input_data)
+        except Exception as e:
+            raise ValueError(f"Invalid input format: {str(e)}")
+        turns = processor._format_turns(
+            [msg.model_dump() for msg in validated_input.messages]
+        )
+        transcript = "\n".join(turns)
+        index = TurnIndex(turns) if processor.relevance_top_k else None
+        field_completion = self.completion_tokens["field"]
+        if processor.include_reasoning:
+            field_completion += self.completion_tokens["reasoning"]
+
+        calls = []
+        if None in predictors:
+            body = predictors[None].request(**processor._presence_inputs(transcript))
+            completion = self.completion_tokens["presence_field"] * len(
+                processor.fields
+            )
+            calls.append(self._call("presence", body, completion))
+        for field_def in processor.fields:
+            contexts = [("field", transcript)]
+            if index is not None:
+                indices = index.select(
+                    field_query(field_def),
+                    processor.relevance_top_k,
+                    processor.relevance_window,
+                )
+                if indices and len(indices) < len(index.turns):
+                    # As _extract_relevant_field: the relevant turns first, and
+                    # the full transcript when the value is not found there
+                    contexts = [
+                        ("field", index.context(indices)),
+                        ("fallback", transcript),
+                    ]
+            for kind, context in contexts:
+                body = predictors[field_def["field_name"]].request(
+                    processor.num_samples,
+                    **processor._field_inputs(context, field_def),
+                )
+                calls.append(self._call(kind, body, field_completion))
+        return calls
+
+    def _evaluator_calls(
+        self, evaluator: AssertsEvaluator, predictors: Dict[Any, Any], input_data
+    ) -> List[CallEstimate]:
+        messages = evaluator._normalize_messages(input_data.get("messages", []))
+        try:
+            validated_input = AssertionInput(**{**input_data, "messages": messages})
+        except Exception as e:
+            raise ValueError(f"Invalid input format: {str(e)}")
+        transcript = evaluator._format_transcript(
+            [msg.model_dump() for msg in validated_input.messages]
+        )
+        body = predictors[None].request(
+            evaluator.num_samples,
+            transcript=transcript,
+            evaluation_steps=evaluator._format_evaluation_steps(),
+        )
+        completion = self.completion_tokens["evaluation"]
+        if evaluator.include_reasoning:
+            completion += self.completion_tokens["reasoning"]
+        return [self._call("evaluation", body, completion)]
+
+    def calls(self, input_data: Dict[str, Any]) -> List[CallEstimate]:
+        """
+        Estimate every call the components make for one transcript
+
+        Raises:
+            ValueError: If the input is not a valid transcript
+        """
+        calls = []
+        for component, predictors in zip(self.components, self._predictors):
+            if isinstance(component, TranscriptProcessor):
+                calls.extend(self._processor_calls(component, predictors, input_data))
+            else:
+                calls.extend(self._evaluator_calls(component, predictors, input_data))
+        return calls
+
+    def transcript_tokens(self, input_data: Dict[str, Any]) -> int:
+        """Estimated prompt plus completion tokens of one transcript"""
+        return sum(
+            c.prompt_tokens + c.completion_tokens for c in self.calls(input_data)
+        )
+
+    def estimate(
+        self,
+        inputs: Iterable[Dict[str, Any]],
+        total_transcripts: Optional[int] = None,
+        tpm_limit: Optional[float] = None,
+        rpm_limit: Optional[float] = None,
+    ) -> CostEstimate:
+        """
+        Project the totals of running the components over a corpus
+
+        Args:
+            inputs: Transcripts of the corpus, or a random sample of it
+            total_transcripts: Corpus size when inputs is a sample; totals are
+                scaled up from the sample (default: the number of inputs)
+            tpm_limit: Tokens per minute allowed by the provider (optional)
+            rpm_limit: Requests per minute allowed by the provider (optional)
+
+        Returns:
+            CostEstimate; cost is None if a model has no known price, seconds
+            is None without a limit, and otherwise the time the binding limit
+            allows
+        """
+        transcripts = calls = prompt_tokens = completion_tokens = 0
+        cost: Optional[float] = 0.0
+        for input_data in inputs:
+            transcripts += 1
+            for call in self.calls(input_data):
+                calls += 1
+                prompt_tokens += call.prompt_tokens
+                completion_tokens += call.completion_tokens
+                price = self.prices.get(call.model) or _model_price(call.model)
+                if price is None or cost is None:
+                    cost = None
+                    continue
+                cost += (
+                    call.prompt_tokens * price[0] + call.completion_tokens * price[1]
+                ) / 1e6
+
+        scale = 1.0
+        if total_transcripts is not None and transcripts:
+            scale = total_transcripts / transcripts
+            transcripts = total_transcripts
+        calls = round(calls * scale)
+        prompt_tokens = round(prompt_tokens * scale)
+        completion_tokens = round(completion_tokens * scale)
+        if cost is not None:
+            cost = round(cost * scale, 4)
+
+        minutes = []
+        if tpm_limit:
+            minutes.append((prompt_tokens + completion_tokens) / tpm_limit)
+        if rpm_limit:
+            minutes.append(calls / rpm_limit)
+        seconds = round(max(minutes) * 60, 1) if minutes else None
+        return CostEstimate(
+            transcripts, calls, prompt_tokens, completion_tokens, cost, seconds
+        )
+
+    def run(
+        self,
+        fn: Callable[[Dict[str, Any]], Any],
+        inputs: Iterable[Dict[str, Any]],
+        budget: "TokenBudget",
+        max_workers: int = 8,
+    ) -> Iterator[Any]:
+        """
+        Apply fn to transcripts until the token budget is used up
+
+        Each transcript's estimate is reserved from the budget before it is
+        started; actual usage is not reconciled. The first transcript that
+        does not fit stops the run: no
+        further transcripts are started, transcripts in flight finish, and
+        the results of the started ones are yielded in input order. The
+        number of results is thus the index to resume from.
+
+        Args:
+            fn: Per-transcript function, e.g. processor.process
+            inputs: Transcripts to run
+            budget: Token budget shared by the run
+            max_workers: Number of transcripts run in parallel (default: 8)
+
+        Yields:
+            fn's results, in input order
+        """
+
+        def admitted() -> Iterator[Dict[str, Any]]:
+            for input_data in inputs:
+                if not budget.reserve(self.transcript_tokens(input_data)):
+                    return
+                yield input_data
+
+        return _map_concurrent(fn, admitted(), max_workers)
+
+
+class TokenBudget:
+    """
+    Cap on the estimated tokens reserved by a run; thread-safe
+
+    Once a reservation is refused the budget is exhausted and refuses every
+    later one, so a stopped run never skips ahead to smaller transcripts.
+    """
+
+    def __init__(self, max_tokens: int):
+        """
+        Initialize the budget
+
+        Args:
+            max_tokens: Total prompt plus completion tokens allowed
+        """
+        if max_tokens < 0:
+            raise ValueError("max_tokens must be non-negative")
+        self.max_tokens = max_tokens
+        self.used = 0
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return self.max_tokens - self.used
+
+    def reserve(self, tokens: int) -> bool:
+        """Reserve tokens, returning False (and exhausting the budget) if they do not fit"""
+        with self._lock:
+            if self.exhausted or self.used + tokens > self.max_tokens:
+                self.exhausted = True
+                return False
+            self.used += tokens
+            return True
@@ -4,18 +4,78 @@ Core processor for extracting fields from transcripts using DSPy
 
 import json
 import math
-from typing import Any, Dict, List, Optional
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import dspy
-
+import httpx
+import openai
+from pydantic import BaseModel, ValidationError
+from pydantic_core import to_json
+
+from .adapters import StructuredOutputAdapter
+from .cassette import CassetteLM
+from .dedup import NearDuplicateIndex, evidence_digests, text_digest
+from .direct import BACKENDS, REQUEST_KWARGS, DirectPredictor
+from .logprobs import (
+    _get,
+    select_json_field_logprobs,
+    select_marker_field_logprobs,
+    token_entries,
+    value_distribution_confidence,
+)
 from .models import (
     AssertionInput,
     AssertionOutput,
     AssertionResult,
+    FieldDefinition,
     FieldResult,
     TranscriptInput,
     TranscriptOutput,
 )
+from .programs import load_program, save_program
+from .readers import _loads, normalize_message
+from .retrieval import TurnIndex, field_query
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+OUTPUT_MODES = ("text", "json")
+
+NOT_FOUND = "NOT_FOUND"
+
+# Alternatives requested per token for enum/boolean fields, whose confidence
+# is the probability of the chosen value among the allowed ones
+TOP_LOGPROBS = 10
+
+VOTES = ("majority", "weighted")
+
+# Share of a sampled confidence taken from the agreement between the samples;
+# the rest comes from the logprob confidence of the agreeing samples
+AGREEMENT_WEIGHT = 0.5
+
+# field_type text shown to the model for typed fields ("string" is sent as is)
+_FIELD_TYPE_HINTS = {
+    "enum": "enum (exactly one of the allowed values)",
+    "boolean": "boolean (yes or no)",
+    "integer": "integer (digits only, e.g. 42)",
+    "float": "number (e.g. 3.5)",
+    "date": "date (ISO 8601, YYYY-MM-DD)",
+}
 
 
 class FieldExtractionSignature(dspy.Signature):
@@ -53,6 +113,27 @@ class FieldExtractionSignatureNoReasoning(dspy.Signature):
     )
 
 
+class FieldPresenceSignature(dspy.Signature):
+    """Decide for every listed field whether the conversation transcript contains its value. Answer yes or no for each field."""
+
+    transcript: str = dspy.InputField(desc="The full conversation transcript")
+    field_list: str = dspy.InputField(
+        desc="Fields to look for, one per line as 'key: name (type) - description'"
+    )
+
+
+def _presence_signature(num_fields: int) -> Type[dspy.Signature]:
+    """Presence signature with one yes/no output per field (field_0, field_1, ...)"""
+    signature = FieldPresenceSignature
+    for i in range(num_fields):
+        signature = signature.append(
+            f"field_{i}",
+            dspy.OutputField(desc=f"Whether field_{i} is present: yes or no"),
+            type_=Literal["yes", "no"],
+        )
+    return signature
+
+
 class AssertionEvaluationSignature(dspy.Signature):
     """Evaluate a conversation transcript against evaluation steps with score and reasoning."""
 
@@ -82,6 +163,277 @@ class AssertionEvaluationSignatureNoReasoning(dspy.Signature):
     )
 
 
+def _build_adapter(output_mode: str) -> Optional[StructuredOutputAdapter]:
+    """Return the DSPy adapter for an output mode (None keeps DSPy's default)"""
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(
+            f"output_mode must be one of {OUTPUT_MODES}, got {output_mode!r}"
+        )
+    return StructuredOutputAdapter() if output_mode == "json" else None
+
+
+def _build_lm(
+    model: str,
+    api_key: str,
+    provider: str,
+    api_base: Optional[str],
+    lm_kwargs: Optional[Dict[str, Any]],
+) -> dspy.LM:
+    """Return the DSPy LM of a provider, optionally at a custom endpoint"""
+    kwargs = dict(lm_kwargs or {})
+    if api_base:
+        kwargs["api_base"] = api_base
+    return dspy.LM(f"{provider}/{model}", api_key=api_key, logprobs=True, **kwargs)
+
+
+def _build_client(
+    api_key: str,
+    api_base: Optional[str],
+    max_connections: Optional[int],
+    max_retries: Optional[int] = None,
+) -> openai.OpenAI:
+    """
+    Return an OpenAI client, optionally for an OpenAI-compatible server
+
+    With max_connections, the client keeps up to that many connections open
+    and alive, so a large worker pool reuses them instead of reconnecting.
+    """
+    http_client = None
+    if max_connections is not None:
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        http_client = openai.DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            )
+        )
+    retries = {} if max_retries is None else {"max_retries": max_retries}
+    return openai.OpenAI(
+        api_key=api_key, base_url=api_base, http_client=http_client, **retries
+    )
+
+
+# lm_kwargs the openai backend handles without sending them: num_retries
+# configures the client it builds and there is no response cache to disable
+_DIRECT_CLIENT_KWARGS = ("num_retries", "cache")
+
+
+def _direct_client(
+    client: Optional[Any],
+    api_key: str,
+    api_base: Optional[str],
+    max_connections: Optional[int],
+    lm_kwargs: Optional[Dict[str, Any]],
+) -> Any:
+    """
+    Return the client of the openai backend, building one if none is given
+
+    Raises:
+        ValueError: If lm_kwargs sets num_retries for a client passed in,
+            whose retries are configured on the client itself
+    """
+    num_retries = (lm_kwargs or {}).get("num_retries")
+    if client is None:
+        return _build_client(api_key, api_base, max_connections, num_retries)
+    if num_retries is not None:
+        raise ValueError(
+            "lm_kwargs num_retries only applies to the client built for the "
+            "openai backend; set max_retries on the client passed in instead"
+        )
+    return client
+
+
+def _direct_request_kwargs(lm_kwargs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Return the lm_kwargs the openai backend sends with each request
+
+    Raises:
+        ValueError: If lm_kwargs holds dspy.LM arguments the backend cannot apply
+    """
+    kwargs = {
+        name: value
+        for name, value in (lm_kwargs or {}).items()
+        if name not in _DIRECT_CLIENT_KWARGS
+    }
+    unsupported = sorted(set(kwargs) - set(REQUEST_KWARGS))
+    if unsupported:
+        raise ValueError(
+            f"lm_kwargs {unsupported} are not supported by the openai backend; "
+            f"it accepts {sorted(REQUEST_KWARGS + _DIRECT_CLIENT_KWARGS)}"
+        )
+    return kwargs
+
+
+def _build_predictor(
+    signature: Type[dspy.Signature],
+    backend: str,
+    adapter: Optional[StructuredOutputAdapter],
+    model: str,
+    client: Optional[Any],
+    lm_kwargs: Optional[Dict[str, Any]] = None,
+    **config,
+):
+    """
+    Return a dspy.Predict or, for the "openai" backend, a DirectPredictor
+
+    lm_kwargs configure dspy.LM for the dspy backend; the openai backend sends
+    the supported ones with each request, below the predictor's own config.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+    if backend == "dspy":
+        return dspy.Predict(signature, **config)
+    config = {**_direct_request_kwargs(lm_kwargs), **config}
+    return DirectPredictor(signature, client, model, adapter=adapter, **config)
+
+
+def _allowed_values(field_def: FieldDefinition) -> Optional[List[str]]:
+    """Return the closed set of values of an enum or boolean field"""
+    if field_def.field_type == "enum":
+        return list(field_def.allowed_values)
+    if field_def.field_type == "boolean":
+        # "yes"/"no" rather than "true"/"false", which DSPy would coerce to bool
+        return ["yes", "no"]
+    return None
+
+
+def _parse_typed_value(
+    value: str, field_type: str
+) -> Union[bool, int, float, date, str]:
+    """
+    Convert an extracted value to the Python type of its field
+
+    Raises:
+        ValueError: If the value does not match the field type
+    """
+    if field_type == "boolean":
+        return value.lower() in ("yes", "true")
+    if field_type == "integer":
+        return int(value.replace(",", ""))
+    if field_type == "float":
+        return float(value.replace(",", ""))
+    if field_type == "date":
+        return date.fromisoformat(value)
+    return value
+
+
+def _predict(predictor, lm: dspy.LM, adapter, n: int = 1, **inputs) -> List[Any]:
+    """
+    Call a predictor with the given LM and, if set, output adapter
+
+    Returns:
+        The n completions of a single request, each with the output fields
+        and logprobs
+    """
+    if isinstance(predictor, DirectPredictor):
+        return predictor.sample(n, **inputs)
+    if n > 1:
+        inputs["config"] = {"n": n}
+    if adapter is None:
+        result = predictor(lm=lm, **inputs)
+    else:
+        with dspy.context(adapter=adapter):
+            result = predictor(lm=lm, **inputs)
+    if n == 1:
+        return [result]
+    return [result.completions[i] for i in range(len(result.completions))]
+
+
+def _definition_digest(field_def: Dict[str, Any]) -> str:
+    """Digest of a field definition, to tell whether a stored result is current"""
+    return text_digest(json.dumps(field_def, sort_keys=True, default=str))
+
+
+def _check_num_samples(num_samples: int) -> int:
+    """Validate the number of completions requested per call"""
+    if num_samples < 1:
+        raise ValueError("num_samples must be at least 1")
+    return num_samples
+
+
+def _mean_token_confidence(logprobs_data: Any) -> float:
+    """
+    Mean token probability of a completion, clipped to [0.1, 0.99]
+
+    Entries may be API objects or plain dictionaries, depending on the
+    OpenAI-compatible server and client that produced them. Returns 0.5 when
+    no token logprobs are available.
+    """
+    entries = token_entries(logprobs_data)
+    if not entries:
+        return 0.5  # Default confidence if no logprobs available
+
+    # Extract token logprobs and calculate average probability
+    token_probs = []
+    for token_logprob in entries:
+        logprob = _get(token_logprob, "logprob")
+        if logprob is not None:
+            # Convert log probability to probability
+            prob = math.exp(logprob)
+            token_probs.append(prob)
+
+    if not token_probs:
+        return 0.5
+
+    # Calculate average probability and normalize
+    avg_prob = sum(token_probs) / len(token_probs)
+
+    # Apply sigmoid-like transformation to make confidence more meaningful
+    # This helps distinguish between high and low confidence predictions
+    confidence = min(max(avg_prob, 0.1), 0.99)
+
+    return round(confidence, 3)
+
+
+def _mix_agreement(agreement: float, confidence: float) -> float:
+    """Blend the agreement rate of samples with their logprob confidence"""
+    mixed = AGREEMENT_WEIGHT * agreement + (1 - AGREEMENT_WEIGHT) * confidence
+    return round(min(max(mixed, 0.1), 0.99), 3)
+
+
+def _vote_key(value: Any) -> Any:
+    """Key under which equal field values are counted together"""
+    return value.strip().casefold() if isinstance(value, str) else value
+
+
+def _validate_json(model: Type[ModelT], payload: Union[bytes, str]) -> ModelT:
+    """
+    Validate a JSON payload directly into a Pydantic model
+
+    Raises:
+        ValueError: If the payload is not valid JSON or does not match the model
+    """
+    try:
+        return model.model_validate_json(payload)
+    except ValidationError as e:
+        if any(error["type"] == "json_invalid" for error in e.errors()):
+            raise ValueError(f"Invalid JSON input: {str(e)}")
+        raise ValueError(f"Invalid input format: {str(e)}")
+
+
+def _map_concurrent(
+    fn: Callable[[Any], Any], items: Iterable[Any], max_workers: int
+) -> Iterator[Any]:
+    """
+    Apply fn to items on a thread pool, yielding results in input order
+
+    At most 2 * max_workers items are in flight at any time, so the input
+    iterable is consumed lazily and may be arbitrarily long.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = []
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= 2 * max_workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
 class TranscriptProcessor:
     """Main processor class for extracting fields from transcripts"""
 
@@ -91,6 +443,25 @@ class TranscriptProcessor:
         fields: List[Dict[str, Any]],
         model: str = "gpt-4o",
         include_reasoning: bool = True,
+        lm: Optional[dspy.LM] = None,
+        cassette: Optional[str] = None,
+        cassette_mode: str = "replay",
+        output_mode: str = "text",
+        backend: str = "dspy",
+        client: Optional[Any] = None,
+        num_samples: int = 1,
+        vote: str = "majority",
+        relevance_top_k: Optional[int] = None,
+        relevance_window: int = 1,
+        dedup_index: Optional[NearDuplicateIndex] = None,
+        program: Optional[str] = None,
+        api_base: Optional[str] = None,
+        provider: str = "openai",
+        lm_kwargs: Optional[Dict[str, Any]] = None,
+        max_connections: Optional[int] = None,
+        prescreen: bool = False,
+        prescreen_model: Optional[str] = None,
+        prescreen_threshold: float = 0.1,
     ):
         """
         Initialize the transcript processor
@@ -100,24 +471,175 @@ class TranscriptProcessor:
             fields: List of field definitions to extract
             model: Model to use (default: gpt-4o)
             include_reasoning: Whether to include reasoning in the output (default: True)
+            lm: Pre-configured DSPy LM to use instead of the OpenAI one (optional)
+            cassette: Path of a cassette file to record LM traffic to or replay
+                it from (optional)
+            cassette_mode: "record" or "replay" (default: replay)
+            output_mode: "text" for DSPy's field-marker format or "json" for
+                provider-enforced JSON schema output (default: text)
+            backend: "dspy" to call the LM through dspy.Predict or "openai" to
+                send pre-rendered prompts straight to an OpenAI-compatible
+                client; lm and cassette apply to the dspy backend only
+                (default: dspy)
+            client: OpenAI-compatible client for the openai backend
+                (default: an OpenAI client for api_key and api_base)
+            num_samples: Completions requested per field in a single call; with
+                more than one, values are voted on and confidence mixes the
+                agreement rate with logprob confidence (default: 1)
+            vote: "majority" counts samples, "weighted" sums their confidence
+                (default: majority)
+            relevance_top_k: If set, send each field only the k turns that best
+                match its name, description and example (BM25) plus their
+                neighbors, retrying with the full transcript when the field is
+                not found (default: None, always the full transcript)
+            relevance_window: Neighboring turns kept around each selected turn
+                (default: 1)
+            dedup_index: Near-duplicate index; fields of a near-duplicate of an
+                earlier transcript are reused when their evidence turns are
+                unchanged, and new transcripts are added to it (optional)
+            program: Path of a compiled program saved with save_program() to
+                load instead of the default prompts (optional)
+            api_base: Base URL of an OpenAI-compatible server such as vLLM or
+                llama.cpp, e.g. "http://localhost:8000/v1" (optional)
+            provider: LiteLLM provider prefix of the model for the dspy
+                backend, e.g. "hosted_vllm" (default: openai)
+            lm_kwargs: Extra dspy.LM arguments such as num_retries or
+                max_tokens; the openai backend sends the request parameters
+                among them (max_tokens, temperature, top_p, top_logprobs,
+                seed, stop, ...) with each call, applies num_retries to the
+                client it builds, ignores cache and rejects the rest (optional)
+            max_connections: Connections the openai backend's client keeps
+                open and alive; set it to at least the number of workers when
+                batching against a local server (default: httpx defaults)
+            prescreen: Ask once per transcript which fields are present, with
+                a yes/no answer per field, and skip the full extraction of
+                fields that are confidently absent (default: False)
+            prescreen_model: Cheaper model for the presence call; the
+                cassette does not apply to it (default: model)
+            prescreen_threshold: Fields whose top_logprobs probability of
+                being present is at most this are reported as not found with
+                the probability of absence as confidence (default: 0.1)
         """
-        self.lm = dspy.LM(f"openai/{model}", api_key=api_key, logprobs=True)
+        if vote not in VOTES:
+            raise ValueError(f"vote must be one of {VOTES}, got {vote!r}")
+        self.lm = lm or _build_lm(model, api_key, provider, api_base, lm_kwargs)
+        if cassette:
+            self.lm = CassetteLM(cassette, mode=cassette_mode, lm=self.lm)
         dspy.settings.configure(lm=self.lm)
+        self.adapter = _build_adapter(output_mode)
         self.include_reasoning = include_reasoning
         self.fields = fields
+        self.num_samples = _check_num_samples(num_samples)
+        self.vote = vote
+        if relevance_top_k is not None and relevance_top_k < 1:
+            raise ValueError("relevance_top_k must be at least 1")
+        self.relevance_top_k = relevance_top_k
+        self.relevance_window = relevance_window
+        self.dedup_index = dedup_index
+        try:
+            definitions = [FieldDefinition(**field_def) for field_def in fields]
+        except ValidationError as e:
+            raise ValueError(f"Invalid field definition: {str(e)}")
+
+        if backend == "openai":
+            client = _direct_client(
+                client, api_key, api_base, max_connections, lm_kwargs
+            )
 
         if include_reasoning:
-            self.field_extractor = dspy.Predict(FieldExtractionSignature)
+            signature = FieldExtractionSignature
         else:
-            self.field_extractor = dspy.Predict(FieldExtractionSignatureNoReasoning)
+            signature = FieldExtractionSignatureNoReasoning
+        self.field_extractor = _build_predictor(
+            signature, backend, self.adapter, model, client, lm_kwargs
+        )
 
-    def _format_transcript(self, messages: list) -> str:
-        """Convert messages list to formatted transcript string"""
+        # Enum and boolean fields get their own predictor whose output is
+        # constrained to the allowed values (a Literal, sent as a JSON schema
+        # enum in json mode) and which requests top_logprobs for confidence
+        self.allowed_values: Dict[str, List[str]] = {}
+        self.typed_extractors: Dict[str, Any] = {}
+        for definition in definitions:
+            allowed = _allowed_values(definition)
+            if allowed is None:
+                continue
+            self.allowed_values[definition.field_name] = allowed
+            self.typed_extractors[definition.field_name] = _build_predictor(
+                signature.with_updated_fields(
+                    "field_value", type_=Literal[tuple(allowed + [NOT_FOUND])]
+                ),
+                backend,
+                self.adapter,
+                model,
+                client,
+                lm_kwargs,
+                top_logprobs=TOP_LOGPROBS,
+            )
+
+        self.prescreen = prescreen
+        self.prescreen_threshold = prescreen_threshold
+        self.prescreen_model = prescreen_model
+        if prescreen:
+            self.prescreen_lm = self.lm
+            if prescreen_model and backend == "dspy":
+                self.prescreen_lm = _build_lm(
+                    prescreen_model, api_key, provider, api_base, lm_kwargs
+                )
+            self.presence_screener = _build_predictor(
+                _presence_signature(len(fields)),
+                backend,
+                self.adapter,
+                prescreen_model or model,
+                client,
+                lm_kwargs,
+                top_logprobs=TOP_LOGPROBS,
+            )
+
+        if program:
+            self.load_program(program)
+
+    def _predictors(self) -> Dict[str, Any]:
+        """Predictors making up the extraction program, by name"""
+        predictors = {"field_extractor": self.field_extractor}
+        for field_name, predictor in self.typed_extractors.items():
+            predictors[f"typed:{field_name}"] = predictor
+        if self.prescreen:
+            predictors["presence_screener"] = self.presence_screener
+        return predictors
+
+    def save_program(self, path: str) -> None:
+        """
+        Save the extraction program (instructions, field descriptions, demos)
+
+        Args:
+            path: Destination JSON file
+        """
+        save_program(path, "extractor", self.lm.model, self._predictors())
+
+    def load_program(self, path: str) -> None:
+        """
+        Load a program saved with save_program(), e.g. after offline optimization
+
+        Args:
+            path: Program JSON file
+
+        Raises:
+            ValueError: If the program was compiled for another model, field
+                set or signature
+        """
+        load_program(path, "extractor", self.lm.model, self._predictors())
+
+    def _format_turns(self, messages: list) -> List[str]:
+        """Convert messages list to one labelled line per turn"""
         transcript_parts = []
         for msg in messages:
             role_label = "Assistant" if msg["role"] == "assistant" else "User"
             transcript_parts.append(f"{role_label}: {msg['content']}")
-        return "\n".join(transcript_parts)
+        return transcript_parts
+
+    def _format_transcript(self, messages: list) -> str:
+        """Convert messages list to formatted transcript string"""
+        return "\n".join(self._format_turns(messages))
 
     def _calculate_confidence_from_logprobs(self, logprobs_data) -> float:
         """
@@ -129,28 +651,134 @@ class TranscriptProcessor:
         Returns:
             Confidence score between 0 and 1
         """
-        if not logprobs_data or not hasattr(logprobs_data, "content"):
-            return 0.5  # Default confidence if no logprobs available
+        return _mean_token_confidence(logprobs_data)
 
-        # Extract token logprobs and calculate average probability
-        token_probs = []
-        for token_logprob in logprobs_data.content:
-            if hasattr(token_logprob, "logprob") and token_logprob.logprob is not None:
-                # Convert log probability to probability
-                prob = math.exp(token_logprob.logprob)
-                token_probs.append(prob)
+    def _calculate_confidence_from_distribution(
+        self, logprobs_data, field_value: str, candidates: List[str]
+    ) -> Optional[float]:
+        """
+        Calculate confidence of a closed-set value from its top_logprobs
 
-        if not token_probs:
-            return 0.5
+        Args:
+            logprobs_data: Log probabilities of the value tokens
+            field_value: Value produced by the model
+            candidates: All values the model was allowed to produce
 
-        # Calculate average probability and normalize
-        avg_prob = sum(token_probs) / len(token_probs)
+        Returns:
+            Confidence score between 0 and 1, or None without top_logprobs
+        """
+        probability = value_distribution_confidence(
+            logprobs_data, field_value, candidates
+        )
+        if probability is None:
+            return None
+        return round(min(max(probability, 0.1), 0.99), 3)
 
-        # Apply sigmoid-like transformation to make confidence more meaningful
-        # This helps distinguish between high and low confidence predictions
-        confidence = min(max(avg_prob, 0.1), 0.99)
+    def _read_field_sample(
+        self, result: Any, field_def: Dict[str, Any]
+    ) -> Tuple[Any, float, Optional[str]]:
+        """
+        Read the value, confidence and reasoning of one completion
 
-        return round(confidence, 3)
+        Args:
+            result: Prediction with field_value, optional reasoning and logprobs
+            field_def: Field definition dictionary
+
+        Returns:
+            Tuple of (typed value or None if not found, confidence, reasoning)
+        """
+        field_value, confidence, logprobs, reasoning = self._read_field_value(
+            result, field_def
+        )
+        if confidence is None:
+            confidence = self._calculate_confidence_from_logprobs(logprobs)
+        return field_value, confidence, reasoning
+
+    def _read_field_value(
+        self, result: Any, field_def: Dict[str, Any]
+    ) -> Tuple[Any, Optional[float], Any, Optional[str]]:
+        """
+        Read one completion, leaving the token-average confidence to the caller
+
+        Args:
+            result: Prediction with field_value, optional reasoning and logprobs
+            field_def: Field definition dictionary
+
+        Returns:
+            Tuple of (typed value or None if not found, confidence or None
+            when it is the average probability of the returned logprobs,
+            logprobs of the value, reasoning)
+        """
+        field_type = field_def["field_type"]
+
+        # Extract the actual value and reasoning
+        field_value = result.field_value.strip()
+        reasoning = (
+            result.reasoning.strip()
+            if self.include_reasoning and hasattr(result, "reasoning")
+            else None
+        )
+
+        # Check if field was found
+        if field_value.upper() == "NOT_FOUND" or not field_value:
+            return None, 0.1, None, reasoning
+
+        # Calculate confidence from logprobs, restricted to the value
+        # tokens when the response is a JSON object or a typed field
+        logprobs = result.logprobs
+        if self.adapter is not None:
+            logprobs = select_json_field_logprobs(logprobs, "field_value")
+        elif field_type != "string":
+            logprobs = select_marker_field_logprobs(logprobs, "field_value")
+
+        confidence = None
+        allowed = self.allowed_values.get(field_def["field_name"])
+        if allowed is not None:
+            confidence = self._calculate_confidence_from_distribution(
+                logprobs, field_value, allowed + [NOT_FOUND]
+            )
+        typed_value = _parse_typed_value(field_value, field_type)
+        return typed_value, confidence, logprobs, reasoning
+
+    def _vote_field_samples(
+        self, read: List[Union[Tuple[Any, float, Optional[str]], Exception]]
+    ) -> Tuple[Any, float, Optional[str]]:
+        """
+        Aggregate several completions of one field by majority or weighted vote
+
+        Samples whose value cannot be read are left out of the vote but still
+        count towards the agreement rate. Ties go to the value seen first.
+
+        Args:
+            read: Each completion's (value, confidence, reasoning), or the
+                exception raised reading it
+
+        Returns:
+            Tuple of (winning value, mixed confidence, reasoning of its first sample)
+        """
+        votes: Dict[Any, List[Tuple[Any, float, Optional[str]]]] = {}
+        error = None
+        for candidate in read:
+            if isinstance(candidate, Exception):
+                error = candidate
+                continue
+            votes.setdefault(_vote_key(candidate[0]), []).append(candidate)
+        if not votes:
+            raise error
+
+        def weight(key: Any) -> float:
+            if self.vote == "majority":
+                return len(votes[key])
+            return sum(confidence for _, confidence, _ in votes[key])
+
+        winners = votes[max(votes, key=weight)]
+        field_value, _, reasoning = winners[0]
+        if field_value is None:
+            return None, 0.1, reasoning
+
+        agreement = len(winners) / len(read)
+        confidence = sum(confidence for _, confidence, _ in winners) / len(winners)
+        return field_value, _mix_agreement(agreement, confidence), reasoning
 
     def _extract_field(self, transcript: str, field_def: Dict[str, Any]) -> FieldResult:
         """
@@ -165,48 +793,89 @@ class TranscriptProcessor:
         """
         try:
             # Use DSPy to extract the field
-            result = self.field_extractor(
-                transcript=transcript,
-                field_name=field_def["field_name"],
-                field_type=field_def["field_type"],
-                format_example=field_def["format_example"],
-                field_description=field_def["field_description"],
+            samples = _predict(
+                self._field_predictor(field_def),
+                self.lm,
+                self.adapter,
+                n=self.num_samples,
+                **self._field_inputs(transcript, field_def),
             )
+            return self._field_result(samples, field_def)
 
-            # Extract the actual value and reasoning
-            field_value = result.field_value.strip()
-            reasoning = (
-                result.reasoning.strip()
-                if self.include_reasoning and hasattr(result, "reasoning")
-                else None
-            )
+        except Exception as e:
+            # Handle any errors gracefully
+            return self._field_error(e, field_def)
+
+    def _field_predictor(self, field_def: Dict[str, Any]) -> Any:
+        """Predictor of a field: its typed extractor or the generic one"""
+        return self.typed_extractors.get(field_def["field_name"], self.field_extractor)
+
+    def _field_inputs(
+        self, transcript: str, field_def: Dict[str, Any]
+    ) -> Dict[str, str]:
+        """Signature inputs for extracting a field from a transcript"""
+        field_type = field_def["field_type"]
+        return {
+            "transcript": transcript,
+            "field_name": field_def["field_name"],
+            "field_type": _FIELD_TYPE_HINTS.get(field_type, field_type),
+            "format_example": field_def["format_example"],
+            "field_description": field_def["field_description"],
+        }
+
+    def _field_result(
+        self, samples: List[Any], field_def: Dict[str, Any]
+    ) -> FieldResult:
+        """
+        Build the FieldResult of the completions of one extraction request
 
-            # Check if field was found
-            if field_value.upper() == "NOT_FOUND" or not field_value:
-                field_value = None
-                confidence = 0.1
-            else:
-                # Calculate confidence from logprobs
-                confidence = self._calculate_confidence_from_logprobs(result.logprobs)
+        Raises:
+            ValueError: If no completion can be read
+        """
+        read = []
+        for result in samples:
+            try:
+                read.append(self._read_field_sample(result, field_def))
+            except Exception as e:
+                read.append(e)
+        return self._field_result_from_read(read, field_def)
+
+    def _field_result_from_read(
+        self,
+        read: List[Union[Tuple[Any, float, Optional[str]], Exception]],
+        field_def: Dict[str, Any],
+    ) -> FieldResult:
+        """
+        Build the FieldResult of completions already read; see _vote_field_samples()
 
-            return FieldResult(
-                field_name=field_def["field_name"],
-                field_value=field_value,
-                field_confidence=confidence,
-                field_reason=reasoning,
-            )
+        Raises:
+            Exception: The error reading the completion when none can be read
+        """
+        if len(read) == 1:
+            if isinstance(read[0], Exception):
+                raise read[0]
+            field_value, confidence, reasoning = read[0]
+        else:
+            field_value, confidence, reasoning = self._vote_field_samples(read)
 
-        except Exception as e:
-            # Handle any errors gracefully
-            error_reason = (
-                f"Error during extraction: {str(e)}" if self.include_reasoning else None
-            )
-            return FieldResult(
-                field_name=field_def["field_name"],
-                field_value=None,
-                field_confidence=0.0,
-                field_reason=error_reason,
-            )
+        return FieldResult(
+            field_name=field_def["field_name"],
+            field_value=field_value,
+            field_confidence=confidence,
+            field_reason=reasoning,
+        )
+
+    def _field_error(self, error: Exception, field_def: Dict[str, Any]) -> FieldResult:
+        """FieldResult reported when extracting a field failed"""
+        error_reason = (
+            f"Error during extraction: {str(error)}" if self.include_reasoning else None
+        )
+        return FieldResult(
+            field_name=field_def["field_name"],
+            field_value=None,
+            field_confidence=0.0,
+            field_reason=error_reason,
+        )
 
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -216,24 +885,271 @@ class TranscriptProcessor:
             input_data: Dictionary containing messages
 
         Returns:
-            Dictionary with extracted fields and confidence scores
+            Dictionary with extracted fields and confidence scores; typed values
+            are JSON-compatible (dates as ISO 8601 strings)
         """
         try:
             validated_input = TranscriptInput(**input_data)
         except Exception as e:
             raise ValueError(f"Invalid input format: {str(e)}")
 
-        transcript = self._format_transcript(
+        return self._process_validated(validated_input).model_dump(mode="json")
+
+    def _process_validated(self, validated_input: TranscriptInput) -> TranscriptOutput:
+        """Extract all specified fields from an already validated input"""
+        turns = self._format_turns(
             [msg.model_dump() for msg in validated_input.messages]
         )
+        prepare, jobs, finish = self._field_jobs(turns)
+        if prepare is not None:
+            prepare()
+        return finish([job() for job in jobs])
+
+    def _field_jobs(
+        self,
+        turns: List[str],
+        fields: Optional[List[Dict[str, Any]]] = None,
+        prescreen: bool = True,
+        reuse: bool = True,
+    ) -> Tuple[
+        Optional[Callable[[], None]],
+        List[Callable[[], FieldResult]],
+        Callable[[List[FieldResult]], TranscriptOutput],
+    ]:
+        """
+        Split the extraction of a transcript into independent per-field calls
+
+        Args:
+            turns: Formatted transcript turns
+            fields: Field definitions to build jobs for (default: all fields
+                of the processor); the presence pre-screen still covers every
+                field, and only the answers of these fields are used
+            prescreen: Run the presence pre-screen if the processor has one
+                (default: True)
+            reuse: Reuse fields of a near-duplicate in the dedup index; when
+                False the index is not queried, and the result is added to it
+                (default: True)
+
+        Returns:
+            The presence pre-screen call (None without one), which must finish
+            before the jobs start so they can skip absent fields; one job per
+            field, in field order; and a function combining field results
+            into the TranscriptOutput and registering it with the dedup index
+        """
+        fields = self.fields if fields is None else fields
+        transcript = "\n".join(turns)
+        index = TurnIndex(turns) if self.relevance_top_k else None
+        match = None
+        if self.dedup_index is not None and reuse:
+            match = self.dedup_index.query(transcript)
+        absent: Dict[str, FieldResult] = {}
+
+        def screen() -> None:
+            absent.update(self._prescreen_absent(transcript))
+
+        def extract(field_def: Dict[str, Any]) -> FieldResult:
+            if match is not None:
+                field_result = self._reuse_field(match.value, turns, field_def)
+                if field_result is not None:
+                    return field_result
+            if field_def["field_name"] in absent:
+                return absent[field_def["field_name"]]
+            if index is None:
+                return self._extract_field(transcript, field_def)
+            return self._extract_relevant_field(index, transcript, field_def)
+
+        def finish(field_results: List[FieldResult]) -> TranscriptOutput:
+            output = TranscriptOutput(fields=field_results)
+            if self.dedup_index is not None and match is None:
+                self.dedup_index.add(
+                    transcript,
+                    self._dedup_value(turns, output.model_dump(mode="json")["fields"]),
+                )
+            return output
+
+        jobs = [lambda field_def=field_def: extract(field_def) for field_def in fields]
+        prepare = screen if self.prescreen and prescreen and match is None else None
+        return prepare, jobs, finish
+
+    def _presence_inputs(self, transcript: str) -> Dict[str, str]:
+        """Signature inputs of the presence pre-screen of a transcript"""
+        field_list = "\n".join(
+            f"field_{i}: {f['field_name']} ({f['field_type']}) - "
+            f"{f['field_description']}"
+            for i, f in enumerate(self.fields)
+        )
+        return {"transcript": transcript, "field_list": field_list}
+
+    def _prescreen_absent(self, transcript: str) -> Dict[str, FieldResult]:
+        """
+        Run the presence pre-screen over a transcript
+
+        Fields without top_logprobs for their answer count as uncertain and
+        are extracted; so are all fields if the pre-screen call fails.
+
+        Args:
+            transcript: Formatted conversation transcript
+
+        Returns:
+            NOT_FOUND FieldResults of the fields that are confidently absent
+        """
+        try:
+            (prediction,) = _predict(
+                self.presence_screener,
+                self.prescreen_lm,
+                self.adapter,
+                **self._presence_inputs(transcript),
+            )
+        except Exception:
+            return {}
+
+        absent = {}
+        for i, field_def in enumerate(self.fields):
+            key = f"field_{i}"
+            if self.adapter is not None:
+                logprobs = select_json_field_logprobs(prediction.logprobs, key)
+            else:
+                logprobs = select_marker_field_logprobs(prediction.logprobs, key)
+            answer = getattr(prediction, key, None)
+            probability = value_distribution_confidence(logprobs, answer, ["yes", "no"])
+            if probability is None:
+                continue
+            present = probability if answer == "yes" else 1.0 - probability
+            if present > self.prescreen_threshold:
+                continue
+            absent[field_def["field_name"]] = FieldResult(
+                field_name=field_def["field_name"],
+                field_value=None,
+                field_confidence=round(min(max(1.0 - present, 0.1), 0.99), 3),
+                field_reason=(
+                    f"Skipped by presence pre-screen (P(present)={present:.3f})"
+                    if self.include_reasoning
+                    else None
+                ),
+            )
+        return absent
+
+    def _dedup_value(
+        self, turns: List[str], fields: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Value stored in the dedup index for a transcript's field results
+
+        Besides the results, each field keeps a digest of its definition and
+        digests of its evidence turns, so no transcript text is stored.
+
+        Args:
+            turns: Formatted transcript turns
+            fields: JSON-dumped FieldResults
+
+        Returns:
+            Dictionary with "fields", "definitions" and "evidence"
+        """
+        definitions = {f["field_name"]: f for f in self.fields}
+        return {
+            "fields": fields,
+            "definitions": {
+                f["field_name"]: _definition_digest(definitions[f["field_name"]])
+                for f in fields
+            },
+            "evidence": {
+                f["field_name"]: evidence_digests(
+                    turns, f["field_value"], field_query(definitions[f["field_name"]])
+                )
+                for f in fields
+            },
+        }
+
+    def _reuse_field(
+        self, prior: Dict[str, Any], turns: List[str], field_def: Dict[str, Any]
+    ) -> Optional[FieldResult]:
+        """
+        Reuse a near-duplicate transcript's result for a field whose definition
+        and evidence turns are the same in both transcripts
+
+        Args:
+            prior: Value stored in the dedup index (see _dedup_value())
+            turns: Formatted turns of the current transcript
+            field_def: Field definition dictionary
+
+        Returns:
+            The earlier FieldResult, or None if the field must be extracted
+        """
+        name = field_def["field_name"]
+        prior_field = next(
+            (f for f in prior["fields"] if f["field_name"] == name), None
+        )
+        # Failed extractions (confidence 0.0) are never reused
+        if prior_field is None or not prior_field["field_confidence"]:
+            return None
+        # Nor are results extracted under another definition of the field
+        if prior.get("definitions", {}).get(name) != _definition_digest(field_def):
+            return None
+
+        value = prior_field["field_value"]
+        evidence = evidence_digests(turns, value, field_query(field_def))
+        if prior["evidence"].get(name) != evidence:
+            return None
+        return FieldResult(**prior_field)
+
+    def _extract_relevant_field(
+        self, index: TurnIndex, transcript: str, field_def: Dict[str, Any]
+    ) -> FieldResult:
+        """
+        Extract a field from its most relevant turns, falling back to the
+        full transcript when it is not found there
+
+        Args:
+            index: Relevance index over the transcript turns
+            transcript: Full formatted transcript
+            field_def: Field definition dictionary
+
+        Returns:
+            FieldResult with extracted value and confidence
+        """
+        indices = index.select(
+            field_query(field_def), self.relevance_top_k, self.relevance_window
+        )
+        if not indices or len(indices) == len(index.turns):
+            return self._extract_field(transcript, field_def)
 
-        field_results = []
-        for field_def in self.fields:
-            field_result = self._extract_field(transcript, field_def)
-            field_results.append(field_result)
+        field_result = self._extract_field(index.context(indices), field_def)
+        if field_result.field_value is None:
+            return self._extract_field(transcript, field_def)
+        return field_result
 
-        output = TranscriptOutput(fields=field_results)
-        return output.model_dump()
+    def process_batch(
+        self, inputs: Iterable[Dict[str, Any]], max_workers: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Process many transcripts concurrently
+
+        Args:
+            inputs: Iterable of dictionaries containing messages
+            max_workers: Number of transcripts processed in parallel (default: 8)
+
+        Returns:
+            List of extraction results, in the same order as inputs
+        """
+        return list(self.iter_process(inputs, max_workers))
+
+    def iter_process(
+        self, inputs: Iterable[Dict[str, Any]], max_workers: int = 8
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Process a stream of transcripts concurrently, yielding results in order
+
+        Inputs are consumed lazily, so this can be fed directly from the
+        streaming readers in transtype.readers without loading a whole export.
+
+        Args:
+            inputs: Iterable of dictionaries containing messages
+            max_workers: Number of transcripts processed in parallel (default: 8)
+
+        Yields:
+            Extraction results, in the same order as inputs
+        """
+        return _map_concurrent(self.process, inputs, max_workers)
 
     def process_json(self, json_input: str) -> str:
         """
@@ -254,6 +1170,32 @@ class TranscriptProcessor:
         except Exception as e:
             raise RuntimeError(f"Processing error: {str(e)}")
 
+    def process_json_bytes(
+        self, payload: Union[bytes, str], indent: Optional[int] = None
+    ) -> bytes:
+        """
+        Process a JSON payload and return the JSON result as bytes
+
+        Validation and serialization run directly between JSON and the Pydantic
+        models, skipping the intermediate dictionaries of process_json. Output
+        is compact unless indent is given.
+
+        Args:
+            payload: JSON document (bytes or str) with the transcript messages
+            indent: Indentation for pretty-printed output (default: None)
+
+        Returns:
+            UTF-8 encoded JSON with extraction results
+        """
+        try:
+            validated_input = _validate_json(TranscriptInput, payload)
+            output = self._process_validated(validated_input)
+            return to_json(output, indent=indent)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Processing error: {str(e)}")
+
 
 class AssertsEvaluator:
     """Evaluator class for assessing conversations against evaluation steps"""
@@ -278,6 +1220,19 @@ Be precise and reference specific parts of the conversation in your reasoning.""
         include_reasoning: bool = True,
         prompt_template: Optional[str] = None,
         threshold: float = 0.5,
+        lm: Optional[dspy.LM] = None,
+        cassette: Optional[str] = None,
+        cassette_mode: str = "replay",
+        output_mode: str = "text",
+        backend: str = "dspy",
+        client: Optional[Any] = None,
+        num_samples: int = 1,
+        dedup_index: Optional[NearDuplicateIndex] = None,
+        program: Optional[str] = None,
+        api_base: Optional[str] = None,
+        provider: str = "openai",
+        lm_kwargs: Optional[Dict[str, Any]] = None,
+        max_connections: Optional[int] = None,
     ):
         """
         Initialize the assertion evaluator
@@ -289,19 +1244,88 @@ Be precise and reference specific parts of the conversation in your reasoning.""
             include_reasoning: Whether to include reasoning in the output (default: True)
             prompt_template: Custom prompt template (optional)
             threshold: Threshold for success determination (default: 0.5)
+            lm: Pre-configured DSPy LM to use instead of the OpenAI one (optional)
+            cassette: Path of a cassette file to record LM traffic to or replay
+                it from (optional)
+            cassette_mode: "record" or "replay" (default: replay)
+            output_mode: "text" for DSPy's field-marker format or "json" for
+                provider-enforced JSON schema output (default: text)
+            backend: "dspy" to call the LM through dspy.Predict or "openai" to
+                send pre-rendered prompts straight to an OpenAI-compatible
+                client; lm and cassette apply to the dspy backend only
+                (default: dspy)
+            client: OpenAI-compatible client for the openai backend
+                (default: an OpenAI client for api_key and api_base)
+            num_samples: Completions requested in a single call; with more than
+                one, weighted scores are averaged and confidence mixes their
+                agreement with logprob confidence (default: 1)
+            dedup_index: Near-duplicate index; the result of a near-duplicate of
+                an earlier transcript is returned without an LM call, and new
+                transcripts are added to it (optional)
+            program: Path of a compiled program saved with save_program() to
+                load instead of the default prompts (optional)
+            api_base: Base URL of an OpenAI-compatible server such as vLLM or
+                llama.cpp, e.g. "http://localhost:8000/v1" (optional)
+            provider: LiteLLM provider prefix of the model for the dspy
+                backend, e.g. "hosted_vllm" (default: openai)
+            lm_kwargs: Extra dspy.LM arguments such as num_retries or
+                max_tokens; the openai backend sends the request parameters
+                among them (max_tokens, temperature, top_p, top_logprobs,
+                seed, stop, ...) with each call, applies num_retries to the
+                client it builds, ignores cache and rejects the rest (optional)
+            max_connections: Connections the openai backend's client keeps
+                open and alive; set it to at least the number of workers when
+                batching against a local server (default: httpx defaults)
         """
-        self.lm = dspy.LM(f"openai/{model}", api_key=api_key, logprobs=True)
+        self.lm = lm or _build_lm(model, api_key, provider, api_base, lm_kwargs)
+        if cassette:
+            self.lm = CassetteLM(cassette, mode=cassette_mode, lm=self.lm)
         dspy.settings.configure(lm=self.lm)
+        self.adapter = _build_adapter(output_mode)
+        self.num_samples = _check_num_samples(num_samples)
+        self.dedup_index = dedup_index
         self.evaluation_steps = evaluation_steps
         self.include_reasoning = include_reasoning
         self.prompt_template = prompt_template or self.DEFAULT_PROMPT_TEMPLATE
         self.threshold = threshold
 
+        if backend == "openai":
+            client = _direct_client(
+                client, api_key, api_base, max_connections, lm_kwargs
+            )
+
         # Initialize appropriate evaluator based on reasoning requirement
         if include_reasoning:
-            self.evaluator = dspy.Predict(AssertionEvaluationSignature)
+            signature = AssertionEvaluationSignature
         else:
-            self.evaluator = dspy.Predict(AssertionEvaluationSignatureNoReasoning)
+            signature = AssertionEvaluationSignatureNoReasoning
+        self.evaluator = _build_predictor(
+            signature, backend, self.adapter, model, client, lm_kwargs
+        )
+
+        if program:
+            self.load_program(program)
+
+    def save_program(self, path: str) -> None:
+        """
+        Save the evaluation program (instructions, field descriptions, demos)
+
+        Args:
+            path: Destination JSON file
+        """
+        save_program(path, "evaluator", self.lm.model, {"evaluator": self.evaluator})
+
+    def load_program(self, path: str) -> None:
+        """
+        Load a program saved with save_program(), e.g. after offline optimization
+
+        Args:
+            path: Program JSON file
+
+        Raises:
+            ValueError: If the program was compiled for another model or signature
+        """
+        load_program(path, "evaluator", self.lm.model, {"evaluator": self.evaluator})
 
     def _format_transcript(self, messages: list) -> str:
         """Convert messages list to formatted transcript string"""
@@ -332,66 +1356,108 @@ Be precise and reference specific parts of the conversation in your reasoning.""
 
     def _calculate_confidence_from_logprobs(self, logprobs_data) -> float:
         """Calculate confidence score from log probabilities"""
-        if not logprobs_data or not hasattr(logprobs_data, "content"):
-            return 0.5
+        return _mean_token_confidence(logprobs_data)
 
-        token_probs = []
-        for token_logprob in logprobs_data.content:
-            if hasattr(token_logprob, "logprob") and token_logprob.logprob is not None:
-                prob = math.exp(token_logprob.logprob)
-                token_probs.append(prob)
+    def _read_score_sample(self, result: Any) -> Tuple[Any, Any, Optional[str]]:
+        """
+        Read the raw score, score logprobs and reasoning of one completion
+
+        Args:
+            result: Prediction with score, optional reason and logprobs
+
+        Returns:
+            Tuple of (raw score, logprobs of the score, reasoning)
+        """
+        reasoning = (
+            result.reason.strip()
+            if self.include_reasoning and hasattr(result, "reason")
+            else None
+        )
+
+        logprobs = result.logprobs
+        if self.adapter is not None:
+            logprobs = select_json_field_logprobs(logprobs, "score")
+        return result.score, logprobs, reasoning
+
+    def _score_sample(self, result: Any) -> Tuple[float, float, Optional[str]]:
+        """
+        Score one completion
 
-        if not token_probs:
-            return 0.5
+        Args:
+            result: Prediction with score, optional reason and logprobs
 
-        avg_prob = sum(token_probs) / len(token_probs)
-        confidence = min(max(avg_prob, 0.1), 0.99)
-        return round(confidence, 3)
+        Returns:
+            Tuple of (weighted score from 0 to 10, confidence, reasoning)
+        """
+        raw_score, logprobs, reasoning = self._read_score_sample(result)
+        weighted_score, confidence = self._generate_weighted_summed_score(
+            raw_score, logprobs
+        )
+        return weighted_score, confidence, reasoning
+
+    def _average_scores(
+        self, scored: List[Tuple[float, float, Optional[str]]]
+    ) -> Tuple[float, float, Optional[str]]:
+        """
+        Average the scores of several completions
+
+        Agreement is one minus the standard deviation of the scores relative to
+        its maximum on the 0-10 scale (5); the reasoning is taken from the
+        sample closest to the mean.
+
+        Args:
+            scored: (weighted score, confidence, reasoning) per completion
+
+        Returns:
+            Tuple of (mean score from 0 to 10, mixed confidence, reasoning)
+        """
+        scores = [score for score, _, _ in scored]
+        mean_score = sum(scores) / len(scores)
+        agreement = 1.0 - min(statistics.pstdev(scores) / 5.0, 1.0)
+        confidence = sum(confidence for _, confidence, _ in scored) / len(scored)
+        _, _, reasoning = min(scored, key=lambda s: abs(s[0] - mean_score))
+        return mean_score, _mix_agreement(agreement, confidence), reasoning
 
     def _generate_weighted_summed_score(
         self, raw_score: int, logprobs_data
     ) -> tuple[float, float]:
         """Generate weighted score using logprobs similar to deepeval's conversationalGEval"""
         try:
-            if not logprobs_data or not hasattr(logprobs_data, "content"):
+            generated_logprobs = token_entries(logprobs_data)
+            if not generated_logprobs:
                 return float(raw_score), 0.5
 
-            generated_logprobs = logprobs_data.content
             score_logprobs = None
 
             for token_logprobs in generated_logprobs:
-                if hasattr(token_logprobs, "token") and token_logprobs.token == str(
-                    raw_score
-                ):
+                if (_get(token_logprobs, "token") or "").strip() == str(raw_score):
                     score_logprobs = token_logprobs
                     break
 
-            if not score_logprobs or not hasattr(score_logprobs, "top_logprobs"):
+            top_logprobs = _get(score_logprobs, "top_logprobs")
+            if not score_logprobs or not top_logprobs:
                 return float(raw_score), 0.5
 
             token_linear_probability = {}
             sum_linear_probability = 0
             min_logprob = math.log(0.01)
 
-            for token_logprob in score_logprobs.top_logprobs:
-                if not hasattr(token_logprob, "logprob"):
+            for token_logprob in top_logprobs:
+                logprob = _get(token_logprob, "logprob")
+                if logprob is None:
                     continue
 
-                logprob = token_logprob.logprob
-
                 if logprob < min_logprob:
                     continue
 
-                if (
-                    not hasattr(token_logprob, "token")
-                    or not token_logprob.token.replace(".", "").isdecimal()
-                ):
+                token = (_get(token_logprob, "token") or "").strip()
+                if not token.replace(".", "").isdecimal():
                     continue
 
                 linear_prob = math.exp(logprob)
 
                 try:
-                    token_score = float(token_logprob.token)
+                    token_score = float(token)
                     if token_score < 0 or token_score > 10:
                         continue
                 except ValueError:
@@ -411,18 +1477,12 @@ Be precise and reference specific parts of the conversation in your reasoning.""
             )
             weighted_summed_score = sum_of_weighted_scores / sum_linear_probability
 
-            confidence = (
-                sum_linear_probability
-                / sum(
-                    math.exp(token_logprob.logprob)
-                    for token_logprob in score_logprobs.top_logprobs
-                    if (
-                        hasattr(token_logprob, "logprob")
-                        and token_logprob.logprob >= min_logprob
-                    )
+            confidence = sum_linear_probability / sum(
+                math.exp(logprob)
+                for logprob in (
+                    _get(token_logprob, "logprob") for token_logprob in top_logprobs
                 )
-                if score_logprobs.top_logprobs
-                else 0.5
+                if logprob is not None and logprob >= min_logprob
             )
 
             return weighted_summed_score, round(min(max(confidence, 0.1), 0.99), 3)
@@ -434,24 +1494,7 @@ Be precise and reference specific parts of the conversation in your reasoning.""
         self, messages: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """Normalize messages to role/content format"""
-        normalized = []
-        for msg in messages:
-            if "speaker" in msg and "text" in msg:
-                # Convert speaker/text format to role/content format
-                role = (
-                    "user"
-                    if msg["speaker"].lower() in ["user", "caller"]
-                    else "assistant"
-                )
-                normalized.append({"role": role, "content": msg["text"]})
-            elif "role" in msg and "content" in msg:
-                # Already in correct format
-                normalized.append(msg)
-            else:
-                raise ValueError(
-                    f"Invalid message format: {msg}. Expected either 'role'/'content' or 'speaker'/'text' fields."
-                )
-        return normalized
+        return [normalize_message(msg) for msg in messages]
 
     def evaluate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -473,51 +1516,104 @@ Be precise and reference specific parts of the conversation in your reasoning.""
         except Exception as e:
             raise ValueError(f"Invalid input format: {str(e)}")
 
+        return self._evaluate_validated(validated_input).model_dump()
+
+    def _evaluate_validated(self, validated_input: AssertionInput) -> AssertionOutput:
+        """Evaluate an already validated input against the evaluation steps"""
         # Convert messages to transcript format
         transcript = self._format_transcript(
             [msg.model_dump() for msg in validated_input.messages]
         )
+        return self._evaluate_transcript(transcript)
 
-        # Format evaluation steps
-        formatted_steps = self._format_evaluation_steps()
+    def _evaluate_transcript(self, transcript: str) -> AssertionOutput:
+        """Evaluate a formatted transcript against the evaluation steps"""
+        if self.dedup_index is not None:
+            match = self.dedup_index.query(transcript)
+            if match is not None:
+                return AssertionOutput(**match.value)
 
         try:
-            result = self.evaluator(
-                transcript=transcript, evaluation_steps=formatted_steps
+            samples = _predict(
+                self.evaluator,
+                self.lm,
+                self.adapter,
+                n=self.num_samples,
+                transcript=transcript,
+                evaluation_steps=self._format_evaluation_steps(),
             )
+            output = self._assertion_output(samples)
+            if self.dedup_index is not None:
+                self.dedup_index.add(transcript, output.model_dump(mode="json"))
+            return output
 
-            raw_score = result.score
-            reasoning = (
-                result.reason.strip()
-                if self.include_reasoning and hasattr(result, "reason")
-                else None
-            )
+        except Exception as e:
+            return self._assertion_error(e)
 
-            weighted_score, confidence = self._generate_weighted_summed_score(
-                raw_score, result.logprobs
-            )
-            normalized_score = max(0.0, min(1.0, weighted_score / 10.0))
-            success = normalized_score >= self.threshold
-
-            assertion_result = AssertionResult(
-                score=round(normalized_score, 3),
-                confidence=confidence,
-                reason=reasoning,
-                success=success,
-            )
+    def _assertion_output(self, samples: List[Any]) -> AssertionOutput:
+        """Build the AssertionOutput of the completions of one evaluation request"""
+        return self._assertion_from_scores(
+            [self._score_sample(result) for result in samples]
+        )
 
-            output = AssertionOutput(result=assertion_result)
-            return output.model_dump()
+    def _assertion_from_scores(
+        self, scored: List[Tuple[float, float, Optional[str]]]
+    ) -> AssertionOutput:
+        """Build an AssertionOutput from each completion's scored tuple"""
+        if len(scored) == 1:
+            weighted_score, confidence, reasoning = scored[0]
+        else:
+            weighted_score, confidence, reasoning = self._average_scores(scored)
+        normalized_score = max(0.0, min(1.0, weighted_score / 10.0))
+        success = normalized_score >= self.threshold
+
+        assertion_result = AssertionResult(
+            score=round(normalized_score, 3),
+            confidence=confidence,
+            reason=reasoning,
+            success=success,
+        )
+        return AssertionOutput(result=assertion_result)
 
-        except Exception as e:
-            error_reason = (
-                f"Error during evaluation: {str(e)}" if self.include_reasoning else None
-            )
-            assertion_result = AssertionResult(
-                score=0.0, confidence=0.0, reason=error_reason, success=False
-            )
-            output = AssertionOutput(result=assertion_result)
-            return output.model_dump()
+    def _assertion_error(self, error: Exception) -> AssertionOutput:
+        """AssertionOutput reported when an evaluation failed"""
+        error_reason = (
+            f"Error during evaluation: {str(error)}" if self.include_reasoning else None
+        )
+        assertion_result = AssertionResult(
+            score=0.0, confidence=0.0, reason=error_reason, success=False
+        )
+        return AssertionOutput(result=assertion_result)
+
+    def evaluate_batch(
+        self, inputs: Iterable[Dict[str, Any]], max_workers: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate many transcripts concurrently
+
+        Args:
+            inputs: Iterable of dictionaries containing messages lists
+            max_workers: Number of transcripts evaluated in parallel (default: 8)
+
+        Returns:
+            List of evaluation results, in the same order as inputs
+        """
+        return list(self.iter_evaluate(inputs, max_workers))
+
+    def iter_evaluate(
+        self, inputs: Iterable[Dict[str, Any]], max_workers: int = 8
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Evaluate a stream of transcripts concurrently, yielding results in order
+
+        Args:
+            inputs: Iterable of dictionaries containing messages lists
+            max_workers: Number of transcripts evaluated in parallel (default: 8)
+
+        Yields:
+            Evaluation results, in the same order as inputs
+        """
+        return _map_concurrent(self.evaluate, inputs, max_workers)
 
     def evaluate_json(self, json_input: str) -> str:
         """
@@ -537,3 +1633,42 @@ Be precise and reference specific parts of the conversation in your reasoning.""
             raise ValueError(f"Invalid JSON input: {str(e)}")
         except Exception as e:
             raise RuntimeError(f"Evaluation error: {str(e)}")
+
+    def evaluate_json_bytes(
+        self, payload: Union[bytes, str], indent: Optional[int] = None
+    ) -> bytes:
+        """
+        Evaluate a JSON payload and return the JSON result as bytes
+
+        Role/content payloads are validated straight from JSON; speaker/text
+        payloads are decoded once and normalized before validation.
+
+        Args:
+            payload: JSON document (bytes or str) with the transcript messages
+            indent: Indentation for pretty-printed output (default: None)
+
+        Returns:
+            UTF-8 encoded JSON with evaluation results
+        """
+        try:
+            try:
+                validated_input = AssertionInput.model_validate_json(payload)
+            except ValidationError:
+                try:
+                    input_data = _loads(payload)
+                except ValueError as e:
+                    raise ValueError(f"Invalid JSON input: {str(e)}")
+                if isinstance(input_data, dict) and "messages" in input_data:
+                    input_data["messages"] = self._normalize_messages(
+                        input_data["messages"]
+                    )
+                try:
+                    validated_input = AssertionInput.model_validate(input_data)
+                except ValidationError as e:
+                    raise ValueError(f"Invalid input format: {str(e)}")
+            output = self._evaluate_validated(validated_input)
+            return to_json(output, indent=indent)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Evaluation error: {str(e)}")
@@ -0,0 +1,103 @@
+"""
+Save and load compiled extractor/evaluator programs
+
+A program file holds the dspy.Predict state (instructions, field
+descriptions and demos, e.g. from an offline optimizer) of every predictor
+of a TranscriptProcessor or AssertsEvaluator. Each entry records a version
+hash of the signature structure it was compiled for, and the file records
+the model, so a stale or mismatched artifact is rejected at load time
+instead of silently changing prompts.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict
+
+import dspy
+
+PROGRAM_FORMAT = 1
+
+
+def signature_version(signature: Any) -> str:
+    """
+    Hash the structure of a signature: field names, roles and types
+
+    Instructions and field descriptions are excluded since they are what
+    optimization changes.
+    """
+    fields = [
+        [
+            name,
+            "input" if name in signature.input_fields else "output",
+            repr(field.annotation),
+        ]
+        for name, field in signature.fields.items()
+    ]
+    return hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()[:16]
+
+
+def save_program(path: str, kind: str, model: str, predictors: Dict[str, Any]) -> None:
+    """
+    Write the state of a set of predictors to a JSON program file
+
+    Args:
+        path: Destination file
+        kind: Program kind ("extractor" or "evaluator")
+        model: Model the program was compiled for
+        predictors: Predictors by name (dspy.Predict or DirectPredictor)
+    """
+    program = {
+        "format": PROGRAM_FORMAT,
+        "kind": kind,
+        "model": model,
+        "dspy_version": dspy.__version__,
+        "predictors": {
+            name: {
+                "signature_version": signature_version(predictor.signature),
+                "state": predictor.dump_state(),
+            }
+            for name, predictor in predictors.items()
+        },
+    }
+    with open(os.fspath(path), "w", encoding="utf-8") as f:
+        json.dump(program, f, indent=2)
+
+
+def load_program(path: str, kind: str, model: str, predictors: Dict[str, Any]) -> None:
+    """
+    Apply a program file to a set of predictors in place
+
+    Args:
+        path: File written by save_program()
+        kind: Expected program kind
+        model: Model of the loading processor or evaluator
+        predictors: Predictors by name; every one must be present in the file
+
+    Raises:
+        ValueError: If the file is of another kind, model or format, or a
+            predictor is missing or was compiled for a different signature
+    """
+    with open(os.fspath(path), "r", encoding="utf-8") as f:
+        program = json.load(f)
+
+    if program.get("format") != PROGRAM_FORMAT:
+        raise ValueError(f"Unsupported program format: {program.get('format')}")
+    if program.get("kind") != kind:
+        raise ValueError(f"Expected a {kind} program, got {program.get('kind')}")
+    if program.get("model") != model:
+        raise ValueError(
+            f"Program was compiled for {program.get('model')}, not {model}"
+        )
+
+    entries = program.get("predictors", {})
+    for name, predictor in predictors.items():
+        entry = entries.get(name)
+        if entry is None:
+            raise ValueError(f"Program has no predictor {name!r}")
+        if entry["signature_version"] != signature_version(predictor.signature):
+            raise ValueError(
+                f"Program predictor {name!r} was compiled for a different signature"
+            )
+    for name, predictor in predictors.items():
+        predictor.load_state(entries[name]["state"])
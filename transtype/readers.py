@@ -0,0 +1,414 @@
+"""
+Streaming readers for transcript exports
+
+Each reader parses its source incrementally and produces messages in the
+role/content shape expected by TranscriptInput and AssertionInput, so the
+results can be passed straight to ``process_batch()`` / ``evaluate_batch()``.
+orjson is used for JSON decoding when it is installed.
+"""
+
+import gzip
+import io
+import itertools
+import json
+import os
+import re
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Union
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+    _loads = json.loads
+
+Source = Union[str, "os.PathLike[str]", IO[bytes]]
+
+USER_SPEAKERS = ("user", "caller")
+
+_TIMING_PATTERN = re.compile(r"\d+:\d{2}(?::\d{2})?[.,]\d{3}\s+-->")
+_VOICE_PATTERN = re.compile(
+    r"<v(?:\.[\w.-]+)?\s+([^>]+)>(.*?)(?:</v>|(?=<v[\s.])|$)", re.DOTALL
+)
+_PREFIX_PATTERN = re.compile(r"^\s*(?:\[([^\]]{1,40})\]|([\w .'-]{1,40}?)):\s+(.*)$")
+# Unbracketed prefixes that are not a known label must look like a short name
+_NAME_PATTERN = re.compile(r"^[A-Z][\w.'-]*(?: (?:[A-Z][\w.'-]*|\d+)){0,2}$")
+_ROLE_LABELS = USER_SPEAKERS + ("agent", "assistant")
+_TAG_PATTERN = re.compile(r"</?[^>]+>")
+
+
+def speaker_to_role(
+    speaker: str, speaker_roles: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Map a speaker label to a message role
+
+    Args:
+        speaker: Speaker label from the source (e.g. "Caller", "spk_0")
+        speaker_roles: Explicit label to role mapping, matched case-insensitively
+
+    Returns:
+        "user" or "assistant"; unmapped labels follow AssertsEvaluator's rule
+        of treating "user"/"caller" as the user and everyone else as the agent
+    """
+    label = speaker.strip().lower()
+    if speaker_roles:
+        for name, role in speaker_roles.items():
+            if name.lower() == label:
+                return role
+    return "user" if label in USER_SPEAKERS else "assistant"
+
+
+def normalize_message(
+    msg: Dict[str, Any], speaker_roles: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Normalize one message to role/content format
+
+    Args:
+        msg: Message with either 'role'/'content' or 'speaker'/'text' fields
+        speaker_roles: Explicit speaker label to role mapping (optional)
+
+    Returns:
+        Message dictionary with 'role' and 'content'
+    """
+    if "speaker" in msg and "text" in msg:
+        return {
+            "role": speaker_to_role(msg["speaker"], speaker_roles),
+            "content": msg["text"],
+        }
+    if "role" in msg and "content" in msg:
+        return msg
+    raise ValueError(
+        f"Invalid message format: {msg}. Expected either 'role'/'content' or 'speaker'/'text' fields."
+    )
+
+
+def _open_binary(source: Source) -> IO[bytes]:
+    """Open a path (optionally gzip-compressed) or pass through a binary file"""
+    if hasattr(source, "read"):
+        return source
+    path = os.fspath(source)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _open_text(source: Source) -> IO[str]:
+    """Open a source for line-by-line text reading"""
+    return io.TextIOWrapper(_open_binary(source), encoding="utf-8-sig")
+
+
+def _merge_turns(
+    turns: Iterator[Dict[str, Any]], merge_consecutive: bool
+) -> Iterator[Dict[str, Any]]:
+    """Join consecutive messages of the same role into a single turn"""
+    if not merge_consecutive:
+        yield from turns
+        return
+    current = None
+    for turn in turns:
+        if current is not None and current["role"] == turn["role"]:
+            current = {
+                "role": current["role"],
+                "content": f"{current['content']} {turn['content']}",
+            }
+            continue
+        if current is not None:
+            yield current
+        current = turn
+    if current is not None:
+        yield current
+
+
+def iter_jsonl(
+    source: Source,
+    messages_key: str = "messages",
+    group_by: Optional[str] = None,
+    speaker_roles: Optional[Dict[str, str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream transcripts from an NDJSON export
+
+    Two layouts are supported. By default every line holds one transcript with
+    a list of messages under ``messages_key``. With ``group_by``, every line is
+    a single utterance and consecutive lines sharing the ``group_by`` value
+    form one transcript.
+
+    Args:
+        source: Path (".gz" is decompressed on the fly) or binary file object
+        messages_key: Key holding the message list in transcript-per-line files
+        group_by: Key identifying the transcript in utterance-per-line files
+        speaker_roles: Explicit speaker label to role mapping (optional)
+
+    Yields:
+        Input dictionaries with "messages"; other top-level keys of the line
+        (or the group_by key) are kept, which the input models ignore
+    """
+    stream = _open_binary(source)
+    try:
+        if group_by is None:
+            for line in stream:
+                if not line.strip():
+                    continue
+                record = _loads(line)
+                record[messages_key] = [
+                    normalize_message(m, speaker_roles) for m in record[messages_key]
+                ]
+                if messages_key != "messages":
+                    record["messages"] = record.pop(messages_key)
+                yield record
+            return
+
+        group_id = None
+        messages: List[Dict[str, Any]] = []
+        for line in stream:
+            if not line.strip():
+                continue
+            record = _loads(line)
+            if messages and record.get(group_by) != group_id:
+                yield {group_by: group_id, "messages": messages}
+                messages = []
+            group_id = record.get(group_by)
+            messages.append(normalize_message(record, speaker_roles))
+        if messages:
+            yield {group_by: group_id, "messages": messages}
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def _is_speaker_label(
+    label: str, known: Set[str], speaker_roles: Optional[Dict[str, str]]
+) -> bool:
+    """Whether an unbracketed "label:" prefix names a speaker"""
+    lowered = label.lower()
+    if lowered in _ROLE_LABELS or lowered in known:
+        return True
+    if speaker_roles and any(name.lower() == lowered for name in speaker_roles):
+        return True
+    return bool(_NAME_PATTERN.match(label))
+
+
+def _cue_messages(
+    lines: List[str],
+    last_speaker: str,
+    known: Set[str],
+    speaker_roles: Optional[Dict[str, str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Split the text lines of one subtitle cue into speaker/text utterances
+
+    A "label:" prefix only starts a new utterance when it is bracketed, a role
+    word, a speaker_roles label, a speaker already seen in the file (tracked
+    in known) or a short capitalized name; other lines, such as sentences
+    containing a colon, continue the current speaker's turn.
+    """
+    text = "\n".join(lines)
+    voices = _VOICE_PATTERN.findall(text)
+    if voices:
+        for speaker, content in voices:
+            content = " ".join(_TAG_PATTERN.sub("", content).split())
+            known.add(speaker.strip().lower())
+            if content:
+                yield {"speaker": speaker.strip(), "text": content}
+        return
+
+    speaker, parts = last_speaker, []
+    for line in lines:
+        line = _TAG_PATTERN.sub("", line).lstrip("- ").strip()
+        match = _PREFIX_PATTERN.match(line)
+        if match and (
+            match.group(1) is not None
+            or _is_speaker_label(match.group(2).strip(), known, speaker_roles)
+        ):
+            if parts:
+                yield {"speaker": speaker, "text": " ".join(parts)}
+                parts = []
+            speaker = (match.group(1) or match.group(2)).strip()
+            known.add(speaker.lower())
+            line = match.group(3)
+        if line:
+            parts.append(line)
+    if parts:
+        yield {"speaker": speaker, "text": " ".join(parts)}
+
+
+def _iter_cues(
+    source: Source,
+    speaker_roles: Optional[Dict[str, str]],
+    merge_consecutive: bool,
+) -> Iterator[Dict[str, Any]]:
+    """Shared cue parser for WebVTT and SRT, reading one cue block at a time"""
+
+    def utterances() -> Iterator[Dict[str, Any]]:
+        stream = _open_text(source)
+        speaker = ""
+        known: Set[str] = set()
+        block: List[str] = []
+        try:
+            for raw in itertools.chain(stream, [""]):
+                line = raw.rstrip("\r\n")
+                if line.strip():
+                    block.append(line)
+                    continue
+                timing = next(
+                    (i for i, text in enumerate(block) if _TIMING_PATTERN.match(text)),
+                    None,
+                )
+                if timing is not None:
+                    first = timing + 1
+                    cue = _cue_messages(block[first:], speaker, known, speaker_roles)
+                    for utterance in cue:
+                        speaker = utterance["speaker"]
+                        yield {
+                            "role": speaker_to_role(speaker, speaker_roles),
+                            "content": utterance["text"],
+                        }
+                block = []
+        finally:
+            if hasattr(source, "read"):
+                stream.detach()
+            else:
+                stream.close()
+
+    return _merge_turns(utterances(), merge_consecutive)
+
+
+def iter_webvtt_messages(
+    source: Source,
+    speaker_roles: Optional[Dict[str, str]] = None,
+    merge_consecutive: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream messages from a WebVTT file
+
+    Speakers are taken from ``<v Name>`` voice tags or a "Name:" prefix; cues
+    without a speaker, and lines whose "text:" prefix is not a speaker label
+    (see iter_srt_messages), continue the previous speaker's turn.
+
+    Args:
+        source: Path or binary file object
+        speaker_roles: Explicit speaker label to role mapping (optional)
+        merge_consecutive: Join consecutive cues of the same role (default: True)
+
+    Yields:
+        Messages with 'role' and 'content'
+    """
+    return _iter_cues(source, speaker_roles, merge_consecutive)
+
+
+def iter_srt_messages(
+    source: Source,
+    speaker_roles: Optional[Dict[str, str]] = None,
+    merge_consecutive: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream messages from an SRT subtitle file
+
+    Speakers are taken from a "[Name]:" or "Name:" prefix. An unbracketed
+    prefix counts only if it is a role word ("Agent", "Caller", ...), a
+    speaker_roles label, a speaker seen earlier in the file or a short
+    capitalized name, so "Here is the problem: ..." stays part of the text.
+    Cues without a speaker continue the previous speaker's turn.
+
+    Args:
+        source: Path or binary file object
+        speaker_roles: Explicit speaker label to role mapping (optional)
+        merge_consecutive: Join consecutive cues of the same role (default: True)
+
+    Yields:
+        Messages with 'role' and 'content'
+    """
+    return _iter_cues(source, speaker_roles, merge_consecutive)
+
+
+def read_diarized_json(
+    source: Source,
+    speaker_roles: Optional[Dict[str, str]] = None,
+    merge_consecutive: bool = True,
+) -> Dict[str, Any]:
+    """
+    Read a diarized ASR JSON document into a transcript input
+
+    Accepts a list of segments or an object holding them under "segments",
+    "utterances" or "messages". Segments carry the speaker as "speaker" or
+    "speaker_label" and the words as "text" or "transcript".
+
+    Args:
+        source: Path or binary file object
+        speaker_roles: Explicit speaker label to role mapping (optional)
+        merge_consecutive: Join consecutive segments of the same role (default: True)
+
+    Returns:
+        Input dictionary with "messages"
+    """
+    stream = _open_binary(source)
+    try:
+        document = _loads(stream.read())
+    finally:
+        if stream is not source:
+            stream.close()
+
+    segments = document
+    if isinstance(document, dict):
+        for key in ("segments", "utterances", "messages"):
+            if key in document:
+                segments = document[key]
+                break
+        else:
+            raise ValueError("Diarized JSON has no segments, utterances or messages")
+
+    def messages() -> Iterator[Dict[str, Any]]:
+        for segment in segments:
+            if "role" in segment:
+                yield normalize_message(segment, speaker_roles)
+                continue
+            speaker = segment.get("speaker", segment.get("speaker_label", ""))
+            text = segment.get("text", segment.get("transcript", ""))
+            yield {
+                "role": speaker_to_role(str(speaker), speaker_roles),
+                "content": text.strip(),
+            }
+
+    return {"messages": list(_merge_turns(messages(), merge_consecutive))}
+
+
+def iter_transcripts(
+    paths: List[Source],
+    speaker_roles: Optional[Dict[str, str]] = None,
+    **jsonl_options,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream transcript inputs from a mix of export files
+
+    The format is chosen from the file extension: .jsonl/.ndjson (optionally
+    .gz) yield one input per line or group, .vtt/.srt/.json yield one input
+    per file. Subtitle and diarized inputs carry their path under "source".
+
+    Args:
+        paths: Files to read, in order
+        speaker_roles: Explicit speaker label to role mapping (optional)
+        **jsonl_options: messages_key / group_by options for NDJSON files
+
+    Yields:
+        Input dictionaries ready for process_batch() / evaluate_batch()
+    """
+    for path in paths:
+        name = os.fspath(path).lower()
+        if name.endswith(".gz"):
+            name = name[:-3]
+        if name.endswith((".jsonl", ".ndjson")):
+            yield from iter_jsonl(path, speaker_roles=speaker_roles, **jsonl_options)
+        elif name.endswith(".vtt"):
+            messages = list(iter_webvtt_messages(path, speaker_roles))
+            yield {"source": os.fspath(path), "messages": messages}
+        elif name.endswith(".srt"):
+            messages = list(iter_srt_messages(path, speaker_roles))
+            yield {"source": os.fspath(path), "messages": messages}
+        elif name.endswith(".json"):
+            transcript = read_diarized_json(path, speaker_roles)
+            yield {"source": os.fspath(path), **transcript}
+        else:
+            raise ValueError(f"Unsupported transcript format: {path}")
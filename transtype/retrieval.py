@@ -0,0 +1,116 @@
+"""
+Lexical relevance index over transcript turns
+
+TurnIndex scores the turns of one transcript against a query with Okapi BM25
+so each field extraction can be sent only the turns that mention it (plus a
+small neighborhood for context) instead of the whole call.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Placeholder written between non-adjacent selected turns
+GAP_MARKER = "[...]"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric words; underscores and punctuation split words"""
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def field_query(field_def: Dict[str, Any]) -> str:
+    """Build the retrieval query of a field from its definition"""
+    return " ".join(
+        str(field_def.get(key, ""))
+        for key in ("field_name", "field_description", "format_example")
+    )
+
+
+class TurnIndex:
+    """
+    In-memory BM25 index over the turns of a single transcript
+
+    Example:
+        index = TurnIndex(["Assistant: Hi", "User: my email is a@b.com"])
+        index.select("customer email address", top_k=1)  # -> [0, 1]
+    """
+
+    def __init__(self, turns: List[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index
+
+        Args:
+            turns: Text of each turn, in conversation order
+            k1: BM25 term frequency saturation (default: 1.5)
+            b: BM25 length normalization (default: 0.75)
+        """
+        self.turns = turns
+        self.k1 = k1
+        self.b = b
+        self._term_counts = [Counter(tokenize(turn)) for turn in turns]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = sum(self._lengths) / len(turns) if turns else 0.0
+
+        document_frequency: Counter = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        total = len(turns)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        """BM25 score of every turn for the query"""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        scores = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def select(self, query: str, top_k: int, window: int = 1) -> List[int]:
+        """
+        Pick the turns most relevant to a query
+
+        Args:
+            query: Free-text query
+            top_k: Number of best-scoring turns to keep
+            window: Neighboring turns kept on each side of a selected turn
+
+        Returns:
+            Sorted turn indices; empty if no turn shares a word with the query
+        """
+        scores = self.scores(query)
+        ranked = sorted(
+            (i for i, score in enumerate(scores) if score > 0),
+            key=lambda i: -scores[i],
+        )[:top_k]
+        selected = set()
+        for i in ranked:
+            selected.update(
+                range(max(0, i - window), min(len(self.turns), i + window + 1))
+            )
+        return sorted(selected)
+
+    def context(self, indices: List[int]) -> str:
+        """Join selected turns, marking skipped stretches with GAP_MARKER"""
+        parts = []
+        previous = -1
+        for i in indices:
+            if i != previous + 1:
+                parts.append(GAP_MARKER)
+            parts.append(self.turns[i])
+            previous = i
+        if indices and previous != len(self.turns) - 1:
+            parts.append(GAP_MARKER)
+        return "\n".join(parts)
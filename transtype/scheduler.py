@@ -0,0 +1,361 @@
+"""
+Priority- and deadline-aware scheduling of extraction and evaluation calls
+
+Scheduler runs process()/evaluate() (or any callable) on one shared pool of
+worker threads, the global concurrency budget. Jobs belong to a priority
+class and a tenant:
+
+* Classes are served in strict priority order, so newly arriving realtime
+  work overtakes queued batch work. Jobs already running are never
+  interrupted; a class concurrency limit keeps workers free for higher
+  classes.
+* Within a class, tenants get a weighted fair share of dispatches (start-time
+  fair queuing), and each tenant's jobs run earliest deadline first.
+* A job whose deadline passes while it is queued fails with
+  DeadlineExceeded instead of occupying a worker.
+
+Queue wait times are tracked per class and reported by metrics().
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+# Queue waits kept per class for percentiles
+WAIT_SAMPLES = 4096
+
+
+class PriorityClass(NamedTuple):
+    """A class of traffic with its priority, concurrency limit and deadline"""
+
+    name: str
+    # Lower values are served first
+    priority: int
+    # Maximum workers running this class at once (None: the whole pool)
+    max_concurrency: Optional[int] = None
+    # Default seconds after submission by which a job must start (None: never)
+    deadline: Optional[float] = None
+
+
+DEFAULT_CLASSES = (
+    PriorityClass("realtime", 0),
+    PriorityClass("batch", 1),
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Set on the future of a job whose deadline passed before it started"""
+
+
+class _Job(NamedTuple):
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: Dict[str, Any]
+    future: Future
+    priority_class: str
+    tenant: str
+    submitted: float
+    deadline: float
+
+
+def _start(future: Future) -> bool:
+    """Mark a job's future running; False if it was cancelled or resolved"""
+    try:
+        return future.set_running_or_notify_cancel()
+    except RuntimeError:  # resolved outside the scheduler
+        return False
+
+
+def _settle(set_outcome: Callable[[Any], None], outcome: Any) -> None:
+    """Resolve a running future unless it was resolved outside the scheduler"""
+    try:
+        set_outcome(outcome)
+    except InvalidStateError:
+        pass
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class _ClassQueue:
+    """Queued jobs of one priority class, by tenant"""
+
+    def __init__(self, spec: PriorityClass):
+        self.spec = spec
+        self.tenants: Dict[str, List[Any]] = {}
+        self.virtual_time: Dict[str, float] = {}
+        self.clock = 0.0
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.expired = 0
+        self.cancelled = 0
+        self.waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def push(self, job: _Job, sequence: int) -> None:
+        heap = self.tenants.setdefault(job.tenant, [])
+        if not heap:
+            # A tenant becoming active starts at the current virtual time, so
+            # it neither catches up on nor is penalized for idle periods
+            self.virtual_time[job.tenant] = max(
+                self.virtual_time.get(job.tenant, 0.0), self.clock
+            )
+        heapq.heappush(heap, (job.deadline, sequence, job))
+        self.queued += 1
+
+    def runnable(self) -> bool:
+        limit = self.spec.max_concurrency
+        return self.queued > 0 and (limit is None or self.in_flight < limit)
+
+    def pop(self, weights: Dict[str, float]) -> _Job:
+        tenant = min(
+            (t for t, heap in self.tenants.items() if heap),
+            key=lambda t: (self.virtual_time[t], self.tenants[t][0][1]),
+        )
+        _, _, job = heapq.heappop(self.tenants[tenant])
+        self.clock = self.virtual_time[tenant]
+        self.virtual_time[tenant] += 1.0 / weights.get(tenant, 1.0)
+        self.queued -= 1
+        return job
+
+
+class Scheduler:
+    """
+    Shared worker pool with priority classes, deadlines and tenant fair share
+
+    Example:
+        with Scheduler(max_workers=16, classes=[
+            PriorityClass("realtime", 0, deadline=5.0),
+            PriorityClass("batch", 1, max_concurrency=12),
+        ]) as scheduler:
+            live = scheduler.process(processor, call, priority_class="realtime",
+                                     tenant="acme")
+            backfill = [scheduler.evaluate(evaluator, t, tenant="acme")
+                        for t in transcripts]
+            live.result()
+            scheduler.metrics()["realtime"]["wait_p95"]
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        classes: Iterable[PriorityClass] = DEFAULT_CLASSES,
+        tenant_weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Start the worker pool
+
+        Args:
+            max_workers: Global number of concurrent calls (default: 8)
+            classes: Priority classes (default: "realtime" before "batch")
+            tenant_weights: Relative share of each tenant within a class
+                (default: 1.0 for every tenant)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.tenant_weights = dict(tenant_weights or {})
+        if any(weight <= 0 for weight in self.tenant_weights.values()):
+            raise ValueError("tenant weights must be positive")
+        self._queues = {spec.name: _ClassQueue(spec) for spec in classes}
+        if not self._queues:
+            raise ValueError("at least one priority class is required")
+        self._order = sorted(
+            self._queues.values(), key=lambda queue: queue.spec.priority
+        )
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"scheduler-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority_class: Optional[str] = None,
+        tenant: str = "default",
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Future:
+        """
+        Queue a call
+
+        Args:
+            fn: Callable to run on a worker
+            *args: Positional arguments of fn
+            priority_class: Name of the job's class (default: the lowest
+                priority class)
+            tenant: Tenant the job is accounted to (default: "default")
+            deadline: Seconds from now by which the job must start (default:
+                the class deadline)
+            **kwargs: Keyword arguments of fn
+
+        Returns:
+            Future of the call's result
+
+        Raises:
+            ValueError: If the class is unknown
+            RuntimeError: If the scheduler was shut down
+        """
+        if priority_class is None:
+            queue = self._order[-1]
+        elif priority_class in self._queues:
+            queue = self._queues[priority_class]
+        else:
+            raise ValueError(
+                f"priority_class must be one of {list(self._queues)}, "
+                f"got {priority_class!r}"
+            )
+        if deadline is None:
+            deadline = queue.spec.deadline
+
+        now = time.monotonic()
+        job = _Job(
+            fn,
+            args,
+            kwargs,
+            Future(),
+            queue.spec.name,
+            tenant,
+            now,
+            now + deadline if deadline is not None else float("inf"),
+        )
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            queue.push(job, next(self._sequence))
+            self._condition.notify()
+        return job.future
+
+    def process(
+        self, processor: Any, input_data: Dict[str, Any], **options: Any
+    ) -> Future:
+        """Queue processor.process(input_data); options as in submit()"""
+        return self.submit(processor.process, input_data, **options)
+
+    def evaluate(
+        self, evaluator: Any, input_data: Dict[str, Any], **options: Any
+    ) -> Future:
+        """Queue evaluator.evaluate(input_data); options as in submit()"""
+        return self.submit(evaluator.evaluate, input_data, **options)
+
+    def _next_job(self) -> Optional[_Job]:
+        """
+        Pop the next job to run, its future already marked running; waits
+        until one is runnable (lock held)
+        """
+        while True:
+            for queue in self._order:
+                if not queue.runnable():
+                    continue
+                job = queue.pop(self.tenant_weights)
+                now = time.monotonic()
+                if not _start(job.future):
+                    # Cancelled while queued: dropped, neither run nor expired
+                    queue.cancelled += 1
+                    break
+                if now > job.deadline:
+                    queue.expired += 1
+                    _settle(
+                        job.future.set_exception,
+                        DeadlineExceeded(
+                            f"{job.priority_class} job of {job.tenant} waited "
+                            f"{now - job.submitted:.3f}s past its deadline"
+                        ),
+                    )
+                    break
+                queue.in_flight += 1
+                queue.waits.append(now - job.submitted)
+                return job
+            else:
+                if self._shutdown and not any(q.queued for q in self._order):
+                    return None
+                self._condition.wait()
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                job = self._next_job()
+            if job is None:
+                return
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:
+                _settle(job.future.set_exception, e)
+            else:
+                _settle(job.future.set_result, result)
+            finally:
+                with self._condition:
+                    queue = self._queues[job.priority_class]
+                    queue.in_flight -= 1
+                    queue.completed += 1
+                    # A freed slot may unblock a class at its concurrency limit
+                    self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue depth, throughput and queue-wait statistics per class
+
+        Returns:
+            For each class: queued, in_flight, completed, expired and
+            cancelled job counts (cancelled jobs are dropped unrun), and the mean, p50, p95 and max queue wait in seconds over
+            the most recent WAIT_SAMPLES dispatches
+        """
+        with self._condition:
+            snapshot = {
+                name: (
+                    queue.queued,
+                    queue.in_flight,
+                    queue.completed,
+                    queue.expired,
+                    queue.cancelled,
+                    sorted(queue.waits),
+                )
+                for name, queue in self._queues.items()
+            }
+        metrics = {}
+        for name, counts in snapshot.items():
+            queued, in_flight, completed, expired, cancelled, waits = counts
+            metrics[name] = {
+                "queued": queued,
+                "in_flight": in_flight,
+                "completed": completed,
+                "expired": expired,
+                "cancelled": cancelled,
+                "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+                "wait_p50": _percentile(waits, 0.5) if waits else 0.0,
+                "wait_p95": _percentile(waits, 0.95) if waits else 0.0,
+                "wait_max": waits[-1] if waits else 0.0,
+            }
+        return metrics
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting jobs; queued jobs still run
+
+        Args:
+            wait: Block until all queued and running jobs have finished
+        """
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def __enter__(self) -> "Scheduler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
@@ -0,0 +1,191 @@
+"""
+Vectorized confidence and weighted-score computation over many responses
+
+The scalar helpers on TranscriptProcessor and AssertsEvaluator walk one
+response's logprobs at a time. For batch re-scoring (process_results() and
+evaluate_results() in transtype.batch use them), the functions here pack the token logprobs (and, for scores, the top_logprobs of
+the score token) of many responses into flat NumPy arrays with a segment id
+per entry, and reduce every response in one pass with np.bincount. Results
+match the scalar path: same filtering, same clipping and rounding, and the
+same 0.5 fallbacks.
+"""
+
+import math
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Iterable, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from .logprobs import _get, token_entries
+
+# Alternatives less likely than this are ignored by the weighted score
+_MIN_LOGPROB = math.log(0.01)
+
+
+class PackedLogprobs(NamedTuple):
+    """Flat per-entry values with the index of the response they belong to"""
+
+    segments: np.ndarray
+    logprobs: np.ndarray
+    count: int
+
+
+def _logprob_array(entries: Iterable[Any]) -> np.ndarray:
+    """Logprob of each entry as a float array (None or missing becomes NaN)"""
+    return np.array([_get(entry, "logprob") for entry in entries], dtype=np.float64)
+
+
+def pack_token_logprobs(logprobs_list: Sequence[Any]) -> PackedLogprobs:
+    """
+    Pack the per-token logprobs of many responses
+
+    Args:
+        logprobs_list: Logprobs payloads (API objects, dictionaries,
+            LogprobsSlice or None), one per response
+
+    Returns:
+        PackedLogprobs; missing logprob values are NaN
+    """
+    # token_entries() copies each list; here the entries are only read
+    contents = [
+        (_get(logprobs_data, "content") or []) if logprobs_data else []
+        for logprobs_data in logprobs_list
+    ]
+    return PackedLogprobs(
+        np.repeat(np.arange(len(contents)), [len(c) for c in contents]),
+        _logprob_array(chain.from_iterable(contents)),
+        len(contents),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _score_token(token: str) -> float:
+    """Numeric value of a score alternative, or NaN if it is not a 0-10 score"""
+    if not token.replace(".", "").isdecimal():
+        return math.nan
+    try:
+        value = float(token)
+    except ValueError:
+        return math.nan
+    return value if 0 <= value <= 10 else math.nan
+
+
+def pack_score_alternatives(
+    raw_scores: Sequence[Any], logprobs_list: Sequence[Any]
+) -> Tuple[PackedLogprobs, np.ndarray]:
+    """
+    Pack the top_logprobs of each response's score token
+
+    The score token is the first generated token equal to the raw score, as
+    in AssertsEvaluator._generate_weighted_summed_score.
+
+    Args:
+        raw_scores: Score produced by each response
+        logprobs_list: Logprobs payload of each response
+
+    Returns:
+        PackedLogprobs of the alternatives and their numeric scores (NaN for
+        alternatives that are not a score from 0 to 10)
+    """
+    lengths: List[int] = []
+    alternatives: List[Any] = []
+    for raw_score, logprobs_data in zip(raw_scores, logprobs_list):
+        target = str(raw_score)
+        for entry in token_entries(logprobs_data):
+            if (_get(entry, "token") or "").strip() == target:
+                found = _get(entry, "top_logprobs") or []
+                break
+        else:
+            found = []
+        lengths.append(len(found))
+        alternatives.extend(found)
+    packed = PackedLogprobs(
+        np.repeat(np.arange(len(lengths)), lengths),
+        _logprob_array(alternatives),
+        len(lengths),
+    )
+    scores = np.array(
+        [_score_token((_get(alt, "token") or "").strip()) for alt in alternatives],
+        dtype=np.float64,
+    )
+    return packed, scores
+
+
+def _clip_round(values: np.ndarray) -> np.ndarray:
+    """Clip to [0.1, 0.99] and round to 3 decimals, as the scalar path does"""
+    clipped = np.clip(values, 0.1, 0.99)
+    rounded = np.round(clipped, 3)
+    # np.round scales by 1000 and may differ from round() next to a half
+    # step; recompute those few values with round() itself
+    near_half = np.abs(np.modf(clipped * 1000)[0] - 0.5) < 1e-6
+    rounded[near_half] = [round(float(v), 3) for v in clipped[near_half]]
+    return rounded
+
+
+def batch_confidence(logprobs_list: Sequence[Any]) -> np.ndarray:
+    """
+    Average-probability confidence of many responses
+
+    Vectorized equivalent of TranscriptProcessor._calculate_confidence_from_logprobs.
+
+    Args:
+        logprobs_list: Logprobs payloads, one per response
+
+    Returns:
+        Confidence per response; 0.5 where no logprob is available
+    """
+    packed = pack_token_logprobs(logprobs_list)
+    valid = ~np.isnan(packed.logprobs)
+    probabilities = np.exp(np.where(valid, packed.logprobs, -np.inf))
+    totals = np.bincount(packed.segments, weights=probabilities, minlength=packed.count)
+    counts = np.bincount(packed.segments[valid], minlength=packed.count)
+
+    confidence = np.full(packed.count, 0.5)
+    has_tokens = counts > 0
+    confidence[has_tokens] = _clip_round(totals[has_tokens] / counts[has_tokens])
+    return confidence
+
+
+def batch_weighted_scores(
+    raw_scores: Sequence[Any], logprobs_list: Sequence[Any]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    G-Eval weighted scores and their confidence for many responses
+
+    Vectorized equivalent of AssertsEvaluator._generate_weighted_summed_score.
+
+    Args:
+        raw_scores: Score (0-10) produced by each response
+        logprobs_list: Logprobs payload of each response (restricted to the
+            score value in structured output mode)
+
+    Returns:
+        Tuple of (weighted score per response, confidence per response);
+        responses without usable score alternatives keep their raw score and
+        a confidence of 0.5
+    """
+    packed, scores = pack_score_alternatives(raw_scores, logprobs_list)
+    likely = packed.logprobs >= _MIN_LOGPROB  # False for NaN
+    numeric = likely & ~np.isnan(scores)
+    probabilities = np.exp(np.where(likely, packed.logprobs, -np.inf))
+    numeric_probabilities = np.where(numeric, probabilities, 0.0)
+
+    score_mass = np.bincount(
+        packed.segments, weights=numeric_probabilities, minlength=packed.count
+    )
+    weighted = np.bincount(
+        packed.segments,
+        weights=numeric_probabilities * np.where(numeric, scores, 0.0),
+        minlength=packed.count,
+    )
+    likely_mass = np.bincount(
+        packed.segments, weights=probabilities, minlength=packed.count
+    )
+
+    weighted_scores = np.array([float(score) for score in raw_scores])
+    confidence = np.full(packed.count, 0.5)
+    scored = score_mass > 0
+    weighted_scores[scored] = weighted[scored] / score_mass[scored]
+    confidence[scored] = _clip_round(score_mass[scored] / likely_mass[scored])
+    return weighted_scores, confidence
@@ -0,0 +1,417 @@
+"""
+Compact columnar sink for extraction and evaluation results
+
+process()/evaluate() results are nested dictionaries of roughly a kilobyte
+per field, most of it reasoning text. ResultSink appends them to typed
+column buffers instead: field names, assertion names, keys and field values
+are interned to integer codes, confidences and scores are float32, and
+reasons are dropped unless asked for. Buffers are written to Parquet when
+pyarrow is installed, or to a NumPy .npz archive otherwise, and can flush
+to numbered part files as they fill up.
+"""
+
+import array
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = None
+    pq = None
+
+FORMATS = ("auto", "parquet", "npz")
+
+# Columns of each table: interned string, float32, bool or out-of-line text
+_INTERNED = {"fields": ("key", "field", "value"), "assertions": ("key", "assertion")}
+_FLOATS = {"fields": ("confidence",), "assertions": ("score", "confidence")}
+_BOOLS = {"fields": (), "assertions": ("success",)}
+
+
+class _Interner:
+    """Map strings to dense integer codes"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __call__(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    @property
+    def nbytes(self) -> int:
+        return sum(sys.getsizeof(value) for value in self.values)
+
+
+def _pack_strings(values: List[str]) -> Dict[str, np.ndarray]:
+    """UTF-8 bytes of strings laid end to end, with int64 end offsets"""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.cumsum([len(data) for data in encoded], dtype=np.int64)
+    return {
+        "values": np.frombuffer(b"".join(encoded), dtype=np.uint8).copy(),
+        "offsets": offsets,
+    }
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Inverse of _pack_strings"""
+    blob = data.tobytes()
+    starts = np.concatenate([[0], offsets[:-1]])
+    return [blob[a:b].decode("utf-8") for a, b in zip(starts, offsets)]
+
+
+class _Table:
+    """Column buffers of one result table"""
+
+    def __init__(self, name: str, keep_reasons: bool):
+        self.name = name
+        self.interned = {column: _Interner() for column in _INTERNED[name]}
+        self.codes = {column: array.array("i") for column in _INTERNED[name]}
+        self.floats = {column: array.array("f") for column in _FLOATS[name]}
+        self.bools = {column: array.array("B") for column in _BOOLS[name]}
+        self.reasons: Optional[List[Optional[str]]] = [] if keep_reasons else None
+
+    def append(self, strings: Dict[str, str], numbers: Dict[str, Any], reason):
+        for column, value in strings.items():
+            self.codes[column].append(self.interned[column](value))
+        for column, buffer in self.floats.items():
+            buffer.append(numbers[column])
+        for column, buffer in self.bools.items():
+            buffer.append(bool(numbers[column]))
+        if self.reasons is not None:
+            self.reasons.append(reason)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.floats.values())))
+
+    @property
+    def nbytes(self) -> int:
+        buffers = [*self.codes.values(), *self.floats.values(), *self.bools.values()]
+        size = sum(b.itemsize * len(b) for b in buffers)
+        size += sum(interner.nbytes for interner in self.interned.values())
+        if self.reasons is not None:
+            size += sys.getsizeof(self.reasons)
+            size += sum(sys.getsizeof(r) for r in self.reasons if r is not None)
+        return size
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Codes of interned columns, then numeric columns
+
+        The strings behind the codes are stored as "<column>.values" (their
+        UTF-8 bytes end to end) and "<column>.offsets" (where each ends), so
+        no string is padded to the longest. Reasons are interned the same
+        way, with code -1 for a missing reason.
+        """
+        data: Dict[str, np.ndarray] = {}
+        for column, codes in self.codes.items():
+            data[column] = np.frombuffer(codes, dtype=np.int32).copy()
+            for part, values in _pack_strings(self.interned[column].values).items():
+                data[f"{column}.{part}"] = values
+        for column, buffer in self.floats.items():
+            data[column] = np.frombuffer(buffer, dtype=np.float32).copy()
+        for column, buffer in self.bools.items():
+            data[column] = np.frombuffer(buffer, dtype=np.uint8).astype(bool)
+        if self.reasons is not None:
+            intern = _Interner()
+            data["reason"] = np.array(
+                [-1 if r is None else intern(r) for r in self.reasons], dtype=np.int32
+            )
+            for part, values in _pack_strings(intern.values).items():
+                data[f"reason.{part}"] = values
+        return data
+
+    def arrow_table(self) -> "pa.Table":
+        """The buffers as an Arrow table with dictionary-encoded strings"""
+        arrays = {}
+        for column, codes in self.codes.items():
+            arrays[column] = pa.DictionaryArray.from_arrays(
+                pa.array(np.frombuffer(codes, dtype=np.int32)),
+                pa.array(self.interned[column].values, type=pa.string()),
+            )
+        for column, buffer in self.floats.items():
+            arrays[column] = pa.array(np.frombuffer(buffer, dtype=np.float32))
+        for column, buffer in self.bools.items():
+            arrays[column] = pa.array(np.frombuffer(buffer, dtype=np.uint8) > 0)
+        if self.reasons is not None:
+            arrays["reason"] = pa.array(self.reasons, type=pa.string())
+        return pa.table(arrays)
+
+
+def _resolve_format(format: str) -> str:
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}, got {format!r}")
+    if format == "auto":
+        return "parquet" if pa is not None else "npz"
+    if format == "parquet" and pa is None:
+        raise ValueError("Parquet output requires pyarrow to be installed")
+    return format
+
+
+class ResultSink:
+    """
+    Columnar buffers for many process() and evaluate() results
+
+    Example:
+        sink = ResultSink(directory="results/", flush_records=1_000_000)
+        for call_id, result in zip(call_ids, processor.iter_process(transcripts)):
+            sink.add(result, key=call_id)
+        sink.close()
+        tables = read_tables("results/")
+
+    Field values are stored as their JSON text, so dates read back as ISO
+    strings. Reasons (field_reason / reason) are dropped unless keep_reasons
+    is True.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        flush_records: Optional[int] = None,
+        format: str = "auto",
+        keep_reasons: bool = False,
+    ):
+        """
+        Initialize an empty sink
+
+        Args:
+            directory: Where flush() writes numbered part files (optional
+                when only write() is used)
+            flush_records: Flush automatically once this many field and
+                assertion records are buffered (requires directory)
+            format: "parquet", "npz", or "auto" for Parquet when pyarrow is
+                installed (default: "auto")
+            keep_reasons: Keep reasoning text out-of-line (default: False)
+
+        Raises:
+            ValueError: If the format is unknown or unavailable, or
+                flush_records is set without a directory
+        """
+        if flush_records is not None and (flush_records < 1 or directory is None):
+            raise ValueError("flush_records needs a directory and must be >= 1")
+        self.format = _resolve_format(format)
+        self.directory = directory
+        self.flush_records = flush_records
+        self.keep_reasons = keep_reasons
+        self.parts: List[str] = []
+        self.results = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self.fields = _Table("fields", self.keep_reasons)
+        self.assertions = _Table("assertions", self.keep_reasons)
+
+    def add(
+        self,
+        result: Dict[str, Any],
+        key: Optional[str] = None,
+        assertion: str = "default",
+    ) -> None:
+        """
+        Append one process() or evaluate() result
+
+        Args:
+            result: TranscriptOutput or AssertionOutput dictionary
+            key: Identifier of the transcript (e.g. a call ID); defaults to
+                the number of results added before this one
+            assertion: Name of the assertion set an evaluation belongs to
+                (default: "default")
+
+        Raises:
+            ValueError: If the result is neither kind of output
+        """
+        key = str(self.results if key is None else key)
+        if "fields" in result:
+            for field in result["fields"]:
+                self.fields.append(
+                    {
+                        "key": key,
+                        "field": field["field_name"],
+                        "value": json.dumps(field["field_value"]),
+                    },
+                    {"confidence": field["field_confidence"]},
+                    field.get("field_reason"),
+                )
+        elif "result" in result:
+            output = result["result"]
+            self.assertions.append(
+                {"key": key, "assertion": assertion}, output, output.get("reason")
+            )
+        else:
+            raise ValueError("Expected a TranscriptOutput or AssertionOutput dict")
+        self.results += 1
+        if self.flush_records and len(self) >= self.flush_records:
+            self.flush()
+
+    def update(
+        self,
+        results: Iterable[Dict[str, Any]],
+        keys: Optional[Iterable[str]] = None,
+        assertion: str = "default",
+    ) -> "ResultSink":
+        """Append many results, optionally with one key each; see add()"""
+        if keys is None:
+            for result in results:
+                self.add(result, assertion=assertion)
+        else:
+            for result, key in zip(results, keys):
+                self.add(result, key, assertion)
+        return self
+
+    def __len__(self) -> int:
+        """Number of buffered field and assertion records"""
+        return len(self.fields) + len(self.assertions)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the buffers, interned strings included"""
+        return self.fields.nbytes + self.assertions.nbytes
+
+    def write(self, path: str) -> List[str]:
+        """
+        Write the buffered records without clearing them
+
+        Args:
+            path: Output path without extension. Parquet writes
+                <path>.fields.parquet and <path>.assertions.parquet; npz
+                writes <path>.npz
+
+        Returns:
+            Paths of the written files (empty tables are skipped)
+        """
+        tables = [t for t in (self.fields, self.assertions) if len(t)]
+        if self.format == "npz":
+            columns = {
+                f"{table.name}/{column}": values
+                for table in tables
+                for column, values in table.columns().items()
+            }
+            np.savez(f"{path}.npz", **columns)
+            return [f"{path}.npz"]
+        written = []
+        for table in tables:
+            written.append(f"{path}.{table.name}.parquet")
+            pq.write_table(table.arrow_table(), written[-1])
+        return written
+
+    def flush(self) -> List[str]:
+        """
+        Write the buffered records as the next part file and clear them
+
+        Returns:
+            Paths of the written files
+
+        Raises:
+            ValueError: If the sink has no directory
+        """
+        if self.directory is None:
+            raise ValueError("flush() needs a sink created with a directory")
+        if not len(self):
+            return []
+        os.makedirs(self.directory, exist_ok=True)
+        name = os.path.join(self.directory, f"part-{len(self.parts):05d}")
+        written = self.write(name)
+        self.parts.extend(written)
+        self._reset()
+        return written
+
+    def close(self) -> List[str]:
+        """Flush remaining records if the sink has a directory"""
+        return self.flush() if self.directory is not None else []
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _decode_npz(archive: Any, table: str) -> Optional[Dict[str, np.ndarray]]:
+    prefix = f"{table}/"
+    start = len(prefix)
+    columns = {
+        name[start:]: archive[name] for name in archive.files if name.startswith(prefix)
+    }
+    if not columns:
+        return None
+    data = {}
+    strings = [*_INTERNED[table], *(["reason"] if "reason" in columns else [])]
+    for column in strings:
+        values = _unpack_strings(
+            columns[f"{column}.values"], columns[f"{column}.offsets"]
+        )
+        # A trailing None decodes the -1 code of missing reasons
+        vocabulary = np.array([*values, None], dtype=object)
+        data[column] = vocabulary[columns[column]]
+    for column in (*_FLOATS[table], *_BOOLS[table]):
+        data[column] = columns[column]
+    return data
+
+
+def _decode_arrow(table: "pa.Table") -> Dict[str, np.ndarray]:
+    data = {}
+    for column in table.column_names:
+        values = table.column(column)
+        if pa.types.is_dictionary(values.type) or pa.types.is_string(values.type):
+            data[column] = np.array(values.to_pylist(), dtype=object)
+        else:
+            data[column] = values.to_numpy()
+    return data
+
+
+def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {
+        column: np.concatenate([part[column] for part in parts]) for column in parts[0]
+    }
+
+
+def read_tables(path: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Read results written by ResultSink
+
+    Args:
+        path: A flush() directory, or the path given to write()
+
+    Returns:
+        {"fields": columns, "assertions": columns}, where interned columns
+        are decoded to object arrays of strings and "value" holds JSON text;
+        a table with no records is an empty dictionary
+    """
+    if os.path.isdir(path):
+        names = sorted(os.listdir(path))
+        bases = sorted(
+            {
+                os.path.join(path, n.split(".")[0])
+                for n in names
+                if n.startswith("part-")
+            }
+        )
+    else:
+        bases = [path]
+
+    tables: Dict[str, List[Dict[str, np.ndarray]]] = {"fields": [], "assertions": []}
+    for base in bases:
+        if os.path.exists(f"{base}.npz"):
+            with np.load(f"{base}.npz") as archive:
+                for name in tables:
+                    decoded = _decode_npz(archive, name)
+                    if decoded is not None:
+                        tables[name].append(decoded)
+            continue
+        for name in tables:
+            if os.path.exists(f"{base}.{name}.parquet"):
+                if pq is None:
+                    raise ValueError("Reading Parquet requires pyarrow to be installed")
+                tables[name].append(
+                    _decode_arrow(pq.read_table(f"{base}.{name}.parquet"))
+                )
+    return {name: _concat(parts) if parts else {} for name, parts in tables.items()}
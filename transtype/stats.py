@@ -0,0 +1,372 @@
+"""
+Streaming aggregate statistics over extraction and evaluation results
+
+ResultAggregator consumes TranscriptOutput/AssertionOutput dictionaries as
+they are produced (e.g. from iter_process()/iter_evaluate()) and keeps only
+counters and fixed-size histograms, so memory does not grow with the number
+of results. Quantiles are interpolated from the histograms. Aggregators from
+several worker processes merge exactly, and export to and load from JSON.
+"""
+
+import json
+import math
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# Histogram bins over [0, 1]; quantiles are exact to 1 / bins
+DEFAULT_BINS = 100
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Histogram:
+    """
+    Fixed-bin histogram of values in a closed range with running moments
+
+    Example:
+        histogram = Histogram()
+        histogram.update([0.2, 0.9, 0.95])
+        histogram.quantile(0.5), histogram.mean
+    """
+
+    def __init__(self, bins: int = DEFAULT_BINS, low: float = 0.0, high: float = 1.0):
+        """
+        Initialize an empty histogram
+
+        Args:
+            bins: Number of equal-width bins (default: 100)
+            low: Lower bound of the range; smaller values go to the first bin
+            high: Upper bound of the range; larger values go to the last bin
+        """
+        if bins < 1 or not high > low:
+            raise ValueError("Histogram needs bins >= 1 and high > low")
+        self.low = low
+        self.high = high
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """Add a single value"""
+        bins = len(self.counts)
+        index = int((value - self.low) / (self.high - self.low) * bins)
+        self.counts[min(max(index, 0), bins - 1)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update(self, values: Iterable[float]) -> None:
+        """Add many values at once"""
+        values = np.asarray(list(values), dtype=np.float64)
+        if not values.size:
+            return
+        bins = len(self.counts)
+        indices = ((values - self.low) / (self.high - self.low) * bins).astype(np.int64)
+        self.counts += np.bincount(np.clip(indices, 0, bins - 1), minlength=bins)
+        self.count += int(values.size)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean of the added values (None if empty)"""
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation within its bin
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated value, clamped to the observed min and max (None if empty)
+        """
+        if not self.count:
+            return None
+        cumulative = np.cumsum(self.counts)
+        target = q * self.count
+        index = int(np.searchsorted(cumulative, target, side="left"))
+        index = min(index, len(self.counts) - 1)
+        before = cumulative[index - 1] if index else 0
+        fraction = (target - before) / self.counts[index] if self.counts[index] else 0.0
+        width = (self.high - self.low) / len(self.counts)
+        value = self.low + (index + fraction) * width
+        return float(min(max(value, self.min), self.max))
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        """
+        Add the values of another histogram with the same bins
+
+        Raises:
+            ValueError: If the bins or range differ
+        """
+        if (len(self.counts), self.low, self.high) != (
+            len(other.counts),
+            other.low,
+            other.high,
+        ):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary statistics plus the state needed by from_dict()"""
+        summary = {
+            "count": self.count,
+            "mean": _round(self.mean),
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+        for q in QUANTILES:
+            summary[f"p{round(q * 100)}"] = _round(self.quantile(q))
+        summary.update(
+            low=self.low, high=self.high, total=self.total, counts=self.counts.tolist()
+        )
+        return summary
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Histogram":
+        """Rebuild a histogram from to_dict() output"""
+        histogram = cls(len(data["counts"]), data["low"], data["high"])
+        histogram.counts = np.asarray(data["counts"], dtype=np.int64)
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        if data["count"]:
+            histogram.min = data["min"]
+            histogram.max = data["max"]
+        return histogram
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+class _FieldStats:
+    """Counters of one extracted field"""
+
+    def __init__(self, bins: int):
+        self.count = 0
+        self.not_found = 0
+        self.errors = 0
+        self.confidence = Histogram(bins)
+
+    def add(self, field: Dict[str, Any]) -> None:
+        self.count += 1
+        # Failed extractions are reported with a confidence of exactly 0.0
+        if not field["field_confidence"]:
+            self.errors += 1
+        elif field["field_value"] is None:
+            self.not_found += 1
+        else:
+            self.confidence.add(field["field_confidence"])
+
+    def merge(self, other: "_FieldStats") -> None:
+        self.count += other.count
+        self.not_found += other.not_found
+        self.errors += other.errors
+        self.confidence.merge(other.confidence)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "not_found": self.not_found,
+            "not_found_rate": _round(
+                self.not_found / self.count if self.count else None
+            ),
+            "errors": self.errors,
+            "confidence": self.confidence.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_FieldStats":
+        confidence = Histogram.from_dict(data["confidence"])
+        stats = cls(len(confidence.counts))
+        stats.count = data["count"]
+        stats.not_found = data["not_found"]
+        stats.errors = data["errors"]
+        stats.confidence = confidence
+        return stats
+
+
+class _AssertionStats:
+    """Counters of one assertion set (one AssertsEvaluator)"""
+
+    def __init__(self, bins: int):
+        self.count = 0
+        self.passed = 0
+        self.errors = 0
+        self.score = Histogram(bins)
+        self.confidence = Histogram(bins)
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.count += 1
+        # Failed evaluations are reported with a confidence of exactly 0.0
+        if not result["confidence"]:
+            self.errors += 1
+            return
+        self.passed += bool(result["success"])
+        self.score.add(result["score"])
+        self.confidence.add(result["confidence"])
+
+    def merge(self, other: "_AssertionStats") -> None:
+        self.count += other.count
+        self.passed += other.passed
+        self.errors += other.errors
+        self.score.merge(other.score)
+        self.confidence.merge(other.confidence)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "passed": self.passed,
+            "pass_rate": _round(self.passed / self.count if self.count else None),
+            "errors": self.errors,
+            "score": self.score.to_dict(),
+            "confidence": self.confidence.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_AssertionStats":
+        score = Histogram.from_dict(data["score"])
+        stats = cls(len(score.counts))
+        stats.count = data["count"]
+        stats.passed = data["passed"]
+        stats.errors = data["errors"]
+        stats.score = score
+        stats.confidence = Histogram.from_dict(data["confidence"])
+        return stats
+
+
+class ResultAggregator:
+    """
+    Online summary of extraction and evaluation results
+
+    Example:
+        aggregator = ResultAggregator()
+        for result in processor.iter_process(transcripts):
+            aggregator.add(result)
+        for result in evaluator.iter_evaluate(transcripts):
+            aggregator.add(result, assertion="greeting")
+        aggregator.to_json()
+
+    Errors (confidence 0.0) are counted separately and left out of the
+    confidence and score histograms and of the NOT_FOUND rate's numerator.
+    A field's confidence histogram only covers found values: NOT_FOUND
+    results are counted in not_found but not in the histogram.
+    """
+
+    def __init__(self, bins: int = DEFAULT_BINS):
+        """
+        Initialize an empty aggregator
+
+        Args:
+            bins: Histogram bins over [0, 1] for scores and confidences
+                (default: 100)
+        """
+        self.bins = bins
+        self.fields: Dict[str, _FieldStats] = {}
+        self.assertions: Dict[str, _AssertionStats] = {}
+
+    def add(self, result: Dict[str, Any], assertion: str = "default") -> None:
+        """
+        Add one process() or evaluate() result
+
+        Args:
+            result: TranscriptOutput or AssertionOutput dictionary
+            assertion: Name of the assertion set an evaluation belongs to
+                (default: "default")
+
+        Raises:
+            ValueError: If the result is neither kind of output
+        """
+        if "fields" in result:
+            for field in result["fields"]:
+                name = field["field_name"]
+                if name not in self.fields:
+                    self.fields[name] = _FieldStats(self.bins)
+                self.fields[name].add(field)
+        elif "result" in result:
+            if assertion not in self.assertions:
+                self.assertions[assertion] = _AssertionStats(self.bins)
+            self.assertions[assertion].add(result["result"])
+        else:
+            raise ValueError("Expected a TranscriptOutput or AssertionOutput dict")
+
+    def update(
+        self, results: Iterable[Dict[str, Any]], assertion: str = "default"
+    ) -> "ResultAggregator":
+        """Add many results; see add()"""
+        for result in results:
+            self.add(result, assertion)
+        return self
+
+    def merge(self, other: "ResultAggregator") -> "ResultAggregator":
+        """
+        Add the counts of another aggregator, e.g. from another worker process
+
+        Raises:
+            ValueError: If the histogram bins differ
+        """
+        # Check every histogram first, so a mismatch leaves self unchanged
+        histograms = [s.confidence for s in other.fields.values()]
+        for stats in other.assertions.values():
+            histograms.extend((stats.score, stats.confidence))
+        if other.bins != self.bins or any(
+            len(h.counts) != self.bins for h in histograms
+        ):
+            raise ValueError("Cannot merge aggregators with different bins")
+        for name, stats in other.fields.items():
+            if name in self.fields:
+                self.fields[name].merge(stats)
+            else:
+                self.fields[name] = _FieldStats.from_dict(stats.to_dict())
+        for name, stats in other.assertions.items():
+            if name in self.assertions:
+                self.assertions[name].merge(stats)
+            else:
+                self.assertions[name] = _AssertionStats.from_dict(stats.to_dict())
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summaries per field and per assertion set, loadable with from_dict()
+
+        A field's "confidence" histogram covers found values only; NOT_FOUND
+        results and errors are excluded.
+        """
+        return {
+            "bins": self.bins,
+            "fields": {name: s.to_dict() for name, s in self.fields.items()},
+            "assertions": {name: s.to_dict() for name, s in self.assertions.items()},
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """to_dict() as a JSON string"""
+        return json.dumps(self.to_dict(), indent=indent)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResultAggregator":
+        """Rebuild an aggregator from to_dict() output"""
+        aggregator = cls(data["bins"])
+        aggregator.fields = {
+            name: _FieldStats.from_dict(s) for name, s in data["fields"].items()
+        }
+        aggregator.assertions = {
+            name: _AssertionStats.from_dict(s) for name, s in data["assertions"].items()
+        }
+        return aggregator
+
+    @classmethod
+    def from_json(cls, text: str) -> "ResultAggregator":
+        """Rebuild an aggregator from to_json() output"""
+        return cls.from_dict(json.loads(text))
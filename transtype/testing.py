@@ -0,0 +1,447 @@
+"""
+Offline stand-ins for the OpenAI API, used by the benchmarks and tests
+
+StubLM plugs into TranscriptProcessor / AssertsEvaluator through their ``lm``
+argument and exercises the real DSPy adapter path without any network access.
+StubServer exposes the same synthetic responses over an OpenAI-compatible HTTP
+endpoint so the full litellm/openai client stack can be measured as well. Both
+can inject rate-limit (429) errors, at random or beyond a number of requests
+in flight, to simulate a provider at capacity.
+"""
+
+import ast
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import dspy
+import litellm
+from openai.types.chat.chat_completion import ChoiceLogprobs
+
+LatencySpec = Union[float, Callable[[], float]]
+
+_OUTPUT_FIELD_PATTERN = re.compile(r"^\d+\. `(\w+)` \(([^)]*)\)", re.MULTILINE)
+_TOKEN_PATTERN = re.compile(r" ?\w+| ?[^\w\s]|\s+")
+_FILLER_WORDS = (
+    "the agent confirmed the details during the call and the customer agreed "
+    "to the proposed next steps before the conversation ended"
+).split()
+
+
+def constant_latency(seconds: float) -> Callable[[], float]:
+    """Latency model that always waits the same amount of time"""
+    return lambda: seconds
+
+
+def uniform_latency(
+    low: float, high: float, seed: Optional[int] = None
+) -> Callable[[], float]:
+    """Latency model drawing uniformly between low and high seconds"""
+    rng = random.Random(seed)
+    return lambda: rng.uniform(low, high)
+
+
+def lognormal_latency(
+    median: float, sigma: float = 0.5, seed: Optional[int] = None
+) -> Callable[[], float]:
+    """Latency model with a long right tail, typical of hosted LLM APIs"""
+    rng = random.Random(seed)
+    mu = math.log(median)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into pseudo-tokens that concatenate back to the original"""
+    return _TOKEN_PATTERN.findall(text)
+
+
+class StubResponder:
+    """
+    Synthesizes chat completions for the signatures used by transtype
+
+    Output fields are discovered from the request itself: the JSON schema in
+    ``response_format`` when structured output is requested, otherwise the
+    "Your output fields are" section DSPy writes into the system prompt.
+    """
+
+    def __init__(
+        self,
+        latency: LatencySpec = 0.0,
+        seconds_per_output_token: float = 0.0,
+        reasoning_tokens: int = 40,
+        token_confidence: Tuple[float, float] = (0.9, 0.08),
+        not_found_rate: float = 0.0,
+        values: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = 0,
+        rate_limit: float = 0.0,
+        max_in_flight: Optional[int] = None,
+    ):
+        """
+        Initialize the responder
+
+        Args:
+            latency: Seconds to wait per request, or a callable returning them
+            seconds_per_output_token: Extra decode time per generated token
+            reasoning_tokens: Approximate number of words in free-text fields
+            token_confidence: Mean and standard deviation of per-token probability
+            not_found_rate: Probability of answering NOT_FOUND for field values
+            values: Fixed values per output field name (values may be callables
+                receiving the request messages)
+            seed: Seed for the random generator (default: 0)
+            rate_limit: Probability of rejecting a request with a rate-limit
+                (429) error (default: 0.0)
+            max_in_flight: Reject requests with a rate-limit error while this
+                many are already being served (default: no limit)
+        """
+        self.latency = latency if callable(latency) else constant_latency(latency)
+        self.seconds_per_output_token = seconds_per_output_token
+        self.reasoning_tokens = reasoning_tokens
+        self.token_confidence = token_confidence
+        self.not_found_rate = not_found_rate
+        self.values = values or {}
+        self.rate_limit = rate_limit
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """
+        Admit a request, or count it as rate limited
+
+        Returns:
+            False if the request should be answered with a 429 error;
+            otherwise True, and release() must be called once it is served
+        """
+        with self._lock:
+            limited = (
+                self.max_in_flight is not None and self.in_flight >= self.max_in_flight
+            ) or (self.rate_limit > 0 and self._rng.random() < self.rate_limit)
+            if limited:
+                self.rate_limited += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """Mark an admitted request as served"""
+        with self._lock:
+            self.in_flight -= 1
+
+    def _output_fields(
+        self, messages: List[Dict[str, Any]], response_format: Any
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return (name, json schema) pairs for the requested output fields"""
+        if response_format is not None:
+            if isinstance(response_format, type):
+                schema = response_format.model_json_schema()
+            else:
+                schema = response_format.get("json_schema", {}).get("schema", {})
+            return list(schema.get("properties", {}).items())
+
+        system = messages[0]["content"] if messages else ""
+        section = system.split("Your output fields are:", 1)[-1]
+        section = section.split("\n\n", 1)[0]
+        fields = []
+        for name, type_name in _OUTPUT_FIELD_PATTERN.findall(section):
+            if type_name.startswith("Literal["):
+                schema = {"enum": list(ast.literal_eval(type_name[7:]))}
+            else:
+                schema = {"type": "integer" if type_name == "int" else ""}
+            fields.append((name, schema))
+        return fields
+
+    def _value_for(
+        self, name: str, schema: Dict[str, Any], messages: List[Dict[str, Any]]
+    ) -> Any:
+        """Pick a synthetic value for one output field"""
+        if name in self.values:
+            value = self.values[name]
+            return value(messages) if callable(value) else value
+        if "enum" in schema:
+            return schema["enum"][0]
+        if schema.get("type") == "integer":
+            return self._rng.randint(0, 10)
+        if schema.get("type") == "boolean":
+            return self._rng.random() < 0.5
+        if name == "field_value":
+            if self._rng.random() < self.not_found_rate:
+                return "NOT_FOUND"
+            return "Sarah Chen"
+        return " ".join(
+            self._rng.choice(_FILLER_WORDS) for _ in range(self.reasoning_tokens)
+        )
+
+    def _render(
+        self, values: Dict[str, Any], structured: bool
+    ) -> Tuple[str, List[str]]:
+        """Render output values as response text and its token sequence"""
+        if structured:
+            text = json.dumps(values)
+        else:
+            parts = [f"[[ ## {name} ## ]]\n{value}" for name, value in values.items()]
+            parts.append("[[ ## completed ## ]]")
+            text = "\n\n".join(parts)
+        return text, _tokenize(text)
+
+    def _token_logprobs(self, tokens: List[str], top_k: int) -> Dict[str, Any]:
+        """Build an OpenAI-shaped logprobs payload for the given tokens"""
+        mean, spread = self.token_confidence
+        content = []
+        for token in tokens:
+            prob = min(max(self._rng.gauss(mean, spread), 0.01), 1.0)
+            logprob = math.log(prob)
+            alternatives = [{"token": token, "logprob": logprob, "bytes": None}]
+            remaining = 1.0 - prob
+            stripped = token.strip()
+            for i in range(1, top_k):
+                if remaining <= 1e-6:
+                    break
+                share = remaining * self._rng.uniform(0.3, 0.8)
+                remaining -= share
+                if stripped.isdigit():
+                    alt = str((int(stripped) + i) % 11)
+                else:
+                    alt = f"{stripped}_{i}"
+                alternatives.append(
+                    {"token": alt, "logprob": math.log(share), "bytes": None}
+                )
+            content.append(
+                {
+                    "token": token,
+                    "logprob": logprob,
+                    "bytes": None,
+                    "top_logprobs": alternatives if top_k else [],
+                }
+            )
+        return {"content": content}
+
+    def complete(
+        self, messages: List[Dict[str, Any]], **kwargs
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int], float]:
+        """
+        Generate choices for a chat completion request
+
+        Args:
+            messages: Chat messages of the request
+            **kwargs: Request parameters (n, logprobs, top_logprobs, response_format)
+
+        Returns:
+            Tuple of (choices, usage, simulated latency in seconds); each choice
+            is a dict with "text" and "logprobs" (None unless requested)
+        """
+        response_format = kwargs.get("response_format")
+        if isinstance(response_format, dict) and response_format.get("type") in (
+            "json_object",
+            "text",
+        ):
+            response_format = None
+        structured = kwargs.get("response_format") is not None
+        fields = self._output_fields(messages, response_format)
+        top_k = kwargs.get("top_logprobs") or 0
+
+        choices = []
+        completion_tokens = 0
+        with self._lock:
+            for _ in range(kwargs.get("n") or 1):
+                values = {
+                    name: self._value_for(name, schema, messages)
+                    for name, schema in fields
+                }
+                text, tokens = self._render(values, structured)
+                completion_tokens += len(tokens)
+                logprobs = (
+                    self._token_logprobs(tokens, top_k)
+                    if kwargs.get("logprobs")
+                    else None
+                )
+                choices.append({"text": text, "logprobs": logprobs})
+            latency = self.latency()
+
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_chars // 4 + completion_tokens,
+        }
+        latency += self.seconds_per_output_token * completion_tokens
+        return choices, usage, latency
+
+
+class StubLM(dspy.LM):
+    """
+    DSPy LM that answers from a StubResponder instead of calling an API
+
+    Example:
+        lm = StubLM(StubResponder(latency=lognormal_latency(0.4)))
+        processor = TranscriptProcessor(api_key="unused", fields=fields, lm=lm)
+    """
+
+    def __init__(
+        self,
+        responder: Optional[StubResponder] = None,
+        model: str = "openai/stub",
+        **kwargs,
+    ):
+        super().__init__(model, cache=False, logprobs=True, **kwargs)
+        self.responder = responder or StubResponder()
+        self.calls = 0
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        messages = messages or [{"role": "user", "content": prompt}]
+        kwargs = {**self.kwargs, **kwargs}
+        if not self.responder.acquire():
+            raise litellm.RateLimitError(
+                "Rate limit reached (stub)", llm_provider="openai", model=self.model
+            )
+        try:
+            choices, usage, latency = self.responder.complete(messages, **kwargs)
+            with self._lock:
+                self.calls += 1
+                self.usage["prompt_tokens"] += usage["prompt_tokens"]
+                self.usage["completion_tokens"] += usage["completion_tokens"]
+            if latency > 0:
+                time.sleep(latency)
+        finally:
+            self.responder.release()
+
+        if not kwargs.get("logprobs"):
+            return [choice["text"] for choice in choices]
+        return [
+            {
+                "text": choice["text"],
+                "logprobs": ChoiceLogprobs.model_validate(choice["logprobs"]),
+            }
+            for choice in choices
+        ]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Request handler serving /v1/chat/completions from the server's responder"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        stub = self.server.stub
+        if not stub.responder.acquire():
+            self._send_json(
+                429,
+                {
+                    "error": {
+                        "message": "Rate limit reached (stub)",
+                        "type": "requests",
+                        "code": "rate_limit_exceeded",
+                    }
+                },
+            )
+            return
+        try:
+            messages = request.pop("messages", [])
+            choices, usage, latency = stub.responder.complete(messages, **request)
+            stub._record(usage)
+            if latency > 0:
+                time.sleep(latency)
+        finally:
+            stub.responder.release()
+
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-stub-{stub.calls}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": i,
+                        "message": {"role": "assistant", "content": choice["text"]},
+                        "logprobs": choice["logprobs"],
+                        "finish_reason": "stop",
+                    }
+                    for i, choice in enumerate(choices)
+                ],
+                "usage": usage,
+            },
+        )
+
+
+class StubServer:
+    """
+    OpenAI-compatible HTTP server backed by a StubResponder
+
+    Example:
+        with StubServer(StubResponder(latency=0.2)) as server:
+            lm = dspy.LM("openai/stub", api_key="x", api_base=server.base_url,
+                         logprobs=True, cache=False)
+    """
+
+    def __init__(
+        self,
+        responder: Optional[StubResponder] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.responder = responder or StubResponder()
+        self.calls = 0
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass as api_base to OpenAI-compatible clients"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _record(self, usage: Dict[str, int]) -> None:
+        with self._lock:
+            self.calls += 1
+            self.usage["prompt_tokens"] += usage["prompt_tokens"]
+            self.usage["completion_tokens"] += usage["completion_tokens"]
+
+    def start(self) -> "StubServer":
+        """Start serving on a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and release its socket"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()